@@ -0,0 +1,99 @@
+#!/usr/bin/env python3
+"""
+Duplicate check for the per-user unique keys used by the upsert-based candidate save:
+(user_id, email) and (user_id, file_hash). The keys themselves are added online by
+schema_migrations.py (revision 0006_candidate_unique_keys), which stops while duplicates exist.
+
+Run with --resolve-duplicates to keep the newest candidate of each duplicate group and
+clear the email/file_hash of the others, then re-run python schema_migrations.py --upgrade.
+"""
+
+import os
+import sys
+import argparse
+from sqlalchemy import create_engine, text
+from dotenv import load_dotenv
+
+# Load environment variables
+load_dotenv()
+
+# Get database connection details
+DB_HOST = os.environ.get("DB_HOST")
+DB_PORT = os.environ.get("DB_PORT")
+DB_USER = os.environ.get("DB_USER")
+DB_PASS = os.environ.get("DB_PASS")
+DB_NAME = os.environ.get("DB_NAME")
+
+# Construct the database URL
+DATABASE_URL = f"mysql+mysqlconnector://{DB_USER}:{DB_PASS}@{DB_HOST}:{DB_PORT}/{DB_NAME}"
+
+UNIQUE_KEYS = {
+    "uq_candidates_user_email": "email",
+    "uq_candidates_user_file_hash": "file_hash",
+}
+
+def find_duplicates(conn, column):
+    """Return (user_id, value, count) for every value used by more than one of a user's candidates"""
+    return conn.execute(text(f"""
+        SELECT user_id, {column}, COUNT(*)
+        FROM candidates
+        WHERE {column} IS NOT NULL
+        GROUP BY user_id, {column}
+        HAVING COUNT(*) > 1
+    """)).fetchall()
+
+def resolve_duplicates(conn, column):
+    """Keep the value on the newest candidate of each duplicate group, clear it on the rest"""
+    result = conn.execute(text(f"""
+        UPDATE candidates c
+        JOIN (
+            SELECT user_id, {column}, MAX(candidate_id) AS keep_id
+            FROM candidates
+            WHERE {column} IS NOT NULL
+            GROUP BY user_id, {column}
+            HAVING COUNT(*) > 1
+        ) d ON c.user_id = d.user_id AND c.{column} = d.{column} AND c.candidate_id <> d.keep_id
+        SET c.{column} = NULL
+    """))
+    return result.rowcount
+
+def run_migration(resolve=False):
+    """Report, or resolve, the candidates that would violate the per-user unique keys"""
+    engine = create_engine(DATABASE_URL)
+
+    try:
+        with engine.connect() as conn:
+            # Empty emails would all collide on the unique key
+            result = conn.execute(text("UPDATE candidates SET email = NULL WHERE email = ''"))
+            print(f"🔧 Cleared {result.rowcount} empty emails")
+
+            for column in UNIQUE_KEYS.values():
+                duplicates = find_duplicates(conn, column)
+                if not duplicates:
+                    continue
+                if not resolve:
+                    print(f"❌ {len(duplicates)} duplicate (user_id, {column}) groups found, e.g.:")
+                    for user_id, value, count in duplicates[:10]:
+                        print(f"   user {user_id}: {value} ({count} candidates)")
+                    print("   Merge them manually or re-run with --resolve-duplicates")
+                    conn.commit()
+                    return False
+                cleared = resolve_duplicates(conn, column)
+                print(f"🔧 Cleared {column} on {cleared} older duplicate candidates")
+
+            conn.commit()
+            print("✅ No duplicates left; add the keys with: python schema_migrations.py --upgrade")
+            return True
+
+    except Exception as e:
+        print(f"❌ Error running migration: {str(e)}")
+        return False
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Find or resolve duplicates blocking the per-user unique keys")
+    parser.add_argument("--resolve-duplicates", action="store_true",
+                        help="Keep the newest candidate of each duplicate group and clear the key on the others")
+    args = parser.parse_args()
+
+    success = run_migration(resolve=args.resolve_duplicates)
+    sys.exit(0 if success else 1)
@@ -1,23 +1,19 @@
 import os
-import io
-import os
 import tempfile
 import json
 import uuid
 import logging
 import asyncio
 import concurrent.futures
+import itertools
 import re
-from datetime import datetime
-from fastapi import FastAPI, File, UploadFile, Form, HTTPException, Depends, Query, Request
-from fastapi.responses import JSONResponse, RedirectResponse
+from contextlib import asynccontextmanager
+from datetime import datetime, date
+from fastapi import FastAPI, File, UploadFile, Form, HTTPException, Depends, Query, Request, BackgroundTasks
+from fastapi.responses import JSONResponse, RedirectResponse, StreamingResponse
 from fastapi.middleware.cors import CORSMiddleware
 from dotenv import load_dotenv
 from groq import Groq
-import PyPDF2
-import docx
-from PIL import Image
-import pytesseract
 import uvicorn
 from typing import List, Optional, Dict, Any
 from pydantic import BaseModel
@@ -36,15 +32,43 @@ logger = logging.getLogger(__name__)
 # Import database module
 from database import (
     get_db, Candidate, Education, Skill, WorkExperience, Status, init_db, 
-    save_candidate_data, get_all_candidates, shortlist_candidate,
-    calculate_file_hash, check_duplicate_file, check_duplicate_candidate_content, 
-    generate_batch_id, save_candidate_data_with_hash
+    save_candidate_data, shortlist_candidate,
+    calculate_file_hash, check_duplicate_files, check_duplicate_candidate_content, 
+    generate_batch_id, save_candidate_data_with_hash, save_candidates_bulk, CountStrategy, search_candidates,
+    set_candidate_summary_status, update_candidate_statuses, replicas, CandidateFilter, iter_candidate_documents,
+    get_candidate_facets, FACET_LIMIT, list_archived_candidates, restore_archived_candidates
 )
+from candidate_export import ExportFormat, EXPORT_MEDIA_TYPES, export_lines
 from sqlalchemy.orm import Session
+from sqlalchemy import select
+from sqlalchemy.ext.asyncio import AsyncSession
+
+# Connection pool metrics
+from connection_pool import get_pool_stats
+
+# Async database access for async endpoints
+from async_database import (
+    get_async_db, get_all_candidates_async, check_duplicate_file_async,
+    check_duplicate_candidate_content_async, save_candidate_data_with_hash_async
+)
 
 # Import S3 storage module
 from s3_storage import upload_file_to_s3, generate_presigned_url
 
+# Import durable ingestion queue
+from ingestion_queue import (
+    enqueue_batch, get_job_status, create_job, record_file_result, finish_job, fail_stale_jobs, delete_staged_file, FAILED
+)
+
+# Import archive reader for bulk imports
+from archive_reader import is_supported_archive, is_readable_archive, count_archive_members, iter_archive_members
+
+# Import staged ingestion pipeline
+from ingestion_pipeline import (
+    Stage, run_pipeline, run_in_process, PIPELINE_EXTRACT_CONCURRENCY,
+    PIPELINE_LLM_CONCURRENCY, PIPELINE_S3_CONCURRENCY, PIPELINE_DB_CONCURRENCY, PIPELINE_DB_BATCH_SIZE
+)
+
 # Import shortlisting service
 from shortlisting_service import shortlist_candidates, CandidateScore, ShortlistingResult
 
@@ -54,13 +78,13 @@ from chat_service import chat_service, ChatRequest, ChatResponse, ChatHistory
 # Import authentication middleware
 from auth_middleware import get_current_user, get_current_user_optional
 
-try:
-    from pdf2image import convert_from_path
-except ImportError:
-    print("pdf2image is not installed. OCR functionality might be limited.")
-    # Fallback function to avoid errors if pdf2image is not installed
-    def convert_from_path(*args, **kwargs):
-        return []
+# Import hedged LLM requester
+from llm_hedging import llm_hedger
+
+# Import text extraction (kept in its own module so it can run in worker processes)
+from text_extraction import (
+    extract_text_from_pdf, extract_text_from_docx, extract_text_from_txt, extract_text_from_file
+)
 
 # Load environment variables
 load_dotenv()
@@ -69,7 +93,13 @@ load_dotenv()
 GROQ_API_KEY = os.environ.get("GROQ_API_KEY")
 client = Groq(api_key=GROQ_API_KEY)
 
-app = FastAPI()
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    # Archive imports run inside an API process; ones a previous process left unfinished are failed
+    await asyncio.to_thread(fail_stale_jobs)
+    yield
+
+app = FastAPI(lifespan=lifespan)
 
 # Configure CORS
 app.add_middleware(
@@ -80,95 +110,6 @@ app.add_middleware(
     allow_headers=["*"],
 )
 
-def extract_text_from_pdf(file_path):
-    """Extracts text from a PDF file."""
-    pdf_reader = PyPDF2.PdfReader(file_path)
-    text = ""
-    for page_num in range(len(pdf_reader.pages)):
-        page = pdf_reader.pages[page_num]
-        page_text = page.extract_text()
-        text += page_text
-    
-    # Check if text extraction failed or returned very little text
-    if len(text.strip()) < 100:  # Adjust threshold as needed
-        print("Standard text extraction yielded minimal results. Attempting OCR...")
-        text = extract_text_using_ocr(file_path)
-    
-    return text
-
-def extract_text_using_ocr(file_path):
-    """Extracts text from images/scanned PDFs using OCR."""
-    text = ""
-    try:
-        images = convert_from_path(file_path)
-        for image in images:
-            text += pytesseract.image_to_string(image)
-    except Exception as e:
-        print(f"OCR error: {str(e)}")
-    
-    return text
-
-def extract_text_from_docx(file_path):
-    """Extracts text from a Word document."""
-    doc = docx.Document(file_path)
-    full_text = []
-    
-    # Extract text from paragraphs
-    for para in doc.paragraphs:
-        full_text.append(para.text)
-    
-    # Also extract text from tables
-    for table in doc.tables:
-        for row in table.rows:
-            for cell in row.cells:
-                full_text.append(cell.text)
-    
-    extracted_text = '\n'.join(full_text)
-    
-    # Check if extracted text is minimal
-    if len(extracted_text.strip()) < 100:  # Adjust threshold as needed
-        print("Standard text extraction yielded minimal results from DOCX. Attempting OCR on document images...")
-        extracted_text = extract_text_from_docx_images(file_path) or extracted_text
-    
-    return extracted_text
-
-def extract_text_from_docx_images(file_path):
-    """Extract text from images embedded in a DOCX file using OCR."""
-    try:
-        # Load the document
-        doc = docx.Document(file_path)
-        
-        # Extract and process images
-        extracted_text = ""
-        
-        for rel in doc.part.rels.values():
-            if "image" in rel.target_ref:
-                try:
-                    # Get image data
-                    image_data = rel.target_part.blob
-                    
-                    # Create a PIL Image from binary data
-                    image = Image.open(io.BytesIO(image_data))
-                    
-                    # Use OCR to extract text
-                    image_text = pytesseract.image_to_string(image)
-                    if image_text.strip():
-                        extracted_text += image_text + "\n\n"
-                except Exception as e:
-                    print(f"Error processing image in DOCX: {str(e)}")
-                    continue
-        
-        return extracted_text
-    except Exception as e:
-        print(f"Error extracting images from DOCX: {str(e)}")
-        return ""
-
-def extract_text_from_txt(file_path):
-    """Extracts text from a text file."""
-    with open(file_path, 'r', encoding='utf-8') as file:
-        text = file.read()
-    return text
-
 def extract_resume_data(resume_text):
     prompt = f"""Extract ONLY the following information from the resume text provided below:
     - Full Name
@@ -217,7 +158,9 @@ def extract_resume_data(resume_text):
     - If a field is not found, indicate "Not found" for that field only.
     """
 
-    chat_completion = client.chat.completions.create(
+    # Hedged when LLM_HEDGING_ENABLED is set, otherwise a plain call
+    chat_completion = llm_hedger.call(
+        client.chat.completions.create,
         messages=[
             {
                 "role": "user",
@@ -263,6 +206,49 @@ class BatchProcessingResponse(BaseModel):
     duplicates: int
     results: List[FileProcessingResult]
 
+# Background ingestion job models
+class IngestionJobResponse(BaseModel):
+    batch_id: str
+    status: str
+    total_files: int
+    status_url: str
+
+class IngestionJobStatus(BaseModel):
+    batch_id: str
+    status: str  # 'queued', 'processing', 'completed', 'failed'
+    total_files: int
+    queued: int
+    processing: int
+    successful: int
+    failed: int
+    duplicates: int
+    created_at: Optional[str] = None
+    finished_at: Optional[str] = None
+    results: List[FileProcessingResult]
+
+# Maximum number of files accepted per background ingestion job
+MAX_QUEUED_BATCH_FILES = 500
+
+# Bulk status update models
+class BulkStatusUpdate(BaseModel):
+    candidate_ids: List[int]
+    status: str  # 'pending', 'shortlisted', 'rejected'
+
+class BulkStatusUpdateResponse(BaseModel):
+    status: str
+    requested: int
+    updated: int  # Candidates of other users or unknown IDs are not updated
+
+# Maximum number of candidates per bulk status update
+MAX_BULK_STATUS_CANDIDATES = 1000
+
+class ArchivedCandidatesRestore(BaseModel):
+    candidate_ids: List[int]  # At most MAX_BULK_STATUS_CANDIDATES
+
+class ArchivedCandidatesRestoreResponse(BaseModel):
+    restored: List[int]
+    conflicts: List[int]  # Left archived: the user has an active candidate with the same email or file
+
 def parse_markdown_data(markdown_data: str) -> ParsedResumeData:
     """
     Parse the markdown text returned by the LLM into a structured format
@@ -454,7 +440,6 @@ async def upload_resume(
     parse: bool = Form(False), 
     save_to_db: bool = Form(False),
     duplicate_handling: DuplicateHandling = Form(DuplicateHandling.STRICT),
-    db: Session = Depends(get_db),
     current_user: Dict[str, Any] = Depends(get_current_user)
 ):
     """
@@ -483,7 +468,7 @@ async def upload_resume(
             file_hash = calculate_file_hash(temp_file_path)
             if file_hash:
                 # Check for file-based duplicates (same file uploaded by same user)
-                duplicate_info = check_duplicate_file(file_hash, current_user['id'])
+                duplicate_info = await check_duplicate_file_async(file_hash, current_user['id'])
                 if duplicate_info and duplicate_handling == DuplicateHandling.STRICT:
                     os.unlink(temp_file_path)
                     raise HTTPException(
@@ -510,7 +495,7 @@ async def upload_resume(
             
             # Check for content-based duplicates (similar candidate data) when saving to DB
             if save_to_db and duplicate_handling == DuplicateHandling.STRICT:
-                content_duplicate_info = check_duplicate_candidate_content(parsed_structured_data.dict(), current_user['id'])
+                content_duplicate_info = await check_duplicate_candidate_content_async(parsed_structured_data.dict(), current_user['id'])
                 if content_duplicate_info and content_duplicate_info['is_likely_same_person']:
                     os.unlink(temp_file_path)
                     raise HTTPException(
@@ -544,7 +529,7 @@ async def upload_resume(
                 
                 try:
                     # Save to database with S3 information and file hash
-                    candidate_id = save_candidate_data_with_hash(
+                    candidate_id = await save_candidate_data_with_hash_async(
                         parsed_structured_data.dict(),
                         resume_file_path=s3_key,
                         resume_s3_url=presigned_url if presigned_success else s3_url,
@@ -581,13 +566,271 @@ async def upload_resume(
         logger.error(f"Error processing file: {str(e)}")
         raise HTTPException(status_code=500, detail=f"Error processing file: {str(e)}")
 
-async def process_single_file(file: UploadFile, batch_id: str, user_id: int, parse: bool = True, 
-                             save_to_db: bool = True, duplicate_handling: DuplicateHandling = DuplicateHandling.STRICT) -> FileProcessingResult:
+def _new_ingestion_item(file_path: Optional[str], filename: str, batch_id: str, user_id: int, parse: bool = True,
+                        save_to_db: bool = True, duplicate_handling: DuplicateHandling = DuplicateHandling.STRICT) -> Dict[str, Any]:
+    """Create the state carried by one file through the ingestion steps"""
+    return {
+        "filename": filename,
+        "file_path": file_path,
+        "file_extension": filename.split('.')[-1].lower(),
+        "batch_id": batch_id,
+        "user_id": user_id,
+        "parse": parse,
+        "save_to_db": save_to_db,
+        "duplicate_handling": duplicate_handling,
+        "file_hash": None,
+        "extracted_text": None,
+        "parsed_data": None,
+        "parsed_structured_data": None,
+        "s3_key": None,
+        "resume_s3_url": None,
+        "candidate_id": None,
+        "result": None  # Set once the file is finished (success, error or duplicate)
+    }
+
+def _success_result(item: Dict[str, Any]) -> FileProcessingResult:
+    return FileProcessingResult(
+        filename=item['filename'],
+        status="success",
+        candidate_id=item['candidate_id'],
+        extracted_text=item['extracted_text'],
+        parsed_data=item['parsed_data'],
+        message="Successfully processed"
+    )
+
+def _hash_file_step(item: Dict[str, Any]) -> Dict[str, Any]:
+    """Validate the file type and hash the file"""
+    # Check if file extension is supported
+    if item['file_extension'] not in ["pdf", "docx", "txt"]:
+        item['result'] = FileProcessingResult(
+            filename=item['filename'],
+            status="error",
+            message="Unsupported file format. Please upload a PDF, DOCX, or TXT file."
+        )
+        return item
+    
+    # Calculate file hash for duplicate checking
+    item['file_hash'] = calculate_file_hash(item['file_path'])
+    if not item['file_hash']:
+        item['result'] = FileProcessingResult(
+            filename=item['filename'],
+            status="error",
+            message="Failed to calculate file hash"
+        )
+    return item
+
+def _resolve_file_duplicates(items: List[Dict[str, Any]], seen_hashes: Dict[str, str]) -> List[Dict[str, Any]]:
     """
-    Process a single file in a batch operation
+    Set-based file duplicate check for a group of hashed items from the same batch.
+    Identical files within the batch are caught before any extraction or LLM call, and
+    the remaining hashes are checked against the user's candidates in a single query.
     
     Args:
-        file: The uploaded file
+        items: Hashed ingestion items sharing one user and duplicate handling mode
+        seen_hashes: file_hash -> filename of files already accepted earlier in the batch (updated in place)
+    """
+    pending = []
+    for item in items:
+        if item['result'] is not None:
+            continue
+        # The same bytes twice in one upload are always the same resume; processing both
+        # would only race on the unique file_hash constraint
+        first_filename = seen_hashes.get(item['file_hash'])
+        if first_filename is not None:
+            item['result'] = FileProcessingResult(
+                filename=item['filename'],
+                status="duplicate",
+                message=f"Identical to '{first_filename}' in this batch"
+            )
+            continue
+        seen_hashes[item['file_hash']] = item['filename']
+        pending.append(item)
+    
+    # Only strict mode blocks file-based duplicates, other modes update the existing record
+    strict = [item for item in pending if item['duplicate_handling'] == DuplicateHandling.STRICT]
+    if not strict:
+        return items
+    
+    existing = check_duplicate_files([item['file_hash'] for item in strict], strict[0]['user_id'])
+    for item in strict:
+        duplicate_info = existing.get(item['file_hash'])
+        if duplicate_info:
+            item['result'] = FileProcessingResult(
+                filename=item['filename'],
+                status="duplicate",
+                message=f"Identical file already exists for candidate '{duplicate_info['candidate_name']}' (uploaded on {duplicate_info['upload_date'][:10]})",
+                existing_candidate_id=duplicate_info['candidate_id']
+            )
+    return items
+
+def _prepare_batch(items: List[Dict[str, Any]], seen_hashes: Dict[str, str]) -> List[Dict[str, Any]]:
+    """Hash every file of a batch, then resolve duplicates for the whole group at once"""
+    for item in items:
+        if item['result'] is None:
+            _hash_file_step(item)
+    return _resolve_file_duplicates(items, seen_hashes)
+
+def _check_file_step(item: Dict[str, Any]) -> Dict[str, Any]:
+    """Validate, hash and duplicate-check a single file"""
+    return _prepare_batch([item], {})[0]
+
+def _check_extracted_text(item: Dict[str, Any]) -> Dict[str, Any]:
+    """Finish the file here if there is nothing to parse"""
+    if not (item['parse'] and item['extracted_text'].strip()):
+        item['result'] = _success_result(item)
+    return item
+
+def _extract_text_step(item: Dict[str, Any]) -> Dict[str, Any]:
+    item['extracted_text'] = extract_text_from_file(item['file_path'], item['file_extension'])
+    return _check_extracted_text(item)
+
+def _parse_step(item: Dict[str, Any]) -> Dict[str, Any]:
+    """Parse the resume with the LLM and check for content-based duplicates"""
+    item['parsed_data'] = extract_resume_data(item['extracted_text'])
+    item['parsed_structured_data'] = parse_markdown_data(item['parsed_data'])
+    
+    # Check for content-based duplicates (similar candidate data) only in strict mode
+    if item['duplicate_handling'] == DuplicateHandling.STRICT:
+        content_duplicate_info = check_duplicate_candidate_content(item['parsed_structured_data'].dict(), item['user_id'])
+        if content_duplicate_info and content_duplicate_info['is_likely_same_person']:
+            item['result'] = FileProcessingResult(
+                filename=item['filename'],
+                status="duplicate",
+                message=f"Similar candidate '{content_duplicate_info['candidate_name']}' already exists ({content_duplicate_info['similarity_percentage']:.0f}% match). This appears to be an updated resume of the same person.",
+                existing_candidate_id=content_duplicate_info['candidate_id']
+            )
+            return item
+    
+    if not item['save_to_db']:
+        item['result'] = _success_result(item)
+    return item
+
+def _upload_step(item: Dict[str, Any]) -> Dict[str, Any]:
+    """Upload the resume to S3"""
+    filename = item['filename']
+    
+    # Generate a unique filename but keep it flat without extra folders
+    timestamp = datetime.utcnow().strftime('%Y%m%d_%H%M%S')
+    unique_id = str(uuid.uuid4())[:8]  # Use shorter UUID
+    filename_base = os.path.splitext(filename)[0]
+    filename_ext = os.path.splitext(filename)[1]
+    
+    # Create a flatter S3 key structure
+    s3_key = f"resumes/{filename_base}_{timestamp}_{unique_id}{filename_ext}"
+    
+    # Upload to S3
+    success, s3_url = upload_file_to_s3(item['file_path'], s3_key)
+    
+    if not success:
+        item['result'] = FileProcessingResult(
+            filename=filename,
+            status="error",
+            message=f"Failed to upload file to S3: {s3_url}"
+        )
+        return item
+    
+    # Generate a presigned URL for temporary access
+    presigned_success, presigned_url = generate_presigned_url(s3_key, expiration=3600*24)  # 24 hours
+    
+    item['s3_key'] = s3_key
+    item['resume_s3_url'] = presigned_url if presigned_success else s3_url
+    return item
+
+def _save_step(item: Dict[str, Any]) -> Dict[str, Any]:
+    """Save the parsed candidate to the database"""
+    filename = item['filename']
+    
+    try:
+        # Save to database with file hash and batch ID
+        item['candidate_id'] = save_candidate_data_with_hash(
+            item['parsed_structured_data'].dict(),
+            resume_file_path=item['s3_key'],
+            resume_s3_url=item['resume_s3_url'],
+            original_filename=filename,
+            file_hash=item['file_hash'],
+            batch_id=item['batch_id'],
+            user_id=item['user_id']
+        )
+        
+        # If an existing record was updated (by email or file hash), this will return the ID
+        if item['candidate_id'] is None:
+            item['result'] = FileProcessingResult(
+                filename=filename,
+                status="error",
+                message="Failed to save candidate data to database."
+            )
+            return item
+            
+    except Exception as e:
+        logger.error(f"Error saving candidate: {str(e)}")
+        # Check for specific error types we can handle better
+        error_message = str(e)
+        if "Duplicate entry" in error_message and "file_hash" in error_message:
+            item['result'] = FileProcessingResult(
+                filename=filename,
+                status="duplicate",
+                message=f"This file has already been uploaded (duplicate file hash)."
+            )
+        elif "Duplicate entry" in error_message and "email" in error_message:
+            item['result'] = FileProcessingResult(
+                filename=filename,
+                status="duplicate",
+                message=f"A candidate with this email already exists."
+            )
+        else:
+            item['result'] = FileProcessingResult(
+                filename=filename,
+                status="error",
+                message=f"Database error: {error_message[:100]}..."  # Truncate very long error messages
+            )
+        return item
+    
+    item['result'] = _success_result(item)
+    return item
+
+def _save_batch_step(items: List[Dict[str, Any]]) -> List[Dict[str, Any]]:
+    """
+    Save a group of parsed candidates in one bulk transaction.
+    Items are grouped by user and batch; if a group's transaction fails, its items are
+    saved one at a time so a single bad record only fails its own file.
+    """
+    groups = {}
+    for item in items:
+        groups.setdefault((item['user_id'], item['batch_id']), []).append(item)
+    
+    for (user_id, batch_id), group in groups.items():
+        candidate_ids = save_candidates_bulk(
+            [
+                {
+                    'parsed_data': item['parsed_structured_data'].dict(),
+                    'resume_file_path': item['s3_key'],
+                    'resume_s3_url': item['resume_s3_url'],
+                    'original_filename': item['filename'],
+                    'file_hash': item['file_hash']
+                }
+                for item in group
+            ],
+            user_id=user_id,
+            batch_id=batch_id
+        )
+        for item, candidate_id in zip(group, candidate_ids):
+            if candidate_id is None:
+                _save_step(item)
+            else:
+                item['candidate_id'] = candidate_id
+                item['result'] = _success_result(item)
+    return items
+
+def process_resume_file(file_path: str, filename: str, batch_id: str, user_id: int, parse: bool = True,
+                        save_to_db: bool = True, duplicate_handling: DuplicateHandling = DuplicateHandling.STRICT) -> FileProcessingResult:
+    """
+    Process a resume file already on local disk, running every ingestion step in sequence.
+    Used by the ingestion workers; the batch endpoint runs the same steps as a pipeline.
+    The caller owns file_path and is responsible for removing it.
+    
+    Args:
+        file_path: Path to the local copy of the file
+        filename: Original filename of the upload
         batch_id: The batch ID for this upload session
         user_id: ID of the user uploading the file
         parse: Whether to parse the resume
@@ -597,163 +840,16 @@ async def process_single_file(file: UploadFile, batch_id: str, user_id: int, par
     Returns:
         FileProcessingResult: Result of processing this file
     """
-    filename = file.filename
+    item = _new_ingestion_item(file_path, filename, batch_id, user_id, parse, save_to_db, duplicate_handling)
     
     try:
-        # Check if file extension is supported
-        file_extension = filename.split('.')[-1].lower()
-        if file_extension not in ["pdf", "docx", "txt"]:
-            return FileProcessingResult(
-                filename=filename,
-                status="error",
-                message="Unsupported file format. Please upload a PDF, DOCX, or TXT file."
-            )
-          
-        # Create a temporary file
-        with tempfile.NamedTemporaryFile(delete=False, suffix=f".{file_extension}") as temp_file:
-            temp_file_path = temp_file.name
-            content = await file.read()
-            temp_file.write(content)
-          
-        # Calculate file hash for duplicate checking
-        file_hash = calculate_file_hash(temp_file_path)
-        if not file_hash:
-            os.unlink(temp_file_path)
-            return FileProcessingResult(
-                filename=filename,
-                status="error",
-                message="Failed to calculate file hash"
-            )
-        
-        # Check for file-based duplicates (same file uploaded by same user) only if not allowing all
-        if duplicate_handling != DuplicateHandling.ALLOW_ALL:
-            duplicate_info = check_duplicate_file(file_hash, user_id)
-            if duplicate_info:
-                # Only block duplicates in strict mode, otherwise we will update the record
-                if duplicate_handling == DuplicateHandling.STRICT:
-                    os.unlink(temp_file_path)
-                    return FileProcessingResult(
-                        filename=filename,
-                        status="duplicate",
-                        message=f"Identical file already exists for candidate '{duplicate_info['candidate_name']}' (uploaded on {duplicate_info['upload_date'][:10]})",
-                        existing_candidate_id=duplicate_info['candidate_id']
-                    )
-                # Continue processing for non-strict modes, we'll update the record
-        
-        # Extract text based on file type
-        if file_extension == "pdf":
-            extracted_text = extract_text_from_pdf(temp_file_path)
-        elif file_extension == "docx":
-            extracted_text = extract_text_from_docx(temp_file_path)
-        elif file_extension == "txt":
-            extracted_text = extract_text_from_txt(temp_file_path)
-        
-        # Parse the resume if requested
-        parsed_data = None
-        parsed_structured_data = None
-        candidate_id = None
-        if parse and extracted_text.strip():
-            parsed_data = extract_resume_data(extracted_text)
-            parsed_structured_data = parse_markdown_data(parsed_data)
-              
-            # Check for content-based duplicates (similar candidate data) only in strict mode
-            if duplicate_handling == DuplicateHandling.STRICT:
-                content_duplicate_info = check_duplicate_candidate_content(parsed_structured_data.dict(), user_id)
-                if content_duplicate_info and content_duplicate_info['is_likely_same_person']:
-                    os.unlink(temp_file_path)
-                    return FileProcessingResult(
-                        filename=filename,
-                        status="duplicate",
-                        message=f"Similar candidate '{content_duplicate_info['candidate_name']}' already exists ({content_duplicate_info['similarity_percentage']:.0f}% match). This appears to be an updated resume of the same person.",
-                        existing_candidate_id=content_duplicate_info['candidate_id']
-                    )
-            
-            # Save to database if requested
-            if save_to_db:
-                # Generate a unique filename but keep it flat without extra folders
-                timestamp = datetime.utcnow().strftime('%Y%m%d_%H%M%S')
-                unique_id = str(uuid.uuid4())[:8]  # Use shorter UUID
-                filename_base = os.path.splitext(filename)[0]
-                filename_ext = os.path.splitext(filename)[1]
-                
-                # Create a flatter S3 key structure
-                s3_key = f"resumes/{filename_base}_{timestamp}_{unique_id}{filename_ext}"
-                
-                # Upload to S3
-                success, s3_url = upload_file_to_s3(temp_file_path, s3_key)
-                
-                if not success:
-                    os.unlink(temp_file_path)
-                    return FileProcessingResult(
-                        filename=filename,
-                        status="error",
-                        message=f"Failed to upload file to S3: {s3_url}"
-                    )
-                
-                # Generate a presigned URL for temporary access
-                presigned_success, presigned_url = generate_presigned_url(s3_key, expiration=3600*24)  # 24 hours
-                
-                try:
-                    # Save to database with file hash and batch ID
-                    candidate_id = save_candidate_data_with_hash(
-                        parsed_structured_data.dict(),
-                        resume_file_path=s3_key,
-                        resume_s3_url=presigned_url if presigned_success else s3_url,
-                        original_filename=filename,
-                        file_hash=file_hash,
-                        batch_id=batch_id,
-                        user_id=user_id
-                    )
-                    
-                    # If an existing record was updated (by email or file hash), this will return the ID
-                    if candidate_id is None:
-                        os.unlink(temp_file_path)
-                        return FileProcessingResult(
-                            filename=filename,
-                            status="error",
-                            message="Failed to save candidate data to database."
-                        )
-                        
-                except Exception as e:
-                    os.unlink(temp_file_path)
-                    logger.error(f"Error saving candidate: {str(e)}")
-                    # Check for specific error types we can handle better
-                    error_message = str(e)
-                    if "Duplicate entry" in error_message and "file_hash" in error_message:
-                        return FileProcessingResult(
-                            filename=filename,
-                            status="duplicate",
-                            message=f"This file has already been uploaded (duplicate file hash)."
-                        )
-                    elif "Duplicate entry" in error_message and "email" in error_message:
-                        return FileProcessingResult(
-                            filename=filename,
-                            status="duplicate",
-                            message=f"A candidate with this email already exists."
-                        )
-                    else:
-                        return FileProcessingResult(
-                            filename=filename,
-                            status="error",
-                            message=f"Database error: {error_message[:100]}..."  # Truncate very long error messages
-                        )
-        
-        # Clean up temporary file
-        os.unlink(temp_file_path)
-        
-        return FileProcessingResult(
-            filename=filename,
-            status="success",
-            candidate_id=candidate_id,
-            extracted_text=extracted_text,
-            parsed_data=parsed_data,
-            message="Successfully processed"
-        )
+        for step in (_check_file_step, _extract_text_step, _parse_step, _upload_step, _save_step):
+            item = step(item)
+            if item['result'] is not None:
+                return item['result']
+        return _success_result(item)
     
     except Exception as e:
-        # Clean up temporary file in case of error
-        if 'temp_file_path' in locals() and os.path.exists(temp_file_path):
-            os.unlink(temp_file_path)
         logger.error(f"Error processing file {filename}: {str(e)}")
         return FileProcessingResult(
             filename=filename,
@@ -761,6 +857,41 @@ async def process_single_file(file: UploadFile, batch_id: str, user_id: int, par
             message=f"Error processing file: {str(e)}"
         )
 
+# Batch ingestion pipeline stages. CPU-bound extraction runs in worker processes,
+# blocking LLM/S3/DB calls run in threads, each bounded by its own concurrency limit.
+async def _extract_text_stage(item: Dict[str, Any]) -> Dict[str, Any]:
+    item['extracted_text'] = await run_in_process(extract_text_from_file, item['file_path'], item['file_extension'])
+    return _check_extracted_text(item)
+
+async def _parse_stage(item: Dict[str, Any]) -> Dict[str, Any]:
+    return await asyncio.to_thread(_parse_step, item)
+
+async def _upload_stage(item: Dict[str, Any]) -> Dict[str, Any]:
+    return await asyncio.to_thread(_upload_step, item)
+
+async def _save_stage(items: List[Dict[str, Any]]) -> List[Dict[str, Any]]:
+    return await asyncio.to_thread(_save_batch_step, items)
+
+def _ingestion_stages() -> List[Stage]:
+    return [
+        Stage("extract", _extract_text_stage, concurrency=PIPELINE_EXTRACT_CONCURRENCY),
+        Stage("parse", _parse_stage, concurrency=PIPELINE_LLM_CONCURRENCY),
+        Stage("upload", _upload_stage, concurrency=PIPELINE_S3_CONCURRENCY),
+        Stage("save", _save_stage, concurrency=PIPELINE_DB_CONCURRENCY, batch_size=PIPELINE_DB_BATCH_SIZE),
+    ]
+
+def _pipeline_error_result(item: Dict[str, Any], stage: Stage, error: Exception) -> FileProcessingResult:
+    return FileProcessingResult(
+        filename=item['filename'],
+        status="error",
+        message=f"Error processing file: {str(error)}"
+    )
+
+def _cleanup_ingestion_item(item: Dict[str, Any]):
+    """Remove the temporary copy of a file as soon as it leaves the pipeline"""
+    if item.get('file_path') and os.path.exists(item['file_path']):
+        os.unlink(item['file_path'])
+
 @app.post("/upload-resumes-batch/", response_model=BatchProcessingResponse)
 async def upload_resumes_batch(
     request: Request,
@@ -772,7 +903,8 @@ async def upload_resumes_batch(
 ):
     """
     Upload and process multiple resume files in batch.
-    Files are processed in parallel for better performance.
+    Files flow through a staged pipeline (read, extract, parse, upload, save) so that
+    different files overlap in different stages.
     Set duplicate_handling to control how duplicates are handled:
     - strict: Block both file and content duplicates
     - allow_updates: Allow content duplicates (updated resumes from same person)
@@ -786,21 +918,25 @@ async def upload_resumes_batch(
     batch_id = generate_batch_id()
     
     try:
-        # Process files in parallel using asyncio.gather
-        tasks = [process_single_file(file, batch_id, current_user['id'], parse, save_to_db, duplicate_handling) for file in files]
-        results = await asyncio.gather(*tasks, return_exceptions=True)
+        items = []
+        for file in files:
+            item = _new_ingestion_item(None, file.filename, batch_id, current_user['id'], parse, save_to_db, duplicate_handling)
+            if item['file_extension'] in ["pdf", "docx", "txt"]:
+                with tempfile.NamedTemporaryFile(delete=False, suffix=f".{item['file_extension']}") as temp_file:
+                    item['file_path'] = temp_file.name
+                    temp_file.write(await file.read())
+            items.append(item)
         
-        # Convert any exceptions to error results
-        processed_results = []
-        for i, result in enumerate(results):
-            if isinstance(result, Exception):
-                processed_results.append(FileProcessingResult(
-                    filename=files[i].filename,
-                    status="error",
-                    message=f"Unexpected error: {str(result)}"
-                ))
-            else:
-                processed_results.append(result)
+        # Hash everything first so duplicates are settled in one query, before any extraction or LLM call
+        await asyncio.to_thread(_prepare_batch, items, {})
+        
+        finished = await run_pipeline(
+            items,
+            _ingestion_stages(),
+            on_error=_pipeline_error_result,
+            on_finished=_cleanup_ingestion_item
+        )
+        processed_results = [item['result'] for item in finished]
         
         # Calculate statistics
         total_files = len(processed_results)
@@ -821,6 +957,214 @@ async def upload_resumes_batch(
         logger.error(f"Error in batch processing: {str(e)}")
         raise HTTPException(status_code=500, detail=f"Error in batch processing: {str(e)}")
 
+def _stage_upload(content: bytes, file_extension: str, staging_key: str):
+    """Upload a file's content to its S3 staging key; returns (success, error) like upload_file_to_s3"""
+    with tempfile.NamedTemporaryFile(delete=False, suffix=f".{file_extension}") as temp_file:
+        temp_file_path = temp_file.name
+        temp_file.write(content)
+    try:
+        return upload_file_to_s3(temp_file_path, staging_key)
+    finally:
+        os.unlink(temp_file_path)
+
+@app.post("/upload-resumes-batch/async/", response_model=IngestionJobResponse, status_code=202)
+async def enqueue_resumes_batch(
+    request: Request,
+    files: List[UploadFile] = File(...),
+    parse: bool = Form(True),
+    save_to_db: bool = Form(True),
+    duplicate_handling: DuplicateHandling = Form(DuplicateHandling.STRICT),
+    current_user: Dict[str, Any] = Depends(get_current_user)
+):
+    """
+    Queue multiple resume files for background ingestion and return immediately.
+    Files are staged in S3 and processed by ingestion workers (see ingestion_worker.py).
+    Poll GET /upload-resumes-batch/{batch_id} for progress and per-file results.
+    """
+    if not files:
+        raise HTTPException(status_code=400, detail="No files provided")
+    
+    if len(files) > MAX_QUEUED_BATCH_FILES:
+        raise HTTPException(status_code=400, detail=f"Maximum {MAX_QUEUED_BATCH_FILES} files allowed per batch")
+    
+    batch_id = generate_batch_id()
+    
+    # Stage each file where any worker can reach it, a few uploads at a time off the event loop
+    upload_slots = asyncio.Semaphore(PIPELINE_S3_CONCURRENCY)
+    
+    async def stage(position: int, file: UploadFile) -> Dict[str, Any]:
+        file_extension = file.filename.split('.')[-1].lower()
+        if file_extension not in ["pdf", "docx", "txt"]:
+            return {
+                "filename": file.filename,
+                "staging_key": None,
+                "message": "Unsupported file format. Please upload a PDF, DOCX, or TXT file."
+            }
+        
+        staging_key = f"staging/{batch_id}/{position}_{os.path.basename(file.filename)}"
+        async with upload_slots:
+            content = await file.read()
+            success, error = await asyncio.to_thread(_stage_upload, content, file_extension, staging_key)
+        return {
+            "filename": file.filename,
+            "staging_key": staging_key if success else None,
+            "message": None if success else f"Failed to stage file: {error}"
+        }
+    
+    staged_files = await asyncio.gather(*[stage(position, file) for position, file in enumerate(files)])
+    
+    queued = await asyncio.to_thread(
+        enqueue_batch, batch_id, current_user['id'], staged_files, parse, save_to_db, duplicate_handling.value
+    )
+    if not queued:
+        # No worker will pick these up
+        for entry in staged_files:
+            await asyncio.to_thread(delete_staged_file, entry['staging_key'])
+        raise HTTPException(status_code=500, detail="Failed to queue batch for processing")
+    
+    return IngestionJobResponse(
+        batch_id=batch_id,
+        status="queued",
+        total_files=len(staged_files),
+        status_url=f"/upload-resumes-batch/{batch_id}"
+    )
+
+@app.get("/upload-resumes-batch/{batch_id}", response_model=IngestionJobStatus)
+async def get_batch_status(
+    request: Request,
+    batch_id: str,
+    current_user: Dict[str, Any] = Depends(get_current_user)
+):
+    """
+    Get progress and per-file results of a background ingestion job (user-specific)
+    """
+    job_status = get_job_status(batch_id, current_user['id'])
+    if not job_status:
+        raise HTTPException(status_code=404, detail=f"Batch {batch_id} not found or not accessible")
+    
+    return job_status
+
+# Number of archive members hashed and duplicate-checked together
+ARCHIVE_DEDUP_CHUNK_SIZE = 100
+
+async def _archive_items(archive_path: str, batch_id: str, user_id: int, parse: bool, save_to_db: bool,
+                         duplicate_handling: DuplicateHandling):
+    """Yield pipeline items for archive members, reading members in chunks only when the pipeline has room"""
+    members = iter_archive_members(archive_path)
+    seen_hashes = {}
+    position = 0
+    while True:
+        chunk = await asyncio.to_thread(lambda: list(itertools.islice(members, ARCHIVE_DEDUP_CHUNK_SIZE)))
+        if not chunk:
+            return
+        
+        items = []
+        for member in chunk:
+            item = _new_ingestion_item(member['file_path'], member['filename'], batch_id, user_id, parse, save_to_db, duplicate_handling)
+            item['position'] = position
+            if member['error']:
+                item['result'] = FileProcessingResult(filename=member['filename'], status="error", message=member['error'])
+            position += 1
+            items.append(item)
+        
+        await asyncio.to_thread(_prepare_batch, items, seen_hashes)
+        for item in items:
+            yield item
+
+async def _ingest_archive(archive_path: str, batch_id: str, user_id: int, parse: bool, save_to_db: bool,
+                          duplicate_handling: DuplicateHandling):
+    """Stream an archive through the ingestion pipeline, recording progress per file"""
+    total_files = 0
+    status = "completed"
+    in_flight = {}
+    
+    async def track(items):
+        async for item in items:
+            in_flight[item['position']] = item
+            yield item
+    
+    async def record(item: Dict[str, Any]):
+        nonlocal total_files
+        total_files += 1
+        in_flight.pop(item['position'], None)
+        _cleanup_ingestion_item(item)
+        result = item['result']
+        await asyncio.to_thread(
+            record_file_result, batch_id, item['position'], result.filename, result.status,
+            result.candidate_id, result.existing_candidate_id, result.message
+        )
+    
+    try:
+        await run_pipeline(
+            track(_archive_items(archive_path, batch_id, user_id, parse, save_to_db, duplicate_handling)),
+            _ingestion_stages(),
+            on_error=_pipeline_error_result,
+            on_finished=record,
+            collect_results=False
+        )
+    except Exception as e:
+        logger.error(f"Error ingesting archive for batch {batch_id}: {str(e)}")
+        status = FAILED
+    finally:
+        # Members still in the pipeline when it stopped
+        for item in in_flight.values():
+            _cleanup_ingestion_item(item)
+        await asyncio.to_thread(finish_job, batch_id, total_files, status)
+        if os.path.exists(archive_path):
+            os.unlink(archive_path)
+
+@app.post("/upload-resumes-archive/", response_model=IngestionJobResponse, status_code=202)
+async def upload_resumes_archive(
+    request: Request,
+    background_tasks: BackgroundTasks,
+    archive: UploadFile = File(...),
+    parse: bool = Form(True),
+    save_to_db: bool = Form(True),
+    duplicate_handling: DuplicateHandling = Form(DuplicateHandling.STRICT),
+    current_user: Dict[str, Any] = Depends(get_current_user)
+):
+    """
+    Upload a zip or tar archive of resumes for bulk import.
+    Members are streamed one at a time through the ingestion pipeline after the response
+    is sent; the archive is never unpacked to disk as a whole. Duplicate handling works
+    as for /upload-resumes-batch/. Poll GET /upload-resumes-batch/{batch_id} for progress.
+    The import runs in this API process: if the process stops, the job ends as 'failed'
+    with the files recorded so far, and the archive has to be uploaded again.
+    """
+    if not is_supported_archive(archive.filename):
+        raise HTTPException(status_code=400, detail="Unsupported archive format. Please upload a .zip or .tar(.gz) file.")
+    
+    batch_id = generate_batch_id()
+    
+    # Keep our own copy; the upload is closed once the response is sent
+    with tempfile.NamedTemporaryFile(delete=False, suffix=os.path.splitext(archive.filename)[1]) as temp_file:
+        archive_path = temp_file.name
+        while True:
+            chunk = await archive.read(1024 * 1024)
+            if not chunk:
+                break
+            temp_file.write(chunk)
+    
+    if not is_readable_archive(archive_path):
+        os.unlink(archive_path)
+        raise HTTPException(status_code=400, detail="The uploaded file is not a valid zip or tar archive.")
+    
+    total_files = count_archive_members(archive_path) or 0
+    if not create_job(batch_id, current_user['id'], parse, save_to_db, duplicate_handling.value, total_files):
+        os.unlink(archive_path)
+        raise HTTPException(status_code=500, detail="Failed to create import job")
+    
+    background_tasks.add_task(
+        _ingest_archive, archive_path, batch_id, current_user['id'], parse, save_to_db, duplicate_handling
+    )
+    
+    return IngestionJobResponse(
+        batch_id=batch_id,
+        status="processing",
+        total_files=total_files,
+        status_url=f"/upload-resumes-batch/{batch_id}"
+    )
+
 @app.post("/parse-text/")
 async def parse_text(text: str = Form(...)):
     """
@@ -836,6 +1180,33 @@ async def parse_text(text: str = Form(...)):
     except Exception as e:
         raise HTTPException(status_code=500, detail=f"Error parsing text: {str(e)}")
 
+@app.get("/performance/llm-hedging", response_model=Dict[str, Any])
+def get_llm_hedging_stats(
+    current_user: Dict[str, Any] = Depends(get_current_user)
+):
+    """
+    Get statistics on hedged LLM requests (how often hedges fire and win)
+    """
+    return llm_hedger.get_stats()
+
+@app.get("/performance/db-pool", response_model=Dict[str, Any])
+def get_db_pool_stats(
+    current_user: Dict[str, Any] = Depends(get_current_user)
+):
+    """
+    Get connection pool statistics per engine (checkout wait, connections in use, overflow)
+    """
+    return get_pool_stats()
+
+@app.get("/performance/db-replicas", response_model=Dict[str, Any])
+def get_db_replica_stats(
+    current_user: Dict[str, Any] = Depends(get_current_user)
+):
+    """
+    Get read replica lag and how many reads were routed to replicas or fell back to the primary
+    """
+    return replicas.get_stats()
+
 @app.get("/")
 def read_root():
     return {"message": "Resume Processing API is running! Use /upload-resume/ endpoint to process resumes."}
@@ -849,11 +1220,14 @@ async def get_candidates(
     min_experience: Optional[int] = Query(None, description="Minimum years of experience"),
     max_experience: Optional[int] = Query(None, description="Maximum years of experience"),
     skills: Optional[str] = Query(None, description="Comma-separated list of skills to filter by"),
-    location: Optional[str] = Query(None, description="Location to filter by (partial match)"),
-    company: Optional[str] = Query(None, description="Company name to filter by (partial match)"),
-    position: Optional[str] = Query(None, description="Position/title to filter by (partial match)"),
-    education: Optional[str] = Query(None, description="Education/degree to filter by (partial match)"),
-    db: Session = Depends(get_db),
+    location: Optional[str] = Query(None, description="Location to filter by (city, region or country; word prefix match for places not in the gazetteer)"),
+    company: Optional[str] = Query(None, description="Company name to filter by (word prefix match)"),
+    position: Optional[str] = Query(None, description="Position/title to filter by (word prefix match)"),
+    education: Optional[str] = Query(None, description="Education/degree to filter by (word prefix match)"),
+    worked_after: Optional[date] = Query(None, description="Only candidates with a job that ran on or after this date (YYYY-MM-DD); applies to the company/position job when given"),
+    min_tenure_months: Optional[int] = Query(None, ge=1, description="Only candidates who spent at least this many months in one job"),
+    cursor: Optional[str] = Query(None, description="Keyset pagination: next_cursor of the previous page, empty for the first page. Overrides page."),
+    count: Optional[CountStrategy] = Query(None, description="How total_count is computed: exact, cached or estimate (pagination.is_estimate marks estimates)"),
     current_user: Dict[str, Any] = Depends(get_current_user)
 ):
     """Get a list of all candidates with comprehensive filtering options (user-specific)"""
@@ -870,7 +1244,7 @@ async def get_candidates(
         if skills:
             skills_list = [skill.strip() for skill in skills.split(',') if skill.strip()]
           # Get candidates with comprehensive filtering and pagination
-        candidates_data = get_all_candidates(
+        candidates_data = await get_all_candidates_async(
             page=page,
             limit=limit, 
             status=status_enum, 
@@ -881,66 +1255,151 @@ async def get_candidates(
             location=location,
             company=company,
             position=position,
-            education=education
+            education=education,
+            cursor=cursor,
+            count_strategy=count,
+            worked_after=worked_after,
+            min_tenure_months=min_tenure_months
         )
         
-        candidates = candidates_data['candidates']
-        pagination = candidates_data['pagination']
-        
-        # Convert SQLAlchemy objects to dictionaries with comprehensive data
-        result = []
-        for candidate in candidates:
-            skills = [skill.skill_name for skill in candidate.skills] if candidate.skills else []
-            
-            # Get education data
-            education_data = []
-            if candidate.education:
-                for edu in candidate.education:
-                    education_data.append({
-                        "degree": edu.degree,
-                        "institution": edu.institution,
-                        "graduation_year": edu.graduation_year,
-                        "gpa": edu.gpa
-                    })
-            
-            # Get work experience data
-            work_experience = []
-            if candidate.work_experiences:
-                for exp in candidate.work_experiences:
-                    work_experience.append({
-                        "company": exp.company,
-                        "position": exp.position,
-                        "start_date": exp.start_date,
-                        "end_date": exp.end_date,
-                        "duration": exp.duration,
-                        "description": exp.description
-                    })
-            
-            candidate_dict = {
-                "candidate_id": candidate.candidate_id,
-                "full_name": candidate.full_name,
-                "email": candidate.email,
-                "phone": candidate.phone,
-                "location": candidate.location,
-                "years_experience": candidate.years_experience,
-                "status": candidate.status.value if candidate.status else "pending",
-                "created_at": candidate.created_at.isoformat() if candidate.created_at else None,
-                "resume_available": bool(candidate.resume_file_path),
-                "original_filename": candidate.original_filename,
-                "skills": skills,
-                "education": education_data,
-                "work_experience": work_experience            }
-            result.append(candidate_dict)
-        
+        # Candidates come as precomputed documents, already in response shape
         return {
-            "candidates": result,
-            "pagination": pagination
+            "candidates": candidates_data['candidates'],
+            "pagination": candidates_data['pagination']
         }
         
+    except HTTPException:
+        raise
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
     except Exception as e:
         logger.error(f"Error getting candidates: {str(e)}")
         raise HTTPException(status_code=500, detail=str(e))
 
+@app.get("/candidates/search", response_model=Dict[str, Any])
+def search_candidates_endpoint(
+    request: Request,
+    q: str = Query(..., min_length=1, description="Free text matched against skills, companies, positions, education and location"),
+    limit: int = Query(20, ge=1, le=100, description="Maximum number of candidates to return"),
+    current_user: Dict[str, Any] = Depends(get_current_user)
+):
+    """Rank the user's candidates against free text, best match first"""
+    try:
+        matches = search_candidates(current_user['id'], q, limit=limit)
+        
+        results = []
+        for match in matches:
+            candidate_dict = dict(match['candidate'])
+            candidate_dict["matched_terms"] = match['matched_terms']
+            candidate_dict["score"] = match['score']
+            results.append(candidate_dict)
+        
+        return {"query": q, "candidates": results}
+    
+    except Exception as e:
+        logger.error(f"Error searching candidates: {str(e)}")
+        raise HTTPException(status_code=500, detail=str(e))
+
+@app.get("/candidates/facets", response_model=Dict[str, Any])
+def get_candidate_facets_endpoint(
+    request: Request,
+    status: Optional[str] = Query(None, description="Filter by status (pending, shortlisted, rejected)"),
+    min_experience: Optional[int] = Query(None, description="Minimum years of experience"),
+    max_experience: Optional[int] = Query(None, description="Maximum years of experience"),
+    skills: Optional[str] = Query(None, description="Comma-separated list of skills to filter by"),
+    location: Optional[str] = Query(None, description="Location to filter by (city, region or country; word prefix match for places not in the gazetteer)"),
+    company: Optional[str] = Query(None, description="Company name to filter by (word prefix match)"),
+    position: Optional[str] = Query(None, description="Position/title to filter by (word prefix match)"),
+    education: Optional[str] = Query(None, description="Education/degree to filter by (word prefix match)"),
+    worked_after: Optional[date] = Query(None, description="Only candidates with a job that ran on or after this date (YYYY-MM-DD); applies to the company/position job when given"),
+    min_tenure_months: Optional[int] = Query(None, ge=1, description="Only candidates who spent at least this many months in one job"),
+    limit: int = Query(FACET_LIMIT, ge=1, le=100, description="Values returned per facet"),
+    current_user: Dict[str, Any] = Depends(get_current_user)
+):
+    """
+    Candidate counts per filter value (status, experience, skills, country, city, company,
+    position, education) under the current filters, for the filter panel. Each facet
+    ignores its own filter, so its other values keep their counts. Company, position and
+    education counts are per exact value; their filters match word prefixes and may
+    select more candidates.
+    """
+    try:
+        status_enum = None
+        if status:
+            try:
+                status_enum = Status[status.upper()]
+            except KeyError:
+                raise HTTPException(status_code=400, detail=f"Invalid status: {status}")
+
+        candidate_filter = CandidateFilter(
+            user_id=current_user['id'],
+            status=status_enum,
+            min_experience=min_experience,
+            max_experience=max_experience,
+            skills=[skill.strip() for skill in skills.split(',')] if skills else None,
+            location=location,
+            company=company,
+            position=position,
+            education=education,
+            worked_after=worked_after,
+            min_tenure_months=min_tenure_months
+        )
+        return {"facets": get_candidate_facets(candidate_filter, limit=limit)}
+
+    except HTTPException:
+        raise
+    except Exception as e:
+        logger.error(f"Error getting candidate facets: {str(e)}")
+        raise HTTPException(status_code=500, detail=str(e))
+
+@app.get("/candidates/export")
+def export_candidates(
+    request: Request,
+    format: ExportFormat = Query(ExportFormat.CSV, description="Export format: csv or ndjson"),
+    status: Optional[str] = Query(None, description="Filter by status (pending, shortlisted, rejected)"),
+    min_experience: Optional[int] = Query(None, description="Minimum years of experience"),
+    max_experience: Optional[int] = Query(None, description="Maximum years of experience"),
+    skills: Optional[str] = Query(None, description="Comma-separated list of skills to filter by"),
+    location: Optional[str] = Query(None, description="Location to filter by (city, region or country; word prefix match for places not in the gazetteer)"),
+    company: Optional[str] = Query(None, description="Company name to filter by (word prefix match)"),
+    position: Optional[str] = Query(None, description="Position/title to filter by (word prefix match)"),
+    education: Optional[str] = Query(None, description="Education/degree to filter by (word prefix match)"),
+    worked_after: Optional[date] = Query(None, description="Only candidates with a job that ran on or after this date (YYYY-MM-DD); applies to the company/position job when given"),
+    min_tenure_months: Optional[int] = Query(None, ge=1, description="Only candidates who spent at least this many months in one job"),
+    current_user: Dict[str, Any] = Depends(get_current_user)
+):
+    """
+    Stream all of the user's candidates matching the filters, with skills, education and
+    work experience, as CSV or NDJSON (one candidate document per line)
+    """
+    status_enum = None
+    if status:
+        try:
+            status_enum = Status[status.upper()]
+        except KeyError:
+            raise HTTPException(status_code=400, detail=f"Invalid status: {status}")
+
+    candidate_filter = CandidateFilter(
+        user_id=current_user['id'],
+        status=status_enum,
+        min_experience=min_experience,
+        max_experience=max_experience,
+        skills=[skill.strip() for skill in skills.split(',')] if skills else None,
+        location=location,
+        company=company,
+        position=position,
+        education=education,
+        worked_after=worked_after,
+        min_tenure_months=min_tenure_months
+    )
+
+    # Rows are read batch by batch while the response is being sent
+    return StreamingResponse(
+        export_lines(iter_candidate_documents(candidate_filter), format),
+        media_type=EXPORT_MEDIA_TYPES[format],
+        headers={"Content-Disposition": f'attachment; filename="candidates.{format.value}"'}
+    )
+
 @app.post("/candidates/{candidate_id}/shortlist")
 def shortlist_candidate_endpoint(
     request: Request,
@@ -964,6 +1423,7 @@ def shortlist_candidate_endpoint(
         # Update status
         candidate.status = Status.SHORTLISTED
         candidate.updated_at = datetime.utcnow()
+        set_candidate_summary_status(db, [candidate_id], Status.SHORTLISTED)
         db.commit()
         
         return {"message": f"Candidate with ID {candidate_id} has been shortlisted"}
@@ -1003,6 +1463,7 @@ def update_candidate_status(
         status_enum = Status[status.upper()]
         candidate.status = status_enum
         candidate.updated_at = datetime.utcnow()
+        set_candidate_summary_status(db, [candidate_id], status_enum)
         db.commit()
         
         # Convert candidate to dict for response
@@ -1028,6 +1489,76 @@ def update_candidate_status(
         logger.error(f"Error updating candidate status: {str(e)}")
         raise HTTPException(status_code=500, detail=f"Error updating candidate status: {str(e)}")
 
+@app.patch("/candidates/status", response_model=BulkStatusUpdateResponse)
+def update_candidate_statuses_bulk(
+    request: Request,
+    update: BulkStatusUpdate,
+    db: Session = Depends(get_db),
+    current_user: Dict[str, Any] = Depends(get_current_user)
+):
+    """
+    Set the status (pending, shortlisted, rejected) of many candidates in one transaction (user-specific).
+    Returns how many of the user's candidates were updated.
+    """
+    try:
+        status_enum = Status[update.status.upper()]
+    except KeyError:
+        raise HTTPException(status_code=400, detail="Invalid status. Must be one of: pending, shortlisted, rejected")
+    
+    candidate_ids = set(update.candidate_ids)
+    if len(candidate_ids) > MAX_BULK_STATUS_CANDIDATES:
+        raise HTTPException(status_code=400, detail=f"Too many candidates. Maximum is {MAX_BULK_STATUS_CANDIDATES} per request.")
+    
+    try:
+        updated = update_candidate_statuses(db, candidate_ids, status_enum, current_user['id'])
+        db.commit()
+        
+        return {"status": status_enum.value, "requested": len(candidate_ids), "updated": updated}
+    
+    except Exception as e:
+        db.rollback()
+        logger.error(f"Error updating candidate statuses: {str(e)}")
+        raise HTTPException(status_code=500, detail=f"Error updating candidate statuses: {str(e)}")
+
+@app.get("/candidates/archived", response_model=Dict[str, Any])
+def get_archived_candidates(
+    request: Request,
+    limit: int = Query(50, ge=1, le=1000, description="Number of candidates per page"),
+    after_id: Optional[int] = Query(None, description="Keyset pagination: last candidate_id of the previous page"),
+    current_user: Dict[str, Any] = Depends(get_current_user)
+):
+    """List the user's archived candidates (rejected or stale candidates moved out of the active tables)"""
+    try:
+        candidates = list_archived_candidates(current_user['id'], limit=limit, after_id=after_id)
+        return {
+            "candidates": candidates,
+            "next_after_id": candidates[-1]['candidate_id'] if len(candidates) == limit else None
+        }
+    except Exception as e:
+        logger.error(f"Error listing archived candidates: {str(e)}")
+        raise HTTPException(status_code=500, detail=str(e))
+
+@app.post("/candidates/archived/restore", response_model=ArchivedCandidatesRestoreResponse)
+def restore_archived_candidates_endpoint(
+    request: Request,
+    restore: ArchivedCandidatesRestore,
+    db: Session = Depends(get_db),
+    current_user: Dict[str, Any] = Depends(get_current_user)
+):
+    """Move archived candidates back to the active candidates (user-specific)"""
+    if len(set(restore.candidate_ids)) > MAX_BULK_STATUS_CANDIDATES:
+        raise HTTPException(status_code=400, detail=f"Too many candidates. Maximum is {MAX_BULK_STATUS_CANDIDATES} per request.")
+    
+    try:
+        result = restore_archived_candidates(db, restore.candidate_ids, current_user['id'])
+        db.commit()
+        return result
+    
+    except Exception as e:
+        db.rollback()
+        logger.error(f"Error restoring archived candidates: {str(e)}")
+        raise HTTPException(status_code=500, detail=f"Error restoring archived candidates: {str(e)}")
+
 @app.post("/init-db")
 def initialize_database():
     """
@@ -1043,7 +1574,7 @@ def initialize_database():
 async def view_resume(
     request: Request,
     candidate_id: int,
-    db: Session = Depends(get_db),
+    db: AsyncSession = Depends(get_async_db),
     current_user: Dict[str, Any] = Depends(get_current_user)
 ):
     """
@@ -1051,10 +1582,11 @@ async def view_resume(
     """
     try:
         # Get candidate from database and verify ownership
-        candidate = db.query(Candidate).filter(
+        result = await db.execute(select(Candidate).where(
             Candidate.candidate_id == candidate_id,
             Candidate.user_id == current_user['id']
-        ).first()
+        ))
+        candidate = result.scalars().first()
         
         if not candidate:
             raise HTTPException(status_code=404, detail=f"Candidate with ID {candidate_id} not found or not accessible")
@@ -0,0 +1,118 @@
+"""
+Archive Reader for Sen AI
+Streams resume files out of zip and tar archives one member at a time, so a
+bulk import never unpacks the whole archive to disk.
+"""
+
+import os
+import logging
+import tarfile
+import tempfile
+import zipfile
+from typing import Iterator, Dict, Any, Optional
+
+# Configure logging
+logging.basicConfig(level=logging.INFO)
+logger = logging.getLogger(__name__)
+
+# Limits guarding against oversized members and archive bombs
+MAX_ARCHIVE_MEMBERS = int(os.environ.get("MAX_ARCHIVE_MEMBERS", "10000"))
+MAX_ARCHIVE_MEMBER_BYTES = int(os.environ.get("MAX_ARCHIVE_MEMBER_BYTES", str(10 * 1024 * 1024)))
+
+ARCHIVE_EXTENSIONS = (".zip", ".tar", ".tar.gz", ".tgz", ".tar.bz2", ".tbz2", ".tar.xz")
+
+def is_supported_archive(filename: str) -> bool:
+    """Check whether the filename looks like a zip or tar archive"""
+    return filename.lower().endswith(ARCHIVE_EXTENSIONS)
+
+def is_readable_archive(archive_path: str) -> bool:
+    """Check whether the file is a zip or tar archive we can open"""
+    try:
+        return zipfile.is_zipfile(archive_path) or tarfile.is_tarfile(archive_path)
+    except Exception:
+        return False
+
+def _is_ignored_member(name: str) -> bool:
+    """Skip OS metadata such as __MACOSX/ folders and dotfiles"""
+    parts = name.replace("\\", "/").split("/")
+    return "__MACOSX" in parts or os.path.basename(name).startswith(".")
+
+def count_archive_members(archive_path: str) -> Optional[int]:
+    """
+    Count the files in an archive without reading their contents
+
+    Returns:
+        int: Number of files for zip archives, None for tar archives (only known after streaming)
+    """
+    if zipfile.is_zipfile(archive_path):
+        with zipfile.ZipFile(archive_path) as archive:
+            return len([i for i in archive.infolist() if not i.is_dir() and not _is_ignored_member(i.filename)])
+    return None
+
+def _spool_member(source, filename: str) -> Dict[str, Any]:
+    """Copy one member to its own temporary file, enforcing the size limit"""
+    suffix = os.path.splitext(filename)[1]
+    with tempfile.NamedTemporaryFile(delete=False, suffix=suffix) as temp_file:
+        copied = 0
+        while True:
+            chunk = source.read(64 * 1024)
+            if not chunk:
+                break
+            copied += len(chunk)
+            if copied > MAX_ARCHIVE_MEMBER_BYTES:
+                temp_file.close()
+                os.unlink(temp_file.name)
+                return {"filename": filename, "file_path": None,
+                        "error": f"File exceeds the {MAX_ARCHIVE_MEMBER_BYTES // (1024 * 1024)}MB limit"}
+            temp_file.write(chunk)
+    return {"filename": filename, "file_path": temp_file.name, "error": None}
+
+def iter_archive_members(archive_path: str) -> Iterator[Dict[str, Any]]:
+    """
+    Yield the files of a zip or tar archive one at a time
+
+    Each member is copied to its own temporary file only when it is reached;
+    the caller owns that file and must remove it. Tar archives are read in
+    streaming mode, so compressed tars are never decompressed as a whole.
+
+    Yields:
+        dict: 'filename' (base name), 'file_path' (temporary copy or None) and 'error'
+    """
+    count = 0
+
+    if zipfile.is_zipfile(archive_path):
+        with zipfile.ZipFile(archive_path) as archive:
+            for info in archive.infolist():
+                if info.is_dir() or _is_ignored_member(info.filename):
+                    continue
+                count += 1
+                if count > MAX_ARCHIVE_MEMBERS:
+                    logger.warning(f"Archive has more than {MAX_ARCHIVE_MEMBERS} files, ignoring the rest")
+                    return
+                filename = os.path.basename(info.filename)
+                if info.file_size > MAX_ARCHIVE_MEMBER_BYTES:
+                    yield {"filename": filename, "file_path": None,
+                           "error": f"File exceeds the {MAX_ARCHIVE_MEMBER_BYTES // (1024 * 1024)}MB limit"}
+                    continue
+                with archive.open(info) as source:
+                    yield _spool_member(source, filename)
+        return
+
+    # "r|*" reads the tar sequentially with transparent decompression
+    with tarfile.open(archive_path, mode="r|*") as archive:
+        for member in archive:
+            if not member.isfile() or _is_ignored_member(member.name):
+                continue
+            count += 1
+            if count > MAX_ARCHIVE_MEMBERS:
+                logger.warning(f"Archive has more than {MAX_ARCHIVE_MEMBERS} files, ignoring the rest")
+                return
+            filename = os.path.basename(member.name)
+            if member.size > MAX_ARCHIVE_MEMBER_BYTES:
+                yield {"filename": filename, "file_path": None,
+                       "error": f"File exceeds the {MAX_ARCHIVE_MEMBER_BYTES // (1024 * 1024)}MB limit"}
+                continue
+            source = archive.extractfile(member)
+            if source is None:
+                continue
+            yield _spool_member(source, filename)
@@ -0,0 +1,144 @@
+"""
+Async Database for Sen AI
+Async engine and sessions for the FastAPI endpoints, so that database calls made from
+async handlers wait on the driver (aiomysql) instead of blocking the event loop.
+The async functions run the session-level functions of database.py through
+AsyncSession.run_sync, so both APIs share one implementation of every query.
+"""
+
+import os
+import asyncio
+import logging
+from contextlib import asynccontextmanager
+from sqlalchemy.ext.asyncio import async_sessionmaker
+from connection_pool import create_async_db_engine
+from database import (
+    DB_HOST, DB_PORT, DB_USER, DB_PASS, DB_NAME, BULK_SAVE_CHUNK_SIZE, CandidateSession, REPLICA_HOSTS, replicas,
+    list_candidates, find_duplicate_file, find_duplicate_files, find_similar_candidate, save_candidate_chunk
+)
+
+# Configure logging
+logging.basicConfig(level=logging.INFO)
+logger = logging.getLogger(__name__)
+
+# Async MySQL driver (any SQLAlchemy async dialect for MySQL, e.g. aiomysql or asyncmy)
+DB_ASYNC_DRIVER = os.environ.get("DB_ASYNC_DRIVER", "aiomysql")
+
+# Construct the async database URL
+ASYNC_DATABASE_URL = f"mysql+{DB_ASYNC_DRIVER}://{DB_USER}:{DB_PASS}@{DB_HOST}:{DB_PORT}/{DB_NAME}"
+
+# Create the async engine (pool settings: see connection_pool.py); connections are only opened on first use
+async_engine = create_async_db_engine(ASYNC_DATABASE_URL)
+
+# Async engines of the read replicas, in database.replicas order
+async_replica_engines = [
+    create_async_db_engine(f"mysql+{DB_ASYNC_DRIVER}://{DB_USER}:{DB_PASS}@{host}:{port}/{DB_NAME}",
+                           name=f"async-replica-{index}")
+    for index, (host, port) in enumerate(REPLICA_HOSTS)
+]
+
+# Sessions use CandidateSession underneath, so commits keep the listing count caches in sync
+AsyncSessionLocal = async_sessionmaker(
+    bind=async_engine,
+    sync_session_class=CandidateSession,
+    autoflush=False,
+    expire_on_commit=False
+)
+
+async def get_async_db():
+    """Get an async database session"""
+    async with AsyncSessionLocal() as db:
+        yield db
+
+@asynccontextmanager
+async def read_session_async(user_id=None):
+    """Async database.read_session: plain SELECTs go to a caught-up read replica when one is configured"""
+    replicas.start()
+    # Checking the write marks queries the primary and a replica; keep it off the event loop
+    index = await asyncio.to_thread(replicas.choose, user_id) if replicas.engines else None
+    replica = async_replica_engines[index].sync_engine if index is not None else None
+    async with AsyncSessionLocal(info={'replica': replica}) as db:
+        yield db
+
+async def get_all_candidates_async(page=1, limit=5, status=None, user_id=None, min_experience=None, max_experience=None,
+                                   skills=None, location=None, company=None, position=None, education=None,
+                                   cursor=None, count_strategy=None, worked_after=None, min_tenure_months=None):
+    """
+    Async get_all_candidates; takes the same arguments and returns the same page
+
+    Raises:
+        ValueError: If the cursor is malformed
+    """
+    async with read_session_async(user_id) as db:
+        try:
+            return await db.run_sync(list_candidates, page, limit, status, user_id, min_experience, max_experience,
+                                     skills, location, company, position, education, cursor, count_strategy,
+                                     worked_after, min_tenure_months)
+        except ValueError:
+            raise
+        except Exception as e:
+            logger.error(f"Error fetching candidates: {str(e)}")
+            raise
+
+async def check_duplicate_file_async(file_hash, user_id=None):
+    """Async check_duplicate_file: existing candidate with the file hash, or None"""
+    async with AsyncSessionLocal() as db:
+        try:
+            return await db.run_sync(find_duplicate_file, file_hash, user_id)
+        except Exception as e:
+            logger.error(f"Error checking duplicate file: {e}")
+            return None
+
+async def check_duplicate_files_async(file_hashes, user_id=None):
+    """Async check_duplicate_files: maps each duplicate file hash to its existing candidate"""
+    async with AsyncSessionLocal() as db:
+        try:
+            return await db.run_sync(find_duplicate_files, file_hashes, user_id)
+        except Exception as e:
+            logger.error(f"Error checking duplicate files: {e}")
+            return {}
+
+async def check_duplicate_candidate_content_async(parsed_data, user_id):
+    """Async check_duplicate_candidate_content: similar candidate of the user, or None"""
+    async with AsyncSessionLocal() as db:
+        try:
+            return await db.run_sync(find_similar_candidate, parsed_data, user_id)
+        except Exception as e:
+            logger.error(f"Error checking duplicate candidate content: {e}")
+            return None
+
+async def save_candidates_bulk_async(records, user_id=None, batch_id=None, chunk_size=BULK_SAVE_CHUNK_SIZE):
+    """
+    Async save_candidates_bulk, with one transaction per chunk
+
+    Returns:
+        list: Candidate ID for each record in order (None for records in a chunk that failed)
+    """
+    candidate_ids = []
+    for start in range(0, len(records), chunk_size):
+        chunk = records[start:start + chunk_size]
+        async with AsyncSessionLocal() as db:
+            try:
+                candidate_ids.extend(await db.run_sync(save_candidate_chunk, chunk, user_id, batch_id))
+            except Exception as e:
+                await db.rollback()
+                logger.error(f"Error saving {len(chunk)} candidates: {e}")
+                candidate_ids.extend([None] * len(chunk))
+    return candidate_ids
+
+async def save_candidate_data_with_hash_async(parsed_data, resume_file_path=None, resume_s3_url=None,
+                                              original_filename=None, file_hash=None, batch_id=None, user_id=None):
+    """
+    Async save_candidate_data_with_hash
+
+    Returns:
+        int: The ID of the inserted or updated candidate
+    """
+    record = {
+        'parsed_data': parsed_data,
+        'resume_file_path': resume_file_path,
+        'resume_s3_url': resume_s3_url,
+        'original_filename': original_filename,
+        'file_hash': file_hash
+    }
+    return (await save_candidates_bulk_async([record], user_id=user_id, batch_id=batch_id))[0]
@@ -0,0 +1,850 @@
+"""
+Benchmarks for Sen AI
+Measures database write and query paths against synthetic data:
+
+    python benchmarks.py bulk-save --resumes 500
+    python benchmarks.py bulk-save --resumes 500 --sqlite   # in-memory SQLite, no MySQL needed
+    python benchmarks.py listing-queries --resumes 1000     # exits non-zero on a regression
+    python benchmarks.py filter-queries --resumes 20000     # JOIN+DISTINCT vs EXISTS filters, with EXPLAIN
+    python benchmarks.py pagination --resumes 20000         # OFFSET vs keyset pages, shallow and deep
+    python benchmarks.py text-search --resumes 100000       # LIKE scans vs the search index, ranked search
+    python benchmarks.py skill-catalog --resumes 20000      # raw skill names vs catalog skills, backfill
+    python benchmarks.py async-load --resumes 5000          # async vs blocking DB calls under concurrent API traffic
+    python benchmarks.py export --resumes 50000             # streamed export vs paging /candidates/: first byte, memory
+    python benchmarks.py facets --resumes 5000              # grouped facet counts vs one count per value, cache hits
+    python benchmarks.py listing-statements --resumes 200   # per-request listing overhead, rebuilt vs cached statements
+
+Benchmarks run against the configured database unless --sqlite is given, and remove
+every row they create.
+"""
+
+import os
+import time
+import uuid
+import random
+import hashlib
+import logging
+import argparse
+import tempfile
+
+# Configure logging
+logging.basicConfig(level=logging.INFO)
+logger = logging.getLogger(__name__)
+
+# User ID owning benchmark rows, far outside the range of real users
+BENCHMARK_USER_ID = 999999999
+
+SKILL_POOL = ["Python", "Java", "SQL", "AWS", "Docker", "React", "TypeScript", "Kubernetes",
+              "Machine Learning", "Communication", "Leadership", "Go", "Rust", "Excel", "Figma"]
+COMPANY_POOL = ["Acme Corp", "Globex", "Initech", "Umbrella", "Hooli", "Stark Industries", "Wayne Enterprises"]
+POSITION_POOL = ["Software Engineer", "Data Scientist", "Product Manager", "DevOps Engineer", "Designer"]
+LOCATION_POOL = ["London, UK", "Berlin, Germany", "New York, USA", "Bangalore, India", "Toronto, Canada"]
+# Long tail of rare skills, so selective searches are benchmarked too
+RARE_SKILL_COUNT = 2000
+# Listing requests timed per run by listing-statements
+LISTING_STATEMENT_REQUESTS = 500
+
+def use_sqlite(path=None):
+    """
+    Point the database module at a fresh SQLite database: in memory, or in the file at path.
+    A file database is shared with the async engine (aiosqlite) of async_database.
+    """
+    import database
+    from sqlalchemy import create_engine
+    from sqlalchemy.pool import StaticPool
+
+    if path is None:
+        database.engine = create_engine("sqlite://", connect_args={"check_same_thread": False}, poolclass=StaticPool)
+    else:
+        import async_database
+        from sqlalchemy.ext.asyncio import create_async_engine
+
+        database.engine = create_engine(f"sqlite:///{path}", connect_args={"check_same_thread": False, "timeout": 30})
+        async_database.async_engine = create_async_engine(f"sqlite+aiosqlite:///{path}", connect_args={"timeout": 30})
+        async_database.AsyncSessionLocal.configure(bind=async_database.async_engine)
+    database.SessionLocal.configure(bind=database.engine)
+    database.Base.metadata.create_all(bind=database.engine)
+
+def synthetic_resume(number, rng):
+    """Build a parsed resume record shaped like the output of the ingestion pipeline"""
+    parsed_data = {
+        'full_name': f"Benchmark Candidate {number}",
+        'email': f"benchmark{number}@example.com",
+        'phone': f"+1-555-{number:07d}",
+        'location': rng.choice(LOCATION_POOL),
+        'years_experience': rng.randint(0, 20),
+        'education': [
+            {'degree': "BSc Computer Science", 'institution': "State University", 'year': str(rng.randint(1995, 2023))}
+            for _ in range(rng.randint(1, 2))
+        ],
+        'skills': rng.sample(SKILL_POOL, rng.randint(5, 12)) + [f"Tool{rng.randrange(RARE_SKILL_COUNT)}"],
+        'work_experience': [
+            {'company': rng.choice(COMPANY_POOL), 'position': rng.choice(POSITION_POOL), 'duration': f"{rng.randint(1, 5)} years"}
+            for _ in range(rng.randint(1, 4))
+        ]
+    }
+    return {
+        'parsed_data': parsed_data,
+        'resume_file_path': f"resumes/benchmark_{number}.pdf",
+        'resume_s3_url': f"https://example.com/resumes/benchmark_{number}.pdf",
+        'original_filename': f"benchmark_{number}.pdf",
+        'file_hash': hashlib.sha256(f"{uuid.uuid4()}-{number}".encode()).hexdigest()
+    }
+
+def count_rows(records):
+    """Candidate plus child rows written for a set of records"""
+    return sum(
+        1 + len(r['parsed_data']['education']) + len(r['parsed_data']['skills']) + len(r['parsed_data']['work_experience'])
+        for r in records
+    )
+
+def delete_benchmark_rows():
+    """Remove every candidate (and child row) owned by the benchmark user"""
+    from database import SessionLocal, Candidate, Education, Skill, WorkExperience, CandidateSearchTerm, CandidateSummary
+
+    db = SessionLocal()
+    try:
+        candidate_ids = db.query(Candidate.candidate_id).filter(Candidate.user_id == BENCHMARK_USER_ID)
+        for model in (Education, Skill, WorkExperience, CandidateSearchTerm, CandidateSummary):
+            db.query(model).filter(model.candidate_id.in_(candidate_ids)).delete(synchronize_session=False)
+        db.query(Candidate).filter(Candidate.user_id == BENCHMARK_USER_ID).delete(synchronize_session=False)
+        db.commit()
+    finally:
+        db.close()
+
+def seed_candidates(count, rng, batch_id=None):
+    """Insert synthetic candidates for the benchmark user"""
+    from database import save_candidates_bulk
+
+    records = [synthetic_resume(n, rng) for n in range(count)]
+    save_candidates_bulk(records, user_id=BENCHMARK_USER_ID, batch_id=batch_id)
+    return records
+
+class QueryCounter:
+    """Count SQL statements sent to the database while active"""
+
+    def __init__(self):
+        from sqlalchemy import event
+        import database
+
+        self.engine = database.engine
+        self.event = event
+        self.count = 0
+
+    def _on_execute(self, conn, cursor, statement, parameters, context, executemany):
+        self.count += 1
+
+    def __enter__(self):
+        self.count = 0
+        self.event.listen(self.engine, "before_cursor_execute", self._on_execute)
+        return self
+
+    def __exit__(self, *exc):
+        self.event.remove(self.engine, "before_cursor_execute", self._on_execute)
+
+def report(label, rows, elapsed):
+    logger.info(f"{label}: {rows} rows in {elapsed:.3f}s ({rows / elapsed:,.0f} rows/sec)")
+    return rows / elapsed
+
+def bench_bulk_save(args):
+    """Compare per-resume saves with save_candidates_bulk, for new and re-uploaded resumes"""
+    from database import save_candidate_data_with_hash, save_candidates_bulk
+
+    rng = random.Random(args.seed)
+    batch_id = str(uuid.uuid4())
+    delete_benchmark_rows()
+
+    try:
+        # New candidates
+        per_row_records = [synthetic_resume(n, rng) for n in range(args.resumes)]
+        bulk_records = [synthetic_resume(n + args.resumes, rng) for n in range(args.resumes)]
+
+        started = time.perf_counter()
+        for record in per_row_records:
+            save_candidate_data_with_hash(record['parsed_data'], record['resume_file_path'], record['resume_s3_url'],
+                                          record['original_filename'], record['file_hash'], batch_id, BENCHMARK_USER_ID)
+        before = report("insert, one save per resume", count_rows(per_row_records), time.perf_counter() - started)
+
+        started = time.perf_counter()
+        save_candidates_bulk(bulk_records, user_id=BENCHMARK_USER_ID, batch_id=batch_id)
+        after = report("insert, save_candidates_bulk", count_rows(bulk_records), time.perf_counter() - started)
+        logger.info(f"insert speedup: {after / before:.1f}x")
+
+        # Updated resumes of the same candidates (email match, new file)
+        for records in (per_row_records, bulk_records):
+            for record in records:
+                record['file_hash'] = hashlib.sha256(uuid.uuid4().bytes).hexdigest()
+                record['parsed_data']['skills'] = rng.sample(SKILL_POOL, rng.randint(5, 12))
+
+        started = time.perf_counter()
+        for record in per_row_records:
+            save_candidate_data_with_hash(record['parsed_data'], record['resume_file_path'], record['resume_s3_url'],
+                                          record['original_filename'], record['file_hash'], batch_id, BENCHMARK_USER_ID)
+        before = report("re-upload, one save per resume", count_rows(per_row_records), time.perf_counter() - started)
+
+        started = time.perf_counter()
+        save_candidates_bulk(bulk_records, user_id=BENCHMARK_USER_ID, batch_id=batch_id)
+        after = report("re-upload, save_candidates_bulk", count_rows(bulk_records), time.perf_counter() - started)
+        logger.info(f"re-upload speedup: {after / before:.1f}x")
+
+        # A resume whose email is one candidate's and file hash another's goes to the file hash's candidate
+        hash_owner = save_candidate_data_with_hash(
+            per_row_records[0]['parsed_data'], file_hash=per_row_records[0]['file_hash'], user_id=BENCHMARK_USER_ID
+        )
+        saved = save_candidates_bulk([{'parsed_data': bulk_records[0]['parsed_data'], 'file_hash': per_row_records[0]['file_hash']}],
+                                     user_id=BENCHMARK_USER_ID, batch_id=batch_id)
+        if saved != [hash_owner]:
+            logger.error(f"Resume matching two candidates saved as {saved}, expected [{hash_owner}]")
+            raise SystemExit(1)
+        logger.info("email and file hash matching different candidates: saved to the file hash's candidate")
+    finally:
+        delete_benchmark_rows()
+
+def legacy_candidate_dicts(db, candidate_ids):
+    """Candidate dicts built from the four tables, the way listings did before candidate_summaries"""
+    from sqlalchemy.orm import selectinload
+    from database import Candidate
+    from candidate_summary import summary_document
+
+    candidates = db.query(Candidate).options(
+        selectinload(Candidate.skills),
+        selectinload(Candidate.education),
+        selectinload(Candidate.work_experiences)
+    ).filter(Candidate.candidate_id.in_(candidate_ids)).all()
+    return [summary_document(c, c.education, c.skills, c.work_experiences) for c in candidates]
+
+def bench_listing_queries(args):
+    """Check that a candidate listing page costs the same number of queries at any page size"""
+    from database import SessionLocal, get_all_candidates, get_candidate_summaries
+
+    rng = random.Random(args.seed)
+    delete_benchmark_rows()
+
+    try:
+        seed_candidates(args.resumes, rng)
+
+        counts = {}
+        for limit in (1, 10, 100, min(500, args.resumes)):
+            with QueryCounter() as counter:
+                started = time.perf_counter()
+                result = get_all_candidates(page=1, limit=limit, user_id=BENCHMARK_USER_ID)
+                elapsed = time.perf_counter() - started
+            counts[limit] = counter.count
+            logger.info(f"limit={limit}: {counter.count} queries in {elapsed:.3f}s")
+
+        if len(set(counts.values())) != 1:
+            logger.error(f"Query count grows with page size: {counts}")
+            raise SystemExit(1)
+        logger.info(f"Constant query count per page: {counts[1]}")
+
+        # Precomputed documents must match what the four tables say
+        db = SessionLocal()
+        try:
+            candidate_ids = [c['candidate_id'] for c in result['candidates']]
+            legacy_time, legacy = best_time(lambda: legacy_candidate_dicts(db, candidate_ids), args.repeat)
+            summary_time, summaries = best_time(lambda: get_candidate_summaries(db, candidate_ids), args.repeat)
+            if {c['candidate_id']: c for c in legacy} != summaries:
+                logger.error("Candidate summaries differ from the candidate tables")
+                raise SystemExit(1)
+            logger.info(f"{len(candidate_ids)} candidate documents: four tables {legacy_time * 1000:.1f}ms, "
+                        f"candidate_summaries {summary_time * 1000:.1f}ms ({legacy_time / summary_time:.1f}x)")
+        finally:
+            db.close()
+    finally:
+        delete_benchmark_rows()
+
+# Filter combinations timed by filter-queries
+FILTER_CASES = {
+    "skills": {'skills': ["Python", "Rust"]},
+    "company+position": {'company': "Acme", 'position': "Engineer"},
+    "education": {'education': "Computer"},
+    "all": {'skills': ["Python"], 'company': "Globex", 'education': "Computer", 'min_experience': 5},
+}
+
+CHILD_TABLES = ("skills", "work_experiences", "education", "candidate_search_terms")
+
+def legacy_filter_queries(db, user_id, skills=None, company=None, position=None, education=None, min_experience=None):
+    """Page and count queries built the way get_all_candidates did before CandidateFilter (JOIN + DISTINCT)"""
+    from sqlalchemy import func, or_
+    from database import Candidate, Skill, WorkExperience, Education
+
+    queries = []
+    for query in (db.query(Candidate), db.query(func.count(Candidate.candidate_id))):
+        query = query.filter(Candidate.user_id == user_id)
+        if min_experience is not None:
+            query = query.filter(Candidate.years_experience >= min_experience)
+        if skills:
+            query = query.join(Skill).filter(or_(*[Skill.skill_name.ilike(f"%{s}%") for s in skills])).distinct()
+        if company or position:
+            query = query.join(WorkExperience)
+            if company:
+                query = query.filter(WorkExperience.company.ilike(f"%{company}%"))
+            if position:
+                query = query.filter(WorkExperience.position.ilike(f"%{position}%"))
+            query = query.distinct()
+        if education:
+            query = query.join(Education).filter(or_(Education.degree.ilike(f"%{education}%"),
+                                                     Education.institution.ilike(f"%{education}%"))).distinct()
+        queries.append(query)
+    return queries
+
+def explain(db, query):
+    """
+    Return the query plan as a list of (table, access) pairs.
+    access is the index used for the table, or None for a full scan.
+    """
+    dialect = db.get_bind().dialect
+    sql = str(query.statement.compile(dialect=dialect, compile_kwargs={"literal_binds": True}))
+    connection = db.connection()
+
+    if dialect.name == 'sqlite':
+        plan = []
+        for row in connection.exec_driver_sql(f"EXPLAIN QUERY PLAN {sql}").fetchall():
+            detail = row[3]
+            words = detail.split()
+            table = words[1] if len(words) > 1 and words[0] in ("SCAN", "SEARCH") else None
+            if table:
+                plan.append((table, detail.split("USING ", 1)[1] if "USING " in detail else None))
+        return plan
+
+    rows = connection.exec_driver_sql(f"EXPLAIN {sql}").mappings().all()
+    return [(row['table'], row['key']) for row in rows]
+
+def best_time(func, repeat):
+    """Fastest of several runs, in seconds"""
+    timings = []
+    for _ in range(repeat):
+        started = time.perf_counter()
+        result = func()
+        timings.append(time.perf_counter() - started)
+    return min(timings), result
+
+def bench_filter_queries(args):
+    """Compare JOIN + DISTINCT filters with CandidateFilter's semi-joins on a large tenant"""
+    from database import SessionLocal, CandidateFilter
+
+    rng = random.Random(args.seed)
+    delete_benchmark_rows()
+
+    db = SessionLocal()
+    try:
+        seed_candidates(args.resumes, rng)
+        limit = 50
+
+        for name, filters in FILTER_CASES.items():
+            legacy_page, legacy_count = legacy_filter_queries(db, BENCHMARK_USER_ID, **filters)
+            candidate_filter = CandidateFilter(user_id=BENCHMARK_USER_ID, **filters)
+
+            legacy_time, legacy_total = best_time(
+                lambda: (legacy_count.scalar(), legacy_page.limit(limit).all())[0], args.repeat)
+            exists_time, exists_total = best_time(
+                lambda: (candidate_filter.count_query(db).scalar(), candidate_filter.page_query(db).limit(limit).all())[0],
+                args.repeat)
+
+            # The legacy count applied DISTINCT to the count itself, so it counted joined rows;
+            # the distinct page query gives the true number of matching candidates
+            expected_total = legacy_page.count()
+            if exists_total != expected_total:
+                logger.error(f"{name}: EXISTS counted {exists_total} candidates, expected {expected_total}")
+                raise SystemExit(1)
+            logger.info(f"{name}: {exists_total} matches (legacy count said {legacy_total}), count + page "
+                        f"JOIN/DISTINCT {legacy_time * 1000:.1f}ms, EXISTS {exists_time * 1000:.1f}ms "
+                        f"({legacy_time / exists_time:.1f}x)")
+
+        # Every child table probed by the EXISTS filters should be reached through an index
+        candidate_filter = CandidateFilter(user_id=BENCHMARK_USER_ID, **FILTER_CASES["all"])
+        for label, query in (("page", candidate_filter.page_query(db).limit(limit)), ("count", candidate_filter.count_query(db))):
+            plan = explain(db, query)
+            logger.info(f"EXPLAIN {label}: " + ", ".join(f"{table} via {access or 'full scan'}" for table, access in plan))
+            unindexed = [table for table, access in plan if table in CHILD_TABLES and not access]
+            if unindexed:
+                logger.error(f"EXPLAIN {label}: full scan of {', '.join(unindexed)}")
+                raise SystemExit(1)
+    finally:
+        db.close()
+        delete_benchmark_rows()
+
+def bench_pagination(args):
+    """Time shallow and deep pages with OFFSET paging and with keyset cursors"""
+    from sqlalchemy import tuple_
+    from database import SessionLocal, Candidate, CandidateFilter, get_all_candidates
+
+    rng = random.Random(args.seed)
+    delete_benchmark_rows()
+
+    try:
+        seed_candidates(args.resumes, rng)
+        limit = 50
+        last_page = max(1, args.resumes // limit)
+
+        # Walk every page with cursors, timing the first and the deepest one
+        cursor = ""
+        cursor_times = []
+        seen = 0
+        while cursor is not None:
+            started = time.perf_counter()
+            result = get_all_candidates(limit=limit, user_id=BENCHMARK_USER_ID, cursor=cursor)
+            cursor_times.append(time.perf_counter() - started)
+            seen += len(result['candidates'])
+            cursor = result['pagination']['next_cursor']
+
+        if seen != args.resumes:
+            logger.error(f"Cursor walk returned {seen} candidates, expected {args.resumes}")
+            raise SystemExit(1)
+
+        logger.info(f"get_all_candidates with cursor: first page {cursor_times[0] * 1000:.1f}ms, "
+                    f"last page {cursor_times[-1] * 1000:.1f}ms, {len(cursor_times)} pages walked")
+
+        # The page query alone, without the count
+        db = SessionLocal()
+        try:
+            ordered = CandidateFilter(user_id=BENCHMARK_USER_ID).page_query(db).order_by(Candidate.created_at, Candidate.candidate_id)
+            for page in (1, last_page):
+                offset_time, rows = best_time(lambda: ordered.offset((page - 1) * limit).limit(limit).all(), args.repeat)
+                after = (rows[0].created_at, rows[0].candidate_id)
+                keyset_time, _ = best_time(
+                    lambda: ordered.filter(tuple_(Candidate.created_at, Candidate.candidate_id) >= tuple_(*after)).limit(limit).all(),
+                    args.repeat)
+                logger.info(f"page {page}: OFFSET {offset_time * 1000:.2f}ms, keyset {keyset_time * 1000:.2f}ms")
+        finally:
+            db.close()
+    finally:
+        delete_benchmark_rows()
+
+# Text filters timed by text-search, from very selective to very common
+TEXT_SEARCH_CASES = {
+    "rare skill": {'skills': ["Tool1234"]},
+    "common skill": {'skills': ["Python"]},
+    "location": {'location': "Toronto"},
+    "company+position": {'company': "Hooli", 'position': "Designer"},
+}
+
+def like_filter_criteria(user_id, skills=None, location=None, company=None, position=None):
+    """Text filters built the way CandidateFilter did before the search index (EXISTS + LIKE '%text%')"""
+    from sqlalchemy import and_, or_
+    from database import Candidate, Skill, WorkExperience
+
+    criteria = [Candidate.user_id == user_id]
+    if location:
+        criteria.append(Candidate.location.ilike(f"%{location}%"))
+    if skills:
+        criteria.append(Candidate.skills.any(or_(*[Skill.skill_name.ilike(f"%{s}%") for s in skills])))
+    if company or position:
+        work = []
+        if company:
+            work.append(WorkExperience.company.ilike(f"%{company}%"))
+        if position:
+            work.append(WorkExperience.position.ilike(f"%{position}%"))
+        criteria.append(Candidate.work_experiences.any(and_(*work)))
+    return criteria
+
+def bench_text_search(args):
+    """Compare LIKE scans with search index lookups for text filters, and time ranked search"""
+    from sqlalchemy import func
+    from database import SessionLocal, Candidate, CandidateFilter, search_candidates
+
+    rng = random.Random(args.seed)
+    delete_benchmark_rows()
+
+    db = SessionLocal()
+    try:
+        started = time.perf_counter()
+        seed_candidates(args.resumes, rng)
+        logger.info(f"Seeded and indexed {args.resumes} candidates in {time.perf_counter() - started:.1f}s")
+        limit = 50
+
+        for name, filters in TEXT_SEARCH_CASES.items():
+            criteria = like_filter_criteria(BENCHMARK_USER_ID, **filters)
+            like_count = db.query(func.count(Candidate.candidate_id)).filter(*criteria)
+            like_page = db.query(Candidate).filter(*criteria).order_by(Candidate.created_at, Candidate.candidate_id)
+            candidate_filter = CandidateFilter(user_id=BENCHMARK_USER_ID, **filters)
+            index_page = candidate_filter.page_query(db).order_by(Candidate.created_at, Candidate.candidate_id)
+
+            like_time, like_total = best_time(lambda: (like_count.scalar(), like_page.limit(limit).all())[0], args.repeat)
+            index_time, index_total = best_time(
+                lambda: (candidate_filter.count_query(db).scalar(), index_page.limit(limit).all())[0], args.repeat)
+
+            if index_total != like_total:
+                logger.error(f"{name}: search index matched {index_total} candidates, LIKE matched {like_total}")
+                raise SystemExit(1)
+            logger.info(f"{name}: {index_total} matches, count + page LIKE {like_time * 1000:.1f}ms, "
+                        f"index {index_time * 1000:.1f}ms ({like_time / index_time:.1f}x)")
+
+        # The index must be reached through its lookup index, not scanned
+        candidate_filter = CandidateFilter(user_id=BENCHMARK_USER_ID, **TEXT_SEARCH_CASES["rare skill"])
+        plan = explain(db, candidate_filter.count_query(db))
+        logger.info("EXPLAIN count: " + ", ".join(f"{table} via {access or 'full scan'}" for table, access in plan))
+        if any(table == "candidate_search_terms" and not access for table, access in plan):
+            logger.error("EXPLAIN count: full scan of candidate_search_terms")
+            raise SystemExit(1)
+
+        for query in ("Tool1234", "python toronto", "hooli designer python"):
+            search_time, matches = best_time(lambda: search_candidates(BENCHMARK_USER_ID, query, limit=20), args.repeat)
+            top = matches[0] if matches else None
+            logger.info(f"search_candidates({query!r}): {len(matches)} results in {search_time * 1000:.1f}ms"
+                        + (f", top score {top['score']} with {top['matched_terms']} terms" if top else ""))
+    finally:
+        db.close()
+        delete_benchmark_rows()
+
+def skill_variant(name, rng):
+    """Spell a skill the way different resumes do"""
+    return rng.choice([name, name.lower(), name.upper(), f"{name} 3", f"{name} (Advanced)", f" {name}  "])
+
+def bench_skill_catalog(args):
+    """Compare skill statistics grouped by raw name with catalog skill counts, then time the backfill"""
+    from sqlalchemy import func, update
+    from database import (
+        SessionLocal, Candidate, Skill, SkillAlias, CandidateFilter, save_candidates_bulk, get_skill_counts,
+        backfill_skill_catalog, count_candidates
+    )
+    from skill_catalog import skill_key
+
+    rng = random.Random(args.seed)
+    delete_benchmark_rows()
+
+    db = SessionLocal()
+    try:
+        records = [synthetic_resume(n, rng) for n in range(args.resumes)]
+        for record in records:
+            record['parsed_data']['skills'] = [skill_variant(skill, rng) for skill in record['parsed_data']['skills']]
+        save_candidates_bulk(records, user_id=BENCHMARK_USER_ID)
+
+        benchmark_candidates = db.query(Candidate.candidate_id).filter(Candidate.user_id == BENCHMARK_USER_ID)
+        benchmark_skills = Skill.candidate_id.in_(benchmark_candidates)
+        raw_names = db.query(func.count(func.distinct(Skill.skill_name))).filter(benchmark_skills).scalar()
+        catalog_names = db.query(func.count(func.distinct(Skill.catalog_skill_id))).filter(benchmark_skills).scalar()
+        logger.info(f"{raw_names} raw skill names -> {catalog_names} catalog skills")
+
+        # The skills summary, over every user's candidates
+        raw_summary = db.query(Skill.skill_name, func.count().label('count')).group_by(
+            Skill.skill_name).order_by(func.count().desc()).limit(50)
+        raw_time, _ = best_time(lambda: raw_summary.all(), args.repeat)
+        catalog_time, _ = best_time(lambda: get_skill_counts(limit=50), args.repeat)
+        logger.info(f"top 50 skills: GROUP BY skill_name {raw_time * 1000:.1f}ms, "
+                    f"GROUP BY catalog_skill_id {catalog_time * 1000:.1f}ms ({raw_time / catalog_time:.1f}x)")
+
+        # Every spelling of Python must land on one catalog skill
+        expected = sum(1 for r in records if any(s.strip().lower().startswith("python") for s in r['parsed_data']['skills']))
+        catalog_rows = get_skill_counts(user_id=BENCHMARK_USER_ID, limit=len(SKILL_POOL))
+        python_id = db.query(SkillAlias.catalog_skill_id).filter(SkillAlias.alias == "python").scalar()
+        python = next((row for row in catalog_rows if row['catalog_skill_id'] == python_id), None)
+        if not python or python['count'] != expected:
+            logger.error(f"Catalog counted {python and python['count']} Python candidates, expected {expected}")
+            raise SystemExit(1)
+
+        # Filtering by a known alias finds the candidates saved under the canonical spelling
+        for alias, canonical in (("golang", "go"), ("k8s", "kubernetes")):
+            expected = sum(1 for r in records if any(skill_key(s) == canonical for s in r['parsed_data']['skills']))
+            found, _ = count_candidates(db, CandidateFilter(user_id=BENCHMARK_USER_ID, skills=[alias]))
+            if found != expected:
+                logger.error(f"Filtering by {alias!r} found {found} candidates, expected {expected}")
+                raise SystemExit(1)
+
+        # Unlink the benchmark skills and time the backfill that links them again
+        skill_rows = db.query(func.count(Skill.skill_id)).filter(benchmark_skills).scalar()
+        db.execute(update(Skill).where(benchmark_skills).values(catalog_skill_id=None), execution_options={"synchronize_session": False})
+        db.commit()
+        started = time.perf_counter()
+        linked = backfill_skill_catalog()
+        report("backfill_skill_catalog", linked, time.perf_counter() - started)
+        if linked != skill_rows:
+            logger.error(f"Backfill linked {linked} skill rows, expected {skill_rows}")
+            raise SystemExit(1)
+    finally:
+        db.close()
+        delete_benchmark_rows()
+
+def percentile(values, fraction):
+    ordered = sorted(values)
+    return ordered[min(len(ordered) - 1, int(len(ordered) * fraction))]
+
+# Mixed API traffic for async-load: listings with filters, ranked search and a cheap route
+LOAD_REQUESTS = [
+    ("listing", "/candidates/?limit=20"),
+    ("listing", "/candidates/?limit=20&skills=Python&location=berlin"),
+    ("listing", "/candidates/?limit=20&cursor=&min_experience=5"),
+    ("search", "/candidates/search?q=python%20toronto"),
+    ("root", "/"),
+]
+
+async def run_load(app, clients, requests_per_client):
+    """Send LOAD_REQUESTS round-robin from concurrent clients; returns elapsed time and latencies per route"""
+    import asyncio
+    import httpx
+
+    latencies = {name: [] for name, _ in LOAD_REQUESTS}
+
+    async def client_loop(client, offset):
+        for n in range(requests_per_client):
+            name, url = LOAD_REQUESTS[(offset + n) % len(LOAD_REQUESTS)]
+            started = time.perf_counter()
+            response = await client.get(url)
+            latencies[name].append(time.perf_counter() - started)
+            if response.status_code != 200:
+                raise RuntimeError(f"GET {url} returned {response.status_code}: {response.text[:200]}")
+
+    transport = httpx.ASGITransport(app=app)
+    async with httpx.AsyncClient(transport=transport, base_url="http://benchmark") as client:
+        started = time.perf_counter()
+        await asyncio.gather(*(client_loop(client, offset) for offset in range(clients)))
+        return time.perf_counter() - started, latencies
+
+def bench_async_load(args):
+    """Mixed concurrent API traffic with async database calls vs the same calls blocking the event loop"""
+    import asyncio
+    import api
+    import async_database
+    from database import get_all_candidates
+    from auth_middleware import get_current_user
+
+    rng = random.Random(args.seed)
+    delete_benchmark_rows()
+    api.app.dependency_overrides[get_current_user] = lambda: {"id": BENCHMARK_USER_ID, "email": "benchmark@example.com"}
+    async_listing = api.get_all_candidates_async
+
+    async def blocking_listing(**kwargs):
+        # What the endpoint did before: a synchronous query inside the async handler
+        return get_all_candidates(**kwargs)
+
+    async def load_test():
+        results = {}
+        try:
+            for mode, listing in (("blocking", blocking_listing), ("async", async_listing)):
+                api.get_all_candidates_async = listing
+                await run_load(api.app, args.clients, 2)  # warm up connections
+                elapsed, latencies = await run_load(api.app, args.clients, args.requests)
+                total = sum(len(values) for values in latencies.values())
+                results[mode] = total / elapsed
+                logger.info(f"{mode}: {total} requests from {args.clients} clients in {elapsed:.2f}s ({total / elapsed:,.0f} req/sec)")
+                for name, values in latencies.items():
+                    logger.info(f"  {name}: p50 {percentile(values, 0.5) * 1000:.1f}ms, p95 {percentile(values, 0.95) * 1000:.1f}ms")
+        finally:
+            # Async connections belong to this event loop
+            await async_database.async_engine.dispose()
+        return results
+
+    try:
+        seed_candidates(args.resumes, rng)
+        results = asyncio.run(load_test())
+        logger.info(f"async throughput {results['async'] / results['blocking']:.2f}x blocking")
+    finally:
+        api.get_all_candidates_async = async_listing
+        api.app.dependency_overrides.pop(get_current_user, None)
+        delete_benchmark_rows()
+
+def measure_export(func):
+    """Run an export; returns (seconds to first chunk, total seconds, peak traced memory in MB, chunks)"""
+    import tracemalloc
+
+    tracemalloc.start()
+    started = time.perf_counter()
+    first_chunk = None
+    chunks = 0
+    try:
+        for _ in func():
+            chunks += 1
+            if first_chunk is None:
+                first_chunk = time.perf_counter() - started
+        return first_chunk, time.perf_counter() - started, tracemalloc.get_traced_memory()[1] / 2**20, chunks
+    finally:
+        tracemalloc.stop()
+
+def bench_export(args):
+    """Compare the streamed /candidates/export with paging through /candidates/ at limit=1000"""
+    from database import CandidateFilter, get_all_candidates, iter_candidate_documents
+    from candidate_export import ExportFormat, export_lines
+
+    rng = random.Random(args.seed)
+    delete_benchmark_rows()
+
+    def paged():
+        # Every page is loaded, then the whole result is formatted at once
+        documents, page = [], 1
+        while True:
+            result = get_all_candidates(page=page, limit=1000, user_id=BENCHMARK_USER_ID)
+            documents.extend(result['candidates'])
+            if not result['pagination']['has_next']:
+                break
+            page += 1
+        return ["".join(export_lines(documents, ExportFormat.NDJSON))]
+
+    def streamed():
+        return export_lines(iter_candidate_documents(CandidateFilter(user_id=BENCHMARK_USER_ID)), ExportFormat.NDJSON)
+
+    try:
+        seed_candidates(args.resumes, rng)
+        for name, func in (("paged /candidates/", paged), ("streamed export", streamed)):
+            first_chunk, total, peak, chunks = measure_export(func)
+            logger.info(f"{name}: first chunk {first_chunk * 1000:.0f}ms, {args.resumes} candidates in {total:.2f}s "
+                        f"({args.resumes / total:,.0f}/sec), {chunks} chunks, peak memory {peak:.1f}MB")
+    finally:
+        delete_benchmark_rows()
+
+def bench_facets(args):
+    """Compare facet counts in grouped queries with one count query per facet value, and time cache hits"""
+    from database import SessionLocal, CandidateFilter, candidate_facets, get_candidate_facets
+
+    rng = random.Random(args.seed)
+    delete_benchmark_rows()
+
+    db = SessionLocal()
+    try:
+        seed_candidates(args.resumes, rng)
+        candidate_filter = CandidateFilter(user_id=BENCHMARK_USER_ID, skills=["Python"])
+
+        grouped_time, facets = best_time(lambda: candidate_facets(db, candidate_filter), args.repeat)
+        values = sum(len(entries) for entries in facets.values())
+
+        def per_value():
+            # What the filter panel needs without facets: one /candidates/ count per option
+            counts = {}
+            for entry in facets['skills']:
+                counts[('skills', entry['value'])] = CandidateFilter(
+                    user_id=BENCHMARK_USER_ID, skills=[entry['value']]
+                ).count_query(db).scalar()
+            for name in ('country', 'city'):
+                for entry in facets[name]:
+                    counts[(name, entry['value'])] = CandidateFilter(
+                        user_id=BENCHMARK_USER_ID, skills=["Python"], location=entry['value']
+                    ).count_query(db).scalar()
+            return counts
+
+        per_value_time, counts = best_time(per_value, args.repeat)
+        for name in ('country', 'city'):
+            for entry in facets[name]:
+                if counts[(name, entry['value'])] != entry['count']:
+                    logger.error(f"{name} {entry['value']!r}: facet counted {entry['count']}, filter matched {counts[(name, entry['value'])]}")
+                    raise SystemExit(1)
+
+        get_candidate_facets(candidate_filter)
+        cached_time, _ = best_time(lambda: get_candidate_facets(candidate_filter), args.repeat)
+        logger.info(f"{values} facet values: grouped queries {grouped_time * 1000:.1f}ms, "
+                    f"one count per value ({len(counts)} of them) {per_value_time * 1000:.1f}ms, "
+                    f"cached {cached_time * 1000:.3f}ms")
+    finally:
+        db.close()
+        delete_benchmark_rows()
+
+def listing_requests(count, rng):
+    """Listing filters as API traffic sends them: a few filter combinations with varying values"""
+    makers = [
+        lambda: {},
+        lambda: {'skills': rng.sample(SKILL_POOL, rng.randint(1, 3))},
+        lambda: {'location': rng.choice(LOCATION_POOL).split(",")[0]},
+        lambda: {'company': rng.choice(COMPANY_POOL).split()[0], 'position': rng.choice(POSITION_POOL).split()[-1]},
+        lambda: {'skills': [rng.choice(SKILL_POOL)], 'education': "Computer", 'min_experience': rng.randint(0, 10)},
+    ]
+    return [rng.choice(makers)() for _ in range(count)]
+
+def rebuilt_listing_statements(candidate_filter, limit):
+    """Count and page statements built the way list_candidates did before they were cached"""
+    from sqlalchemy import func, select
+    from database import Candidate, CandidateSummary
+
+    criteria = candidate_filter.criteria()
+    count = select(func.count(Candidate.candidate_id)).where(*criteria)
+    page = select(Candidate.candidate_id, Candidate.created_at, CandidateSummary.document).outerjoin(
+        CandidateSummary, CandidateSummary.candidate_id == Candidate.candidate_id
+    ).where(*criteria).order_by(Candidate.created_at, Candidate.candidate_id).offset(0).limit(limit + 1)
+    return count, page
+
+def bench_listing_statements(args):
+    """Compare per-request listing overhead with statements rebuilt per request and cached per filter shape"""
+    import json
+    from database import SessionLocal, CandidateFilter, list_candidates, _listing_statement
+
+    rng = random.Random(args.seed)
+    delete_benchmark_rows()
+
+    db = SessionLocal()
+    try:
+        seed_candidates(args.resumes, rng)
+        requests = listing_requests(LISTING_STATEMENT_REQUESTS, rng)
+        limit = 20
+
+        def rebuilt():
+            results = []
+            for filters in requests:
+                count, page = rebuilt_listing_statements(CandidateFilter(user_id=BENCHMARK_USER_ID, **filters), limit)
+                total = db.execute(count).scalar()
+                results.append((total, [json.loads(row.document)['candidate_id'] for row in db.execute(page).all()[:limit]]))
+            return results
+
+        def cached():
+            return [
+                (result['pagination']['total_count'], [candidate['candidate_id'] for candidate in result['candidates']])
+                for result in (
+                    list_candidates(db, limit=limit, user_id=BENCHMARK_USER_ID, count_strategy="exact", **filters)
+                    for filters in requests
+                )
+            ]
+
+        # What is paid before a statement reaches the driver: building it, and the cache
+        # key SQLAlchemy derives from it to find the compiled SQL
+        def prepare_rebuilt():
+            for filters in requests:
+                for statement in rebuilt_listing_statements(CandidateFilter(user_id=BENCHMARK_USER_ID, **filters), limit):
+                    statement._generate_cache_key()
+
+        def prepare_cached():
+            for filters in requests:
+                candidate_filter = CandidateFilter(user_id=BENCHMARK_USER_ID, **filters)
+                for kind in ('count', 'offset'):
+                    params = candidate_filter.parameters()
+                    _listing_statement(candidate_filter, params, kind)._generate_cache_key()
+
+        rebuilt_time, expected = best_time(rebuilt, args.repeat)
+        cached_time, results = best_time(cached, args.repeat)
+        if results != expected:
+            logger.error("Cached listing statements returned different candidates")
+            raise SystemExit(1)
+        prepare_rebuilt_time, _ = best_time(prepare_rebuilt, args.repeat)
+        prepare_cached_time, _ = best_time(prepare_cached, args.repeat)
+
+        per_request = 1000 / len(requests)
+        logger.info(f"{len(requests)} listing requests: rebuilt statements {rebuilt_time * per_request:.3f}ms/request, "
+                    f"cached {cached_time * per_request:.3f}ms/request ({rebuilt_time / cached_time:.1f}x)")
+        logger.info(f"Statement preparation: rebuilt {prepare_rebuilt_time * per_request:.3f}ms/request, "
+                    f"cached {prepare_cached_time * per_request:.3f}ms/request ({prepare_rebuilt_time / prepare_cached_time:.1f}x)")
+    finally:
+        db.close()
+        delete_benchmark_rows()
+
+BENCHMARKS = {
+    "bulk-save": bench_bulk_save,
+    "listing-queries": bench_listing_queries,
+    "filter-queries": bench_filter_queries,
+    "pagination": bench_pagination,
+    "text-search": bench_text_search,
+    "skill-catalog": bench_skill_catalog,
+    "async-load": bench_async_load,
+    "export": bench_export,
+    "facets": bench_facets,
+    "listing-statements": bench_listing_statements,
+}
+
+def main():
+    parser = argparse.ArgumentParser(description="Run Sen AI database benchmarks")
+    parser.add_argument("benchmark", choices=sorted(BENCHMARKS), help="Benchmark to run")
+    parser.add_argument("--resumes", type=int, default=200, help="Number of synthetic resumes per run")
+    parser.add_argument("--seed", type=int, default=42, help="Random seed for synthetic data")
+    parser.add_argument("--repeat", type=int, default=5, help="Runs per timed query (fastest is reported)")
+    parser.add_argument("--clients", type=int, default=20, help="Concurrent clients (async-load)")
+    parser.add_argument("--requests", type=int, default=25, help="Requests per client (async-load)")
+    parser.add_argument("--sqlite", action="store_true", help="Run against a temporary SQLite database")
+    args = parser.parse_args()
+
+    if not args.sqlite:
+        BENCHMARKS[args.benchmark](args)
+    elif args.benchmark != "async-load":
+        use_sqlite()
+        BENCHMARKS[args.benchmark](args)
+    else:
+        # The sync and async engines need one database, so it lives in a file
+        with tempfile.TemporaryDirectory() as directory:
+            use_sqlite(os.path.join(directory, "benchmark.db"))
+            BENCHMARKS[args.benchmark](args)
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,55 @@
+"""
+Candidate Archive for Sen AI
+Periodic job moving rejected candidates, and pending candidates nobody acted on, to the
+archive tables (see database.archive_candidates) once they have not been updated for
+ARCHIVE_REJECTED_AFTER_DAYS or ARCHIVE_STALE_AFTER_DAYS. Listings, filters, facets and
+counts then only read the active working set; archived candidates stay listable and
+restorable through /candidates/archived.
+
+Run it from cron, e.g. nightly:
+
+    python candidate_archive.py --run
+"""
+
+import logging
+import argparse
+
+from database import (
+    init_db, archive_candidates, ARCHIVE_REJECTED_AFTER_DAYS, ARCHIVE_STALE_AFTER_DAYS, ARCHIVE_BATCH_SIZE
+)
+
+# Configure logging
+logging.basicConfig(level=logging.INFO)
+logger = logging.getLogger(__name__)
+
+def main():
+    parser = argparse.ArgumentParser(description="Archive rejected and stale candidates")
+    parser.add_argument("--run", action="store_true", help="Move the candidates due for archival")
+    parser.add_argument("--dry-run", action="store_true", help="Only count the candidates due for archival")
+    parser.add_argument("--user-id", type=int, help="Only archive this user's candidates")
+    parser.add_argument("--rejected-after-days", type=int, default=ARCHIVE_REJECTED_AFTER_DAYS,
+                        help="Archive rejected candidates not updated for this many days (0: never)")
+    parser.add_argument("--stale-after-days", type=int, default=ARCHIVE_STALE_AFTER_DAYS,
+                        help="Archive pending candidates not updated for this many days (0: never)")
+    parser.add_argument("--batch-size", type=int, default=ARCHIVE_BATCH_SIZE, help="Candidates moved per transaction")
+    args = parser.parse_args()
+
+    if not args.run and not args.dry_run:
+        parser.print_help()
+        return
+
+    init_db()
+    count = archive_candidates(
+        user_id=args.user_id,
+        rejected_after_days=args.rejected_after_days,
+        stale_after_days=args.stale_after_days,
+        batch_size=args.batch_size,
+        dry_run=args.dry_run
+    )
+    if args.dry_run:
+        logger.info(f"{count} candidates are due for archival")
+    else:
+        logger.info(f"Archived {count} candidates")
+
+if __name__ == "__main__":
+    main()
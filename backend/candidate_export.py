@@ -0,0 +1,77 @@
+"""
+Candidate Export for Sen AI
+Formats candidate documents (see candidate_summary.py) as CSV or NDJSON for the
+streaming /candidates/export endpoint. Lines are grouped into chunks of about
+EXPORT_CHUNK_BYTES, so a large export is sent as a steady stream of small writes.
+"""
+
+import io
+import csv
+import json
+from enum import Enum
+from typing import Any, Dict, Iterable, Iterator
+
+# Bytes of output grouped into one response chunk
+EXPORT_CHUNK_BYTES = 64 * 1024
+
+class ExportFormat(str, Enum):
+    CSV = "csv"
+    NDJSON = "ndjson"
+
+EXPORT_MEDIA_TYPES = {
+    ExportFormat.CSV: "text/csv",
+    ExportFormat.NDJSON: "application/x-ndjson",
+}
+
+CSV_COLUMNS = [
+    "candidate_id", "full_name", "email", "phone", "location", "years_experience", "status",
+    "created_at", "original_filename", "skills", "education", "work_experience",
+]
+
+def csv_row(document: Dict[str, Any]) -> list:
+    """Flatten a candidate document into CSV_COLUMNS; list fields are joined with '; '"""
+    education = [
+        ", ".join(str(value) for value in (edu.get("degree"), edu.get("institution"), edu.get("graduation_year")) if value)
+        for edu in document.get("education", [])
+    ]
+    work_experience = [
+        f"{exp.get('position') or 'Unknown'} at {exp.get('company') or 'Unknown'}"
+        + (f" ({exp['duration']})" if exp.get("duration") else "")
+        for exp in document.get("work_experience", [])
+    ]
+    row = [document.get(column) for column in CSV_COLUMNS[:9]]
+    return row + ["; ".join(document.get("skills", [])), "; ".join(education), "; ".join(work_experience)]
+
+def export_lines(documents: Iterable[Dict[str, Any]], export_format: ExportFormat) -> Iterator[str]:
+    """
+    Format candidate documents, yielding the CSV header (or first document) immediately
+    and the rest in chunks of about EXPORT_CHUNK_BYTES
+
+    Args:
+        documents: Candidate documents, consumed lazily
+        export_format (ExportFormat): csv or ndjson
+
+    Returns:
+        iterator: Chunks of the export
+    """
+    buffer = io.StringIO()
+    writer = csv.writer(buffer) if export_format == ExportFormat.CSV else None
+    if writer:
+        writer.writerow(CSV_COLUMNS)
+        yield buffer.getvalue()
+        buffer.seek(0)
+        buffer.truncate()
+
+    for document in documents:
+        if writer:
+            writer.writerow(csv_row(document))
+        else:
+            buffer.write(json.dumps(document, ensure_ascii=False))
+            buffer.write("\n")
+        if buffer.tell() >= EXPORT_CHUNK_BYTES:
+            yield buffer.getvalue()
+            buffer.seek(0)
+            buffer.truncate()
+
+    if buffer.tell():
+        yield buffer.getvalue()
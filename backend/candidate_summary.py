@@ -0,0 +1,109 @@
+"""
+Candidate Summary for Sen AI
+Builds the precomputed per-candidate summary stored in candidate_summaries (see
+database.CandidateSummary): the candidate document served by listings and shortlisting,
+and the prompt text block used as chat context. Both are rewritten on every save and
+status change, so read paths load one row per candidate instead of four tables.
+
+Rebuild the summaries of existing candidates with:
+
+    python candidate_summary.py --rebuild [--user-id N]
+"""
+
+import logging
+import argparse
+from typing import Any, Dict, List
+
+# Configure logging
+logging.basicConfig(level=logging.INFO)
+logger = logging.getLogger(__name__)
+
+def summary_document(candidate, education: List, skills: List, work_experience: List) -> Dict[str, Any]:
+    """
+    Build the candidate document, in the shape returned by the /candidates/ endpoint
+
+    Args:
+        candidate: Row with the candidates table columns
+        education (list): Education rows of the candidate
+        skills (list): Skill rows of the candidate
+        work_experience (list): Work experience rows of the candidate
+
+    Returns:
+        dict: JSON-serialisable candidate document
+    """
+    return {
+        "candidate_id": candidate.candidate_id,
+        "full_name": candidate.full_name,
+        "email": candidate.email,
+        "phone": candidate.phone,
+        "location": candidate.location,
+        "years_experience": candidate.years_experience,
+        "status": candidate.status.value if candidate.status else "pending",
+        "created_at": candidate.created_at.isoformat() if candidate.created_at else None,
+        "resume_available": bool(candidate.resume_file_path),
+        "original_filename": candidate.original_filename,
+        "skills": [skill.skill_name for skill in skills],
+        "education": [
+            {
+                "degree": edu.degree,
+                "institution": edu.institution,
+                "graduation_year": edu.graduation_year,
+                "gpa": edu.gpa
+            }
+            for edu in education
+        ],
+        "work_experience": [
+            {
+                "company": exp.company,
+                "position": exp.position,
+                "start_date": exp.start_date,
+                "end_date": exp.end_date,
+                "duration": exp.duration,
+                "description": exp.description
+            }
+            for exp in work_experience
+        ]
+    }
+
+def summary_prompt_text(document: Dict[str, Any]) -> str:
+    """Format a candidate document as its block of the chat assistant's candidate context"""
+    return "\n".join([
+        f"CANDIDATE ID: {document['candidate_id']}",
+        f"Name: {document['full_name']}",
+        f"Email: {document.get('email', 'Not provided')}",
+        f"Phone: {document.get('phone', 'Not provided')}",
+        f"Location: {document.get('location', 'Not provided')}",
+        f"Years of Experience: {document.get('years_experience', 'Not specified')}",
+        f"Status: {document.get('status', 'pending')}",
+        "",
+        "Education:",
+        *[f"  - {edu.get('degree', 'Unknown')} from {edu.get('institution', 'Unknown')} ({edu.get('graduation_year', 'Unknown')})"
+          for edu in document.get('education', [])],
+        "",
+        f"Skills: {', '.join(document.get('skills', ['No skills listed']))}",
+        "",
+        "Work Experience:",
+        *[f"  - {exp.get('position', 'Unknown')} at {exp.get('company', 'Unknown')} ({exp.get('duration', 'Unknown')})"
+          for exp in document.get('work_experience', [])],
+        "",
+        "=" * 50,
+        ""
+    ])
+
+def main():
+    parser = argparse.ArgumentParser(description="Maintain the precomputed candidate summaries")
+    parser.add_argument("--rebuild", action="store_true", help="Rebuild summaries from the stored candidates")
+    parser.add_argument("--user-id", type=int, default=None, help="Only rebuild this user's candidates")
+    args = parser.parse_args()
+
+    if not args.rebuild:
+        parser.print_help()
+        return
+
+    from database import init_db, rebuild_candidate_summaries
+    init_db()
+    rebuilt = rebuild_candidate_summaries(user_id=args.user_id)
+    logger.info(f"Rebuilt {rebuilt} candidate summaries")
+
+if __name__ == "__main__":
+    main()
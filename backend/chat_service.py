@@ -10,9 +10,9 @@ import re
 from groq import Groq
 from dotenv import load_dotenv
 from pydantic import BaseModel
-from database import get_db, Candidate, Education, Skill, WorkExperience
-from sqlalchemy.orm import Session, sessionmaker
-from sqlalchemy import create_engine, Column, Integer, String, Text, DateTime, ForeignKey
+from database import read_session, Candidate, CandidateFilter, get_candidate_summaries, get_candidate_prompts
+from sqlalchemy.orm import sessionmaker
+from sqlalchemy import func, Column, Integer, String, Text, DateTime, ForeignKey
 from sqlalchemy.ext.declarative import declarative_base
 from sqlalchemy.orm import relationship
 import json
@@ -76,97 +76,76 @@ class ChatHistory(BaseModel):
 
 class CandidateRAGService:
     """
-    Service to retrieve and format candidate data for RAG
+    Service to retrieve and format candidate data for RAG.
+    Each call reads in its own read session (see database.read_session), so it may be
+    served by a read replica.
     """
     
-    def __init__(self, db: Session):
-        self.db = db
-    
     def get_all_candidates_data(self, user_id: Optional[int] = None) -> List[Dict[str, Any]]:
         """
         Get all candidate data for RAG context, filtered by user_id
         """
+        db = read_session(user_id)
         try:
-            # Get candidates filtered by user_id
-            query = self.db.query(Candidate)
+            # Documents are precomputed per candidate, so this is one query
+            query = db.query(Candidate.candidate_id)
             if user_id is not None:
                 query = query.filter(Candidate.user_id == user_id)
+            candidate_ids = [row.candidate_id for row in query.order_by(Candidate.candidate_id).all()]
             
-            candidates = query.all()
-            
-            candidates_data = []
-            for candidate in candidates:
-                # Get education
-                education = self.db.query(Education).filter(Education.candidate_id == candidate.candidate_id).all()
-                education_list = [
-                    {
-                        "degree": edu.degree,
-                        "institution": edu.institution,
-                        "graduation_year": edu.graduation_year
-                    }
-                    for edu in education
-                ]
-                
-                # Get skills
-                skills = self.db.query(Skill).filter(Skill.candidate_id == candidate.candidate_id).all()
-                skills_list = [skill.skill_name for skill in skills]
-                
-                # Get work experience
-                work_experience = self.db.query(WorkExperience).filter(WorkExperience.candidate_id == candidate.candidate_id).all()
-                work_exp_list = [
-                    {
-                        "company": exp.company,
-                        "position": exp.position,
-                        "duration": exp.duration,
-                        "start_date": str(exp.start_date) if exp.start_date else None,
-                        "end_date": str(exp.end_date) if exp.end_date else None
-                    }
-                    for exp in work_experience
-                ]
-                
-                candidate_data = {
-                    "candidate_id": candidate.candidate_id,
-                    "full_name": candidate.full_name,
-                    "email": candidate.email,
-                    "phone": candidate.phone,
-                    "location": candidate.location,
-                    "years_experience": candidate.years_experience,
-                    "status": candidate.status.value if candidate.status else "pending",
-                    "education": education_list,
-                    "skills": skills_list,
-                    "work_experience": work_exp_list                }
-                candidates_data.append(candidate_data)
-            
-            return candidates_data
+            documents = get_candidate_summaries(db, candidate_ids)
+            return [documents[candidate_id] for candidate_id in candidate_ids if candidate_id in documents]
         
         except Exception as e:
             logger.error(f"Error getting candidates data for RAG: {str(e)}")
             return []
+        finally:
+            db.close()
     
-    def search_candidates_by_criteria(self, criteria: Dict[str, Any], user_id: Optional[int] = None) -> List[Dict[str, Any]]:
+    def count_candidates(self, user_id: Optional[int] = None) -> int:
         """
-        Search candidates based on specific criteria, filtered by user_id
+        Count the candidates available as context, filtered by user_id
         """
+        db = read_session(user_id)
         try:
-            query = self.db.query(Candidate)
-            
-            # Filter by user_id first
+            query = db.query(func.count(Candidate.candidate_id))
             if user_id is not None:
                 query = query.filter(Candidate.user_id == user_id)
-            
-            # Apply filters based on criteria
-            if criteria.get('skills'):
-                # This would need a more sophisticated join query
-                pass
-            
-            if criteria.get('location'):
-                query = query.filter(Candidate.location.ilike(f"%{criteria['location']}%"))
-            
-            if criteria.get('min_experience'):
-                query = query.filter(Candidate.years_experience >= criteria['min_experience'])
-            
-            if criteria.get('max_experience'):
-                query = query.filter(Candidate.years_experience <= criteria['max_experience'])
+            return query.scalar()
+        finally:
+            db.close()
+    
+    def get_candidates_context(self, user_id: Optional[int] = None) -> List[str]:
+        """
+        Get the precomputed chat context block of each candidate, filtered by user_id
+        """
+        db = read_session(user_id)
+        try:
+            return get_candidate_prompts(db, user_id)
+        except Exception as e:
+            logger.error(f"Error getting candidate context for RAG: {str(e)}")
+            return []
+        finally:
+            db.close()
+    
+    def search_candidates_by_criteria(self, criteria: Dict[str, Any], user_id: Optional[int] = None) -> List[Dict[str, Any]]:
+        """
+        Search candidates based on specific criteria, filtered by user_id
+        """
+        db = read_session(user_id)
+        try:
+            skills = criteria.get('skills')
+            if isinstance(skills, str):
+                skills = [skill.strip() for skill in skills.split(',') if skill.strip()]
+            
+            # Same index-backed filters as the candidate listing
+            query = CandidateFilter(
+                user_id=user_id,
+                skills=skills,
+                location=criteria.get('location'),
+                min_experience=criteria.get('min_experience') or None,
+                max_experience=criteria.get('max_experience') or None
+            ).page_query(db)
             
             candidates = query.all()
             return [{"candidate_id": c.candidate_id, "full_name": c.full_name} for c in candidates]
@@ -174,6 +153,8 @@ class CandidateRAGService:
         except Exception as e:
             logger.error(f"Error searching candidates: {str(e)}")
             return []
+        finally:
+            db.close()
 
 class ChatService:
     """
@@ -182,9 +163,9 @@ class ChatService:
     
     def __init__(self):
         try:
-            # Use the same database configuration as the main module
-            from database import DATABASE_URL
-            self.engine = create_engine(DATABASE_URL)
+            # Share the main module's engine and connection pool
+            from database import engine
+            self.engine = engine
             
             # Create tables if they don't exist
             Base.metadata.create_all(bind=self.engine)
@@ -193,11 +174,8 @@ class ChatService:
             SessionLocal = sessionmaker(autocommit=False, autoflush=False, bind=self.engine)
             self.chat_db = SessionLocal()
             
-            # Create main database session for candidate data
-            self.main_db = next(get_db())
-            
-            # Initialize RAG service
-            self.rag_service = CandidateRAGService(self.main_db)
+            # Initialize RAG service (opens its own read sessions for candidate data)
+            self.rag_service = CandidateRAGService()
             
             self.db_connected = True
             logger.info("Chat service initialized successfully with database connection")
@@ -209,7 +187,6 @@ class ChatService:
             # Initialize with minimal functionality
             self.engine = None
             self.chat_db = None
-            self.main_db = None
             self.rag_service = None
             self.db_connected = False
     def create_session(self, user_id: Optional[int] = None) -> str:
@@ -305,10 +282,10 @@ It looks like you haven't uploaded any resumes yet. To get started:
 I'll be ready to help you find the perfect candidates once you have some resumes in your database!
 """
         
-        # Get user-specific candidates data
-        candidates_data = self.rag_service.get_all_candidates_data(user_id)
+        # Get user-specific candidate context blocks
+        candidate_prompts = self.rag_service.get_candidates_context(user_id)
         
-        if not candidates_data:
+        if not candidate_prompts:
             return """=== CANDIDATE DATABASE ===
 No candidates found in your database.
 
@@ -323,34 +300,11 @@ I'll be ready to help you find the perfect candidates once you have some resumes
         # Create a comprehensive context about the candidates
         context_parts = [
             "=== CANDIDATE DATABASE ===",
-            f"Total candidates available: {len(candidates_data)}",
-            ""
+            f"Total candidates available: {len(candidate_prompts)}",
+            "",
+            *candidate_prompts
         ]
         
-        for candidate in candidates_data:
-            context_parts.extend([
-                f"CANDIDATE ID: {candidate['candidate_id']}",
-                f"Name: {candidate['full_name']}",
-                f"Email: {candidate.get('email', 'Not provided')}",
-                f"Phone: {candidate.get('phone', 'Not provided')}",
-                f"Location: {candidate.get('location', 'Not provided')}",
-                f"Years of Experience: {candidate.get('years_experience', 'Not specified')}",
-                f"Status: {candidate.get('status', 'pending')}",
-                "",
-                "Education:",
-                *[f"  - {edu.get('degree', 'Unknown')} from {edu.get('institution', 'Unknown')} ({edu.get('graduation_year', 'Unknown')})" 
-                  for edu in candidate.get('education', [])],
-                "",
-                f"Skills: {', '.join(candidate.get('skills', ['No skills listed']))}",
-                "",
-                "Work Experience:",
-                *[f"  - {exp.get('position', 'Unknown')} at {exp.get('company', 'Unknown')} ({exp.get('duration', 'Unknown')})" 
-                  for exp in candidate.get('work_experience', [])],
-                "",
-                "=" * 50,
-                ""
-            ])
-        
         return "\n".join(context_parts)
     
     def generate_response(self, user_message: str, session_id: str, user_id: Optional[int] = None) -> ChatResponse:
@@ -438,7 +392,7 @@ Remember: You can only recommend candidates from the provided database."""
                 response=response_content,
                 session_id=session_id,
                 candidates_mentioned=candidate_ids,
-                sources=[{"type": "candidate_database", "count": len(self.rag_service.get_all_candidates_data(user_id))}]
+                sources=[{"type": "candidate_database", "count": self.rag_service.count_candidates(user_id)}]
             )
         
         except Exception as e:
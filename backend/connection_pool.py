@@ -0,0 +1,236 @@
+"""
+Connection Pool for Sen AI
+Engine factory used for every database engine of the backend (database.py,
+async_database.py), so all services share tuned pool settings, and pool metrics:
+checkout wait time, connections in use and overflow, for sizing pools to worker counts.
+
+Each process (uvicorn or ingestion worker) holds up to DB_POOL_SIZE + DB_MAX_OVERFLOW
+connections per engine; keep workers * that below MySQL's max_connections.
+"""
+
+import os
+import time
+import logging
+import threading
+from collections import deque
+from typing import Dict, Any
+from dotenv import load_dotenv
+from sqlalchemy import create_engine, event, exc
+from sqlalchemy.engine import make_url
+from sqlalchemy.pool import QueuePool, AsyncAdaptedQueuePool
+from sqlalchemy.ext.asyncio import create_async_engine
+
+# Load environment variables
+load_dotenv()
+
+# Configure logging
+logging.basicConfig(level=logging.INFO)
+logger = logging.getLogger(__name__)
+
+# Pool configuration, per engine and per process
+DB_POOL_SIZE = int(os.environ.get("DB_POOL_SIZE", "10"))                  # Connections kept open
+DB_MAX_OVERFLOW = int(os.environ.get("DB_MAX_OVERFLOW", "10"))            # Extra connections opened under load, closed when returned
+DB_POOL_TIMEOUT = float(os.environ.get("DB_POOL_TIMEOUT", "10"))          # Seconds to wait for a free connection before failing
+DB_POOL_RECYCLE = int(os.environ.get("DB_POOL_RECYCLE", "1800"))          # Replace connections older than this (below MySQL wait_timeout)
+DB_POOL_PRE_PING = os.environ.get("DB_POOL_PRE_PING", "true").lower() in ("1", "true", "yes")  # Test connections on checkout
+DB_CONNECT_TIMEOUT = int(os.environ.get("DB_CONNECT_TIMEOUT", "10"))      # Seconds to open a new connection
+DB_POOL_SLOW_CHECKOUT = float(os.environ.get("DB_POOL_SLOW_CHECKOUT", "1.0"))  # Log checkouts waiting longer than this
+
+# connect() argument holding the connect timeout, per driver
+_CONNECT_TIMEOUT_ARGS = {
+    "mysqlconnector": "connection_timeout",
+    "pymysql": "connect_timeout",
+    "mysqldb": "connect_timeout",
+    "aiomysql": "connect_timeout",
+    "asyncmy": "connect_timeout",
+}
+
+class PoolMetrics:
+    """Checkout counters and wait times of one engine's pool"""
+
+    def __init__(self, name: str, window: int = 1000):
+        self.name = name
+        self._waits = deque(maxlen=window)
+        self._lock = threading.Lock()
+
+        self._checkouts = 0
+        self._overflow_checkouts = 0
+        self._timeouts = 0
+        self._slow_checkouts = 0
+        self._connects = 0
+        self._invalidations = 0
+        self._peak_in_use = 0
+
+    def record_checkout(self, wait: float, in_use: int, overflowed: bool):
+        with self._lock:
+            self._checkouts += 1
+            self._waits.append(wait)
+            self._peak_in_use = max(self._peak_in_use, in_use)
+            if overflowed:
+                self._overflow_checkouts += 1
+            if wait >= DB_POOL_SLOW_CHECKOUT:
+                self._slow_checkouts += 1
+        if wait >= DB_POOL_SLOW_CHECKOUT:
+            logger.warning(f"Pool {self.name}: waited {wait:.2f}s for a connection ({in_use} in use)")
+
+    def record_timeout(self, wait: float):
+        with self._lock:
+            self._timeouts += 1
+        logger.error(f"Pool {self.name}: no connection available after {wait:.2f}s")
+
+    def record_connect(self):
+        with self._lock:
+            self._connects += 1
+
+    def record_invalidation(self):
+        with self._lock:
+            self._invalidations += 1
+
+    def get_stats(self, pool) -> Dict[str, Any]:
+        """
+        Snapshot of the metrics together with the pool's current state
+
+        Args:
+            pool: The engine's pool
+
+        Returns:
+            dict: Pool configuration, current usage and checkout statistics
+        """
+        with self._lock:
+            waits = sorted(self._waits)
+            checkouts = self._checkouts
+            overflow_checkouts = self._overflow_checkouts
+            timeouts = self._timeouts
+            slow_checkouts = self._slow_checkouts
+            connects = self._connects
+            invalidations = self._invalidations
+            peak_in_use = self._peak_in_use
+
+        def percentile(fraction):
+            return waits[min(len(waits) - 1, int(len(waits) * fraction))] * 1000 if waits else 0.0
+
+        return {
+            "pool_size": int(pool.size()),
+            "max_overflow": int(pool._max_overflow),
+            "in_use": int(pool.checkedout()),
+            "idle": int(pool.checkedin()),
+            "overflow": max(int(pool.overflow()), 0),
+            "peak_in_use": int(peak_in_use),
+            "checkouts": int(checkouts),
+            "overflow_checkouts": int(overflow_checkouts),
+            "slow_checkouts": int(slow_checkouts),
+            "checkout_timeouts": int(timeouts),
+            "connections_opened": int(connects),
+            "connections_invalidated": int(invalidations),
+            "checkout_wait_ms": {
+                "samples": len(waits),
+                "avg": float(sum(waits) / len(waits) * 1000) if waits else 0.0,
+                "p50": float(percentile(0.5)),
+                "p95": float(percentile(0.95)),
+                "max": float(waits[-1] * 1000) if waits else 0.0,
+            },
+        }
+
+class MeteredQueuePool(QueuePool):
+    """QueuePool that records checkout wait time (including pre-ping) in its PoolMetrics"""
+
+    # Log as SQLAlchemy's QueuePool, so the usual sqlalchemy.pool logging settings apply
+    _sqla_logger_namespace = "sqlalchemy.pool.impl.QueuePool"
+    metrics = None
+
+    def connect(self):
+        started = time.perf_counter()
+        overflow_before = self._overflow
+        try:
+            connection = super().connect()
+        except exc.TimeoutError:
+            self.metrics.record_timeout(time.perf_counter() - started)
+            raise
+        self.metrics.record_checkout(
+            time.perf_counter() - started,
+            self.checkedout(),
+            self._overflow > max(overflow_before, 0)
+        )
+        return connection
+
+    def recreate(self):
+        # dispose() replaces the pool; keep counting into the same metrics
+        pool = super().recreate()
+        pool.metrics = self.metrics
+        return pool
+
+class MeteredAsyncAdaptedQueuePool(MeteredQueuePool, AsyncAdaptedQueuePool):
+    """MeteredQueuePool for async engines"""
+
+# Engine name -> (engine, metrics), for get_pool_stats
+_engines = {}
+
+def _pool_options(url):
+    connect_args = {}
+    timeout_arg = _CONNECT_TIMEOUT_ARGS.get(make_url(url).get_driver_name())
+    if timeout_arg:
+        connect_args[timeout_arg] = DB_CONNECT_TIMEOUT
+    return {
+        "pool_size": DB_POOL_SIZE,
+        "max_overflow": DB_MAX_OVERFLOW,
+        "pool_timeout": DB_POOL_TIMEOUT,
+        "pool_recycle": DB_POOL_RECYCLE,
+        "pool_pre_ping": DB_POOL_PRE_PING,
+        "connect_args": connect_args,
+    }
+
+def _register(name, engine, sync_engine):
+    pool = sync_engine.pool
+    metrics = PoolMetrics(name)
+    pool.metrics = metrics
+    event.listen(sync_engine, "connect", lambda dbapi_connection, record: metrics.record_connect())
+    event.listen(sync_engine, "invalidate", lambda dbapi_connection, record, exception: metrics.record_invalidation())
+    _engines[name] = (engine, metrics)
+    logger.info(f"Engine {name}: pool_size={pool.size()}, max_overflow={pool._max_overflow}, "
+                f"recycle={pool._recycle}s, pre_ping={pool._pre_ping}")
+    return engine
+
+def create_db_engine(url, name="primary", **kwargs):
+    """
+    Create a SQLAlchemy engine with the configured pool settings and metrics
+
+    Args:
+        url (str): Database URL
+        name (str): Name reported by get_pool_stats
+        **kwargs: Extra create_engine arguments, overriding the configured ones
+
+    Returns:
+        Engine: The engine
+    """
+    options = {**_pool_options(url), **kwargs}
+    engine = create_engine(url, poolclass=MeteredQueuePool, **options)
+    return _register(name, engine, engine)
+
+def create_async_db_engine(url, name="async", **kwargs):
+    """
+    Create a SQLAlchemy async engine with the configured pool settings and metrics
+
+    Args:
+        url (str): Database URL of an async driver
+        name (str): Name reported by get_pool_stats
+        **kwargs: Extra create_async_engine arguments, overriding the configured ones
+
+    Returns:
+        AsyncEngine: The engine
+    """
+    options = {**_pool_options(url), **kwargs}
+    engine = create_async_engine(url, poolclass=MeteredAsyncAdaptedQueuePool, **options)
+    return _register(name, engine, engine.sync_engine)
+
+def get_pool_stats() -> Dict[str, Any]:
+    """
+    Get the pool statistics of every engine created by this module
+
+    Returns:
+        dict: Engine name -> pool statistics (see PoolMetrics.get_stats)
+    """
+    stats = {}
+    for name, (engine, metrics) in _engines.items():
+        sync_engine = getattr(engine, "sync_engine", engine)
+        stats[name] = metrics.get_stats(sync_engine.pool)
+    return stats
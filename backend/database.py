@@ -3,12 +3,27 @@ import logging
 import hashlib
 import uuid
 import os
-from datetime import datetime
-from sqlalchemy import create_engine, Column, Integer, String, Float, Enum, ForeignKey, DateTime, Text, Boolean, func
+from datetime import datetime, date, timedelta
+from sqlalchemy import event, Select, Column, Integer, String, Float, Enum, ForeignKey, DateTime, Date, Text, Boolean, func, select, insert, update, delete, bindparam, Table, PrimaryKeyConstraint, and_, or_, tuple_, case, literal, union_all, UniqueConstraint, Index
 from sqlalchemy.ext.declarative import declarative_base
-from sqlalchemy.orm import sessionmaker, relationship
+from sqlalchemy.orm import Session, sessionmaker, relationship, selectinload
+from sqlalchemy.dialects.mysql import insert as mysql_insert, VARCHAR as MYSQL_VARCHAR
+from sqlalchemy.dialects.sqlite import insert as sqlite_insert
 from dotenv import load_dotenv
+from search_index import SEARCH_FIELD_WEIGHTS, MAX_TERM_LENGTH, tokenize, candidate_terms, prefix_upper_bound
+from skill_catalog import MAX_SKILL_KEY_LENGTH, skill_key, skill_spellings, canonical_skill_name
+from candidate_summary import summary_document, summary_prompt_text
+from connection_pool import create_db_engine
+from read_replicas import ReplicaSet, replica_hosts, init_write_marks
+from experience_dates import normalize_experience, add_months
+from location_gazetteer import parse_location
+import copy
 import enum
+import re
+import json
+import time
+import base64
+import threading
 
 # Configure logging
 logging.basicConfig(level=logging.INFO)
@@ -27,21 +42,72 @@ DB_NAME = os.environ.get("DB_NAME")
 # Construct the database URL
 DATABASE_URL = f"mysql+mysqlconnector://{DB_USER}:{DB_PASS}@{DB_HOST}:{DB_PORT}/{DB_NAME}"
 
-# Create the SQLAlchemy engine
-engine = create_engine(DATABASE_URL)
+# Create the SQLAlchemy engine (pool settings: see connection_pool.py)
+engine = create_db_engine(DATABASE_URL)
+
+# Optional read replicas (DB_REPLICA_HOSTS, see read_replicas.py)
+REPLICA_HOSTS = replica_hosts(DB_PORT)
+replicas = ReplicaSet([
+    create_db_engine(f"mysql+mysqlconnector://{DB_USER}:{DB_PASS}@{host}:{port}/{DB_NAME}", name=f"replica-{index}")
+    for index, (host, port) in enumerate(REPLICA_HOSTS)
+], primary=engine)
+
+class CandidateSession(Session):
+    """
+    Session that keeps listing count caches in sync with commits (see _collect_candidate_writes)
+    and sends the plain SELECTs of read sessions to their replica (see read_session)
+    """
+
+    def get_bind(self, mapper=None, clause=None, **kwargs):
+        replica = self.info.get('replica')
+        if replica is not None:
+            if isinstance(clause, Select) and not self._flushing:
+                return replica
+            # Anything else pins the session to the primary, so it also reads its own writes
+            self.info['replica'] = None
+        return super().get_bind(mapper=mapper, clause=clause, **kwargs)
 
 # Create a session factory
-SessionLocal = sessionmaker(autocommit=False, autoflush=False, bind=engine)
+SessionLocal = sessionmaker(class_=CandidateSession, autocommit=False, autoflush=False, bind=engine)
 
 # Create Base class
 Base = declarative_base()
 
+# Number of resumes written per transaction by save_candidates_bulk
+BULK_SAVE_CHUNK_SIZE = int(os.environ.get("BULK_SAVE_CHUNK_SIZE", "100"))
+
+# Listing counts: default strategy, cache lifetime, and the estimate below which counting exactly is cheap
+CANDIDATE_COUNT_STRATEGY = os.environ.get("CANDIDATE_COUNT_STRATEGY", "exact")
+CANDIDATE_COUNT_CACHE_TTL = int(os.environ.get("CANDIDATE_COUNT_CACHE_TTL", "60"))
+CANDIDATE_COUNT_EXACT_BELOW = int(os.environ.get("CANDIDATE_COUNT_EXACT_BELOW", "5000"))
+CANDIDATE_COUNT_CACHE_SIZE = 10000
+# Listing statements kept for reuse, one per filter shape (see _listing_statement)
+LISTING_STATEMENT_CACHE_SIZE = 1000
+
+# Archival (see archive_candidates): age in days since the last update, 0 to never archive
+ARCHIVE_REJECTED_AFTER_DAYS = int(os.environ.get("ARCHIVE_REJECTED_AFTER_DAYS", "90"))  # Rejected candidates
+ARCHIVE_STALE_AFTER_DAYS = int(os.environ.get("ARCHIVE_STALE_AFTER_DAYS", "365"))       # Pending candidates nobody acted on
+ARCHIVE_BATCH_SIZE = int(os.environ.get("ARCHIVE_BATCH_SIZE", "500"))                   # Candidates moved per transaction
+
+# Values returned per facet by get_candidate_facets
+FACET_LIMIT = int(os.environ.get("FACET_LIMIT", "20"))
+# Years of experience facet: (label, min, max), max None for open-ended
+EXPERIENCE_FACET_BUCKETS = [("0-2", 0, 2), ("3-5", 3, 5), ("6-10", 6, 10), ("11+", 11, None)]
+
+# Candidates read per query by iter_candidate_documents (exports)
+EXPORT_BATCH_SIZE = int(os.environ.get("EXPORT_BATCH_SIZE", "1000"))
+
 # Define Enums
 class Status(enum.Enum):
     PENDING = "pending"
     SHORTLISTED = "shortlisted"
     REJECTED = "rejected"
 
+class CountStrategy(str, enum.Enum):
+    EXACT = "exact"  # COUNT on every request
+    CACHED = "cached"  # Exact count, reused per (user, filters) until candidates change
+    ESTIMATE = "estimate"  # Optimizer row estimate for large results (MySQL), exact otherwise
+
 class SkillCategory(enum.Enum):
     TECHNICAL = "technical"
     SOFT = "soft"
@@ -58,6 +124,16 @@ class ProficiencyLevel(enum.Enum):
 # Define Models
 class Candidate(Base):
     __tablename__ = "candidates"
+    __table_args__ = (
+        # Upsert targets for save_candidates_bulk (see schema_migrations.py)
+        UniqueConstraint("user_id", "email", name="uq_candidates_user_email"),
+        UniqueConstraint("user_id", "file_hash", name="uq_candidates_user_file_hash"),
+        # Listing order and keyset pagination (see get_all_candidates)
+        Index("idx_candidates_user_created", "user_id", "created_at", "candidate_id"),
+        # Location filters and counts on the normalised location (see location_gazetteer.py)
+        Index("idx_candidates_user_country", "user_id", "country", "region", "city"),
+        Index("idx_candidates_user_city", "user_id", "city"),
+    )
 
     candidate_id = Column(Integer, primary_key=True, autoincrement=True)
     user_id = Column(Integer, nullable=False)  # Foreign key to users table
@@ -65,14 +141,18 @@ class Candidate(Base):
     email = Column(String(255), nullable=True)  # Removed unique constraint
     phone = Column(String(50))
     location = Column(String(255))
+    # Normalised from location at save time (see location_gazetteer.py), NULL if not in the gazetteer
+    city = Column(String(100), nullable=True)
+    region = Column(String(100), nullable=True)
+    country = Column(String(100), nullable=True)
     years_experience = Column(Integer)
     resume_file_path = Column(String(1000))  # S3 object key or path
     resume_s3_url = Column(String(1000))     # Full S3 URL or presigned URL
     original_filename = Column(String(255))  # Original filename for reference
-    file_hash = Column(String(64), unique=True, nullable=True)  # SHA256 hash for duplicate detection
+    file_hash = Column(String(64), nullable=True)  # SHA256 hash for duplicate detection
     batch_id = Column(String(36), nullable=True)  # UUID for batch uploads
     status = Column(Enum(Status), default=Status.PENDING)
-    created_at = Column(DateTime, default=datetime.utcnow)
+    created_at = Column(DateTime, nullable=False, default=datetime.utcnow)  # Listing order and cursors
     updated_at = Column(DateTime, default=datetime.utcnow, onupdate=datetime.utcnow)
 
     # Relationships
@@ -82,6 +162,10 @@ class Candidate(Base):
 
 class Education(Base):
     __tablename__ = "education"
+    __table_args__ = (
+        # Used by the EXISTS filters of CandidateFilter
+        Index("idx_education_candidate_id", "candidate_id"),
+    )
 
     education_id = Column(Integer, primary_key=True, autoincrement=True)
     candidate_id = Column(Integer, ForeignKey("candidates.candidate_id", ondelete="CASCADE"))
@@ -93,12 +177,41 @@ class Education(Base):
     # Relationship
     candidate = relationship("Candidate", back_populates="education")
 
+class CatalogSkill(Base):
+    """A canonical skill (see skill_catalog.py); candidate skills reference it by ID"""
+    __tablename__ = "skill_catalog"
+
+    catalog_skill_id = Column(Integer, primary_key=True, autoincrement=True)
+    canonical_name = Column(String(MAX_SKILL_KEY_LENGTH), nullable=False, unique=True)
+    created_at = Column(DateTime, default=datetime.utcnow)
+
+    aliases = relationship("SkillAlias", back_populates="catalog_skill", cascade="all, delete-orphan")
+
+class SkillAlias(Base):
+    """A skill_key spelling of a catalog skill ("python", "golang", "k8s")"""
+    __tablename__ = "skill_aliases"
+    __table_args__ = (
+        Index("idx_skill_aliases_catalog_skill_id", "catalog_skill_id"),
+    )
+
+    alias = Column(String(MAX_SKILL_KEY_LENGTH), primary_key=True)
+    catalog_skill_id = Column(Integer, ForeignKey("skill_catalog.catalog_skill_id", ondelete="CASCADE"), nullable=False)
+
+    catalog_skill = relationship("CatalogSkill", back_populates="aliases")
+
 class Skill(Base):
     __tablename__ = "skills"
+    __table_args__ = (
+        # Used by the EXISTS filters of CandidateFilter
+        Index("idx_skills_candidate_id", "candidate_id"),
+        # Skill filters (catalog skill -> candidates) and per-skill counts
+        Index("idx_skills_catalog_candidate", "catalog_skill_id", "candidate_id"),
+    )
 
     skill_id = Column(Integer, primary_key=True, autoincrement=True)
     candidate_id = Column(Integer, ForeignKey("candidates.candidate_id", ondelete="CASCADE"))
-    skill_name = Column(String(255))
+    catalog_skill_id = Column(Integer, ForeignKey("skill_catalog.catalog_skill_id"), nullable=True)
+    skill_name = Column(String(255))  # As written in the resume
     skill_category = Column(Enum(SkillCategory), default=SkillCategory.TECHNICAL)
     proficiency_level = Column(Enum(ProficiencyLevel), default=ProficiencyLevel.UNKNOWN)
 
@@ -107,6 +220,14 @@ class Skill(Base):
 
 class WorkExperience(Base):
     __tablename__ = "work_experiences"
+    __table_args__ = (
+        # Used by the EXISTS filters of CandidateFilter
+        Index("idx_work_exp_candidate_id", "candidate_id"),
+        # Date and tenure filters of CandidateFilter (worked_after, min_tenure_months)
+        Index("idx_work_exp_end_on", "end_on", "candidate_id"),
+        Index("idx_work_exp_current_start_on", "is_current", "start_on", "candidate_id"),
+        Index("idx_work_exp_tenure", "tenure_months", "candidate_id"),
+    )
 
     experience_id = Column(Integer, primary_key=True, autoincrement=True)
     candidate_id = Column(Integer, ForeignKey("candidates.candidate_id", ondelete="CASCADE"))
@@ -116,10 +237,83 @@ class WorkExperience(Base):
     end_date = Column(String(50))    # Could be "Present" or a date
     duration = Column(String(100))   # e.g., "2 years 3 months"
     description = Column(Text, nullable=True)
+    # Normalised from the strings above at save time (see experience_dates.py)
+    start_on = Column(Date, nullable=True)       # First day of the start month
+    end_on = Column(Date, nullable=True)         # First day of the end month (December for a bare year), NULL for ongoing jobs
+    is_current = Column(Boolean, nullable=True)  # NULL until normalised
+    tenure_months = Column(Integer, nullable=True)  # Months in the role (up to the save for ongoing jobs)
 
     # Relationship
     candidate = relationship("Candidate", back_populates="work_experiences")
 
+class CandidateSearchTerm(Base):
+    """One term of the candidate search index (see search_index.py), maintained on every save"""
+    __tablename__ = "candidate_search_terms"
+    __table_args__ = (
+        # Prefix lookups: user, field, then a range on term
+        Index("idx_search_terms_lookup", "user_id", "field", "term", "candidate_id"),
+        Index("idx_search_terms_candidate_id", "candidate_id"),
+    )
+
+    term_id = Column(Integer, primary_key=True, autoincrement=True)
+    user_id = Column(Integer, nullable=False)
+    candidate_id = Column(Integer, ForeignKey("candidates.candidate_id", ondelete="CASCADE"), nullable=False)
+    field = Column(String(20), nullable=False)  # skill, company, position, education or location
+    # Binary collation so prefix ranges follow code point order
+    term = Column(String(MAX_TERM_LENGTH).with_variant(
+        MYSQL_VARCHAR(MAX_TERM_LENGTH, charset="utf8mb4", collation="utf8mb4_bin"), "mysql"
+    ), nullable=False)
+
+class CandidateSummary(Base):
+    """Precomputed document and chat prompt text of a candidate (see candidate_summary.py)"""
+    __tablename__ = "candidate_summaries"
+    __table_args__ = (
+        Index("idx_candidate_summaries_user", "user_id", "candidate_id"),
+    )
+
+    candidate_id = Column(Integer, ForeignKey("candidates.candidate_id", ondelete="CASCADE"), primary_key=True, autoincrement=False)
+    user_id = Column(Integer, nullable=False)
+    document = Column(Text, nullable=False)  # JSON candidate document
+    prompt_text = Column(Text, nullable=False)
+    updated_at = Column(DateTime, default=datetime.utcnow)
+
+def _archive_table(model, name, primary_key, *extra):
+    """Archive copy of a model's table: the same columns, without foreign keys, defaults or auto-increment"""
+    columns = [
+        Column(column.name, column.type, autoincrement=False, nullable=column.nullable and column.name not in primary_key)
+        for column in model.__table__.columns
+    ]
+    return Table(name, Base.metadata, *columns, PrimaryKeyConstraint(*primary_key), *extra)
+
+# Archived candidates and their child rows (see archive_candidates); search terms and
+# summaries are derived data and are rebuilt on restore instead of archived
+candidates_archive = _archive_table(
+    Candidate, "candidates_archive", ("user_id", "candidate_id"),
+    Column("archived_at", DateTime, nullable=False)
+)
+education_archive = _archive_table(
+    Education, "education_archive", ("education_id",), Index("idx_education_archive_candidate_id", "candidate_id")
+)
+skills_archive = _archive_table(
+    Skill, "skills_archive", ("skill_id",), Index("idx_skills_archive_candidate_id", "candidate_id")
+)
+work_experiences_archive = _archive_table(
+    WorkExperience, "work_experiences_archive", ("experience_id",), Index("idx_work_exp_archive_candidate_id", "candidate_id")
+)
+ARCHIVE_TABLES = {
+    Candidate: candidates_archive,
+    Education: education_archive,
+    Skill: skills_archive,
+    WorkExperience: work_experiences_archive,
+}
+
+# Columns that identify an unchanged child row when a re-uploaded resume is diffed
+CHILD_ROW_KEYS = {
+    Education: ('degree', 'institution', 'graduation_year'),
+    Skill: ('skill_name', 'catalog_skill_id', 'skill_category', 'proficiency_level'),
+    WorkExperience: ('company', 'position', 'start_date', 'end_date', 'duration')
+}
+
 # Database operations functions
 def get_db():
     """Get a database session"""
@@ -129,10 +323,26 @@ def get_db():
     finally:
         db.close()
 
+def read_session(user_id=None):
+    """
+    Open a session for read-only work. Its plain SELECTs go to a read replica that has
+    applied the user's latest write, when one is configured; anything else goes to the primary.
+    
+    Args:
+        user_id (int, optional): User whose data is read (None: any user's)
+    
+    Returns:
+        CandidateSession: The session, to be closed by the caller
+    """
+    replicas.start()
+    index = replicas.choose(user_id)
+    return SessionLocal(info={'replica': replicas.engines[index] if index is not None else None})
+
 def init_db():
     """Create all tables in the database"""
     try:
         Base.metadata.create_all(bind=engine)
+        init_write_marks(engine)
         logger.info("Database tables created successfully")
     except Exception as e:
         logger.error(f"Error creating database tables: {e}")
@@ -161,519 +371,2021 @@ def save_candidate_data(parsed_data, resume_file_path=None, resume_s3_url=None,
         user_id=user_id
     )
 
-def get_all_candidates(page=1, limit=5, status=None, user_id=None, min_experience=None, max_experience=None, 
-                      skills=None, location=None, company=None, position=None, education=None):
+def search_term_query(field, term, user_id=None, upper=None):
     """
-    Get all candidates with comprehensive filtering options
-    
+    IDs of candidates with a word starting with term in the field (an index range scan).
+    term, upper (default: prefix_upper_bound(term)) and user_id can be bind parameters.
+    """
+    query = select(CandidateSearchTerm.candidate_id).where(
+        CandidateSearchTerm.field == field,
+        CandidateSearchTerm.term >= term,
+        CandidateSearchTerm.term < (upper if upper is not None else prefix_upper_bound(term))
+    )
+    if user_id is not None:
+        query = query.where(CandidateSearchTerm.user_id == user_id)
+    return query
+
+class CandidateFilter:
+    """
+    Filters for candidate listings, compiled once into criteria shared by the page query
+    and the count query. Skills are matched through the skill catalog, so 'python' also
+    finds 'Python 3'. Other text filters are semi-joins on the candidate_search_terms index:
+    every word of the filter must prefix-match a word of the field ('eng' matches
+    'Software Engineer'). Candidates are found by index lookup, are never multiplied
+    by joins and neither query needs DISTINCT. Filter values are named bind parameters, so
+    listings build and compile one statement per combination of filters and reuse it with
+    the values of each request (see _listing_statement).
+
     Args:
-        limit (int): Maximum number of candidates to return
-        status (Status, optional): Filter by candidate status
         user_id (int, optional): Filter by user ID (for user-specific data)
+        status (Status, optional): Filter by candidate status
         min_experience (int, optional): Minimum years of experience
         max_experience (int, optional): Maximum years of experience
-        skills (list, optional): List of skills to filter by
-        location (str, optional): Location to filter by (partial match)
-        company (str, optional): Company name to filter by (partial match)
-        position (str, optional): Position/title to filter by (partial match)
-        education (str, optional): Education/degree to filter by (partial match)
-        
-    Returns:
-        list: List of candidate objects with relationships loaded
+        skills (list, optional): Skills to filter by (any of them, by catalog skill)
+        location (str, optional): Location to filter by (a known city, region or country matches the normalised location)
+        company (str, optional): Company name to filter by
+        position (str, optional): Position/title to filter by
+        education (str, optional): Degree or institution to filter by
+        worked_after (date, optional): Only candidates with a job that ran on or after this date
+        min_tenure_months (int, optional): Only candidates who spent at least this many months in one job
+    
+    With company or position, worked_after and min_tenure_months apply to the matching job
+    ("worked at X after 2020").
     """
-    from sqlalchemy import and_, or_, func
     
-    db = SessionLocal()
-    try:
-        query = db.query(Candidate)
+    def __init__(self, user_id=None, status=None, min_experience=None, max_experience=None,
+                 skills=None, location=None, company=None, position=None, education=None,
+                 worked_after=None, min_tenure_months=None):
+        self.user_id = user_id
+        self.status = status
+        self.min_experience = min_experience
+        self.max_experience = max_experience
+        self.skills = [skill.strip() for skill in skills if skill.strip()] if skills else []
+        self.location = location
+        self.company = company
+        self.position = position
+        self.education = education
+        self.worked_after = worked_after
+        self.min_tenure_months = min_tenure_months
+    
+    def parameters(self):
+        """
+        Values of the filters that are set, keyed by the name of their bind parameter.
+        The names alone determine the structure of the filter's statements (see shape).
+        """
+        params = {}
         
         # Basic filters
-        if status:
-            query = query.filter(Candidate.status == status)
-            
-        if user_id:
-            query = query.filter(Candidate.user_id == user_id)
-            
+        if self.user_id:
+            params['user_id'] = self.user_id
+        if self.status:
+            params['status'] = self.status
+        
         # Experience filters
-        if min_experience is not None:
-            query = query.filter(Candidate.years_experience >= min_experience)
-            
-        if max_experience is not None:
-            query = query.filter(Candidate.years_experience <= max_experience)
-            
-        # Location filter
-        if location:
-            query = query.filter(Candidate.location.ilike(f"%{location}%"))
+        if self.min_experience is not None:
+            params['min_experience'] = self.min_experience
+        if self.max_experience is not None:
+            params['max_experience'] = self.max_experience
         
-        # Skills filter
-        if skills and len(skills) > 0:
-            # Join with skills table and filter by skill names
-            query = query.join(Skill).filter(
-                or_(*[Skill.skill_name.ilike(f"%{skill.strip()}%") for skill in skills])
-            ).distinct()
+        # Location filter: places in the gazetteer match the normalised columns, others by word prefix
+        place = parse_location(self.location) if self.location else {}
+        if any(place.values()):
+            params.update({f"location_{column}": value for column, value in place.items() if value})
+        else:
+            self._term_parameters(params, "location", self.location)
+        
+        # Skills filter: one expanding parameter, whatever the number of skills and spellings
+        skill_keys = set().union(*(skill_spellings(skill) for skill in self.skills))
+        if skill_keys:
+            params['skill_keys'] = sorted(skill_keys)
         
         # Work experience filters
-        if company or position:
-            query = query.join(WorkExperience)
-            
-            if company:
-                query = query.filter(WorkExperience.company.ilike(f"%{company}%"))
-                
-            if position:
-                query = query.filter(WorkExperience.position.ilike(f"%{position}%"))
-                
-            query = query.distinct()
-        
-        # Education filter
-        if education:
-            query = query.join(Education).filter(
-                or_(
-                    Education.degree.ilike(f"%{education}%"),
-                    Education.institution.ilike(f"%{education}%")
-                )
-            ).distinct()        # Calculate pagination
-        offset = (page - 1) * limit
+        self._term_parameters(params, "company", self.company)
+        self._term_parameters(params, "position", self.position)
+        if self.worked_after is not None:
+            # End months are stored as their first day
+            params['worked_after'] = date(self.worked_after.year, self.worked_after.month, 1)
+        if self.min_tenure_months:
+            # Tenure of an ongoing job was computed at save time; its start date keeps it current
+            today = date.today()
+            params['min_tenure_months'] = self.min_tenure_months
+            params['tenure_started_by'] = add_months(date(today.year, today.month, 1), -(self.min_tenure_months - 1))
+        if self.worked_after is not None or self.min_tenure_months:
+            # Company and position then apply to the job matching the dates
+            if self.company:
+                params['job_company'] = f"%{self.company}%"
+            if self.position:
+                params['job_position'] = f"%{self.position}%"
+        elif self.company and self.position:
+            params['same_job_company'] = f"%{self.company}%"
+            params['same_job_position'] = f"%{self.position}%"
         
-        # Get total count for pagination info - create a separate count query
-        count_query = db.query(func.count(Candidate.candidate_id))
+        # Education filter (degree or institution)
+        self._term_parameters(params, "education", self.education)
+        
+        return params
+    
+    @staticmethod
+    def _term_parameters(params, field, text):
+        """Add the prefix range of every word of text in the field"""
+        for index, term in enumerate(tokenize(text) if text else []):
+            params[f"{field}_term_{index}"] = term
+            params[f"{field}_term_{index}_upper"] = prefix_upper_bound(term)
+    
+    @staticmethod
+    def shape(params):
+        """Key of the statement structure for parameters(); filters of one shape share statements"""
+        return tuple(sorted(params))
+    
+    def criteria(self, params=None):
+        """
+        Build the WHERE criteria for the candidates table. Every value is a named bind
+        parameter (see parameters), so statements built from them can be executed again
+        with the parameters of another filter of the same shape.
+        """
+        params = self.parameters() if params is None else params
+        
+        def value(name, column, expanding=False):
+            return bindparam(name, params[name], type_=column.type, expanding=expanding)
+        
+        def term_match(field):
+            # Every word of the filter must prefix-match a word of the field
+            user_id = value('user_id', CandidateSearchTerm.user_id) if 'user_id' in params else None
+            matches = []
+            while f"{field}_term_{len(matches)}" in params:
+                name = f"{field}_term_{len(matches)}"
+                matches.append(Candidate.candidate_id.in_(search_term_query(
+                    field, value(name, CandidateSearchTerm.term), user_id,
+                    upper=value(f"{name}_upper", CandidateSearchTerm.term)
+                )))
+            return matches
+        
+        criteria = []
+        
+        # Basic filters
+        if 'user_id' in params:
+            criteria.append(Candidate.user_id == value('user_id', Candidate.user_id))
+        if 'status' in params:
+            criteria.append(Candidate.status == value('status', Candidate.status))
         
-        # Apply the same filters to count query
-        if status:
-            count_query = count_query.filter(Candidate.status == status)
-            
-        if user_id:
-            count_query = count_query.filter(Candidate.user_id == user_id)
-            
         # Experience filters
-        if min_experience is not None:
-            count_query = count_query.filter(Candidate.years_experience >= min_experience)
-            
-        if max_experience is not None:
-            count_query = count_query.filter(Candidate.years_experience <= max_experience)
-            
+        if 'min_experience' in params:
+            criteria.append(Candidate.years_experience >= value('min_experience', Candidate.years_experience))
+        if 'max_experience' in params:
+            criteria.append(Candidate.years_experience <= value('max_experience', Candidate.years_experience))
+        
         # Location filter
-        if location:
-            count_query = count_query.filter(Candidate.location.ilike(f"%{location}%"))
+        for column in ('city', 'region', 'country'):
+            if f"location_{column}" in params:
+                criteria.append(getattr(Candidate, column) == value(f"location_{column}", getattr(Candidate, column)))
+        criteria.extend(term_match("location"))
         
-        # Skills filter
-        if skills and len(skills) > 0:
-            count_query = count_query.join(Skill).filter(
-                or_(*[Skill.skill_name.ilike(f"%{skill.strip()}%") for skill in skills])
-            ).distinct()
+        # Skills filter: at least one of the catalog skills, whatever spelling the resume used
+        if 'skill_keys' in params:
+            criteria.append(Candidate.candidate_id.in_(
+                select(Skill.candidate_id)
+                .join(SkillAlias, SkillAlias.catalog_skill_id == Skill.catalog_skill_id)
+                .where(SkillAlias.alias.in_(value('skill_keys', SkillAlias.alias, expanding=True)))
+            ))
         
         # Work experience filters
-        if company or position:
-            count_query = count_query.join(WorkExperience)
-            
-            if company:
-                count_query = count_query.filter(WorkExperience.company.ilike(f"%{company}%"))
-                
-            if position:
-                count_query = count_query.filter(WorkExperience.position.ilike(f"%{position}%"))
-                
-            count_query = count_query.distinct()
-        
-        # Education filter
-        if education:
-            count_query = count_query.join(Education).filter(
-                or_(
-                    Education.degree.ilike(f"%{education}%"),
-                    Education.institution.ilike(f"%{education}%")
+        criteria.extend(term_match("company"))
+        criteria.extend(term_match("position"))
+        conditions = []
+        if 'worked_after' in params:
+            conditions.append(or_(
+                WorkExperience.is_current == True,
+                WorkExperience.end_on >= value('worked_after', WorkExperience.end_on)
+            ))
+        if 'min_tenure_months' in params:
+            conditions.append(or_(
+                WorkExperience.tenure_months >= value('min_tenure_months', WorkExperience.tenure_months),
+                and_(
+                    WorkExperience.is_current == True,
+                    WorkExperience.start_on <= value('tenure_started_by', WorkExperience.start_on)
                 )
-            ).distinct()
+            ))
+        if conditions:
+            # Criterion on the dates of one job, and its company and position
+            if 'job_company' in params:
+                conditions.append(WorkExperience.company.ilike(value('job_company', WorkExperience.company)))
+            if 'job_position' in params:
+                conditions.append(WorkExperience.position.ilike(value('job_position', WorkExperience.position)))
+            criteria.append(Candidate.candidate_id.in_(select(WorkExperience.candidate_id).where(*conditions)))
+        elif 'same_job_company' in params:
+            # Company and position must match the same job; only runs on candidates found above
+            criteria.append(Candidate.work_experiences.any(and_(
+                WorkExperience.company.ilike(value('same_job_company', WorkExperience.company)),
+                WorkExperience.position.ilike(value('same_job_position', WorkExperience.position))
+            )))
         
-        # Get the total count
-        total_count = count_query.scalar()
+        # Education filter (degree or institution)
+        criteria.extend(term_match("education"))
         
-        # Apply pagination to main query
-        candidates = query.offset(offset).limit(limit).all()
-        
-        # Load relationships explicitly to avoid lazy loading issues
-        for candidate in candidates:
-            _ = candidate.skills
-            _ = candidate.education
-            _ = candidate.work_experiences
-            
-        # Calculate pagination metadata
-        total_pages = (total_count + limit - 1) // limit  # Ceiling division
-        has_next = page < total_pages
-        has_prev = page > 1
-        
-        return {
-            'candidates': candidates,
-            'pagination': {
-                'page': page,
-                'limit': limit,
-                'total_count': total_count,
-                'total_pages': total_pages,
-                'has_next': has_next,
-                'has_prev': has_prev
-            }
-        }
-    except Exception as e:
-        logger.error(f"Error fetching candidates: {str(e)}")
-        raise  # Re-raise the exception to see what's going wrong
-    finally:
-        db.close()
+        return criteria
+    
+    def signature(self):
+        """Stable key identifying this combination of filters (user excluded)"""
+        return json.dumps([
+            self.status.value if self.status else None,
+            self.min_experience,
+            self.max_experience,
+            sorted(skill.lower() for skill in self.skills),
+            self.location,
+            self.company,
+            self.position,
+            self.education,
+            self.worked_after.isoformat() if self.worked_after else None,
+            self.min_tenure_months
+        ])
+    
+    def without(self, *fields):
+        """Copy of this filter with the given filters cleared (e.g. 'skills', 'location')"""
+        other = copy.copy(self)
+        for field in fields:
+            setattr(other, field, [] if field == 'skills' else None)
+        return other
+    
+    def page_query(self, db):
+        """Query for matching candidates"""
+        return db.query(Candidate).filter(*self.criteria())
+    
+    def count_query(self, db):
+        """Query counting matching candidates"""
+        return db.query(func.count(Candidate.candidate_id)).filter(*self.criteria())
 
-def shortlist_candidate(candidate_id):
+# Cached listing counts: (user_id, filter signature) -> (count, expires_at, generation)
+_count_cache = {}
+# Cached facet counts: (user_id, filter signature, limit) -> (facets, expires_at, generation)
+_facet_cache = {}
+# Bumped when a user's candidates change ('None' covers every user)
+_count_generations = {}
+_count_lock = threading.Lock()
+# Listing statements: (kind, filter shape) -> statement (see _listing_statement)
+_listing_statements = {}
+_listing_statements_lock = threading.Lock()
+
+def _count_generation(user_id):
+    return (_count_generations.get(user_id, 0), _count_generations.get(None, 0))
+
+def invalidate_candidate_counts(user_id=None):
     """
-    Mark a candidate as shortlisted
+    Drop cached listing counts after candidates change, and keep the user's reads on the
+    primary until the replicas have the change
     
     Args:
-        candidate_id (int): The ID of the candidate to shortlist
-        
+        user_id (int, optional): User whose candidates changed; None invalidates every user
+    """
+    with _count_lock:
+        _count_generations[user_id] = _count_generations.get(user_id, 0) + 1
+    replicas.record_write(user_id)
+
+def _generation_cached(cache, user_id, key, compute):
+    """
+    Value of compute(), served from cache while no write has touched the user's candidates
+    
+    Args:
+        cache (dict): key -> (value, expires_at, generation)
+        user_id (int): User whose candidates the value is computed from
+        key: Cache key, including user_id
+        compute: Function computing the value on a miss
+    """
+    now = time.monotonic()
+    with _count_lock:
+        generation = _count_generation(user_id)
+        entry = cache.get(key)
+        if entry and entry[1] > now and entry[2] == generation:
+            return entry[0]
+    
+    value = compute()
+    
+    with _count_lock:
+        if len(cache) >= CANDIDATE_COUNT_CACHE_SIZE:
+            for stale_key in [k for k, v in cache.items() if v[1] <= now or v[2] != _count_generation(k[0])]:
+                del cache[stale_key]
+            if len(cache) >= CANDIDATE_COUNT_CACHE_SIZE:
+                cache.clear()
+        # Stored with the generation read before computing, so a write meanwhile invalidates it
+        cache[key] = (value, now + CANDIDATE_COUNT_CACHE_TTL, generation)
+    return value
+
+def _listing_statement(candidate_filter, params, kind):
+    """
+    Page or count statement of a filter's shape, built on first use and then executed with
+    the parameters of every filter of that shape. A reused statement keeps its memoized
+    cache key, so a listing neither rebuilds the query nor compiles it again (the compiled
+    form stays in the engine's compiled cache).
+    
+    Args:
+        candidate_filter (CandidateFilter): Filter to build the statement from on a miss
+        params (dict): candidate_filter.parameters()
+        kind (str): 'count', 'offset' (page by number, binds offset and limit) or
+                    'after' (page after a cursor, binds after_created_at, after_candidate_id and limit)
+    """
+    key = (kind, CandidateFilter.shape(params))
+    statement = _listing_statements.get(key)
+    if statement is not None:
+        return statement
+    
+    criteria = candidate_filter.criteria(params)
+    if kind == 'count':
+        statement = select(func.count(Candidate.candidate_id)).where(*criteria)
+    else:
+        # Each candidate's document comes precomputed from candidate_summaries, in the page query itself
+        statement = select(Candidate.candidate_id, Candidate.created_at, CandidateSummary.document).outerjoin(
+            CandidateSummary, CandidateSummary.candidate_id == Candidate.candidate_id
+        ).where(*criteria).order_by(Candidate.created_at, Candidate.candidate_id).limit(bindparam('limit', type_=Integer))
+        if kind == 'after':
+            statement = statement.where(tuple_(Candidate.created_at, Candidate.candidate_id) > tuple_(
+                bindparam('after_created_at', type_=Candidate.created_at.type),
+                bindparam('after_candidate_id', type_=Integer)
+            ))
+        else:
+            statement = statement.offset(bindparam('offset', type_=Integer))
+    
+    with _listing_statements_lock:
+        if len(_listing_statements) >= LISTING_STATEMENT_CACHE_SIZE:
+            _listing_statements.clear()
+        _listing_statements[key] = statement
+    return statement
+
+def _exact_count(db, candidate_filter):
+    params = candidate_filter.parameters()
+    return db.execute(_listing_statement(candidate_filter, params, 'count'), params).scalar()
+
+def _cached_count(db, candidate_filter):
+    """Exact count, served from the cache while no write has touched the user's candidates"""
+    key = (candidate_filter.user_id, candidate_filter.signature())
+    return _generation_cached(_count_cache, candidate_filter.user_id, key, lambda: _exact_count(db, candidate_filter))
+
+def _estimated_count(db, candidate_filter):
+    """
+    Row estimate for the filtered candidates from the optimizer's index statistics
+    
     Returns:
-        bool: True if successful, False otherwise
+        int: Estimated count, or None if no estimate is available
+    """
+    if db.get_bind().dialect.name != 'mysql':
+        return None
+    
+    statement = candidate_filter.page_query(db).statement
+    sql = statement.compile(dialect=db.get_bind().dialect, compile_kwargs={"literal_binds": True})
+    for row in db.connection().exec_driver_sql(f"EXPLAIN {sql}").mappings():
+        if row['table'] == Candidate.__tablename__ and row['rows'] is not None:
+            return int(row['rows'] * float(row.get('filtered') or 100) / 100)
+    return None
+
+def count_candidates(db, candidate_filter, strategy=CountStrategy.EXACT):
+    """
+    Count candidates matching a filter
+    
+    Args:
+        db: Open session
+        candidate_filter (CandidateFilter): Filters to count
+        strategy (CountStrategy): exact, cached or estimate
+    
+    Returns:
+        tuple: (count, is_estimate)
+    """
+    strategy = CountStrategy(strategy)
+    
+    if strategy == CountStrategy.CACHED:
+        return _cached_count(db, candidate_filter), False
+    
+    if strategy == CountStrategy.ESTIMATE:
+        estimate = _estimated_count(db, candidate_filter)
+        # Small results are cheap to count and estimates are least accurate there
+        if estimate is not None and estimate >= CANDIDATE_COUNT_EXACT_BELOW:
+            return estimate, True
+    
+    return _exact_count(db, candidate_filter), False
+
+@event.listens_for(CandidateSession, "after_flush")
+def _collect_candidate_writes(session, flush_context):
+    """Remember which users' candidates this transaction changed"""
+    changed = session.info.setdefault('candidate_count_users', set())
+    for obj in list(session.new) + list(session.dirty) + list(session.deleted):
+        if isinstance(obj, Candidate):
+            changed.add(obj.user_id)
+        elif isinstance(obj, (Education, Skill, WorkExperience)):
+            # Avoid lazy-loading inside the flush; an unknown owner invalidates every user
+            candidate = obj.__dict__.get('candidate')
+            changed.add(candidate.user_id if candidate is not None else None)
+
+@event.listens_for(CandidateSession, "after_bulk_update")
+@event.listens_for(CandidateSession, "after_bulk_delete")
+def _collect_bulk_candidate_writes(update_context):
+    """Bulk query.update()/delete() calls don't say which users they touched"""
+    if update_context.mapper.class_ in (Candidate, Education, Skill, WorkExperience):
+        update_context.session.info.setdefault('candidate_count_users', set()).add(None)
+
+@event.listens_for(CandidateSession, "before_commit")
+def _record_write_marks(session):
+    """Bump replica write marks inside the transaction that changed the candidates"""
+    if not replicas.engines:
+        return
+    # Pending changes are flushed after this hook; flush now so their users are collected
+    session.flush()
+    changed = session.info.get('candidate_count_users')
+    if changed:
+        replicas.mark_writes(session.connection(), changed)
+
+@event.listens_for(CandidateSession, "after_commit")
+def _invalidate_committed_counts(session):
+    for user_id in session.info.pop('candidate_count_users', ()):
+        invalidate_candidate_counts(user_id)
+
+@event.listens_for(CandidateSession, "after_rollback")
+def _discard_candidate_writes(session):
+    session.info.pop('candidate_count_users', None)
+
+def encode_candidate_cursor(candidate):
+    """Opaque cursor pointing just after a candidate in listing order"""
+    position = {'created_at': candidate.created_at.isoformat(), 'candidate_id': candidate.candidate_id}
+    return base64.urlsafe_b64encode(json.dumps(position).encode()).decode().rstrip("=")
+
+def decode_candidate_cursor(cursor):
+    """
+    Decode a cursor from encode_candidate_cursor
+    
+    Returns:
+        tuple: (created_at, candidate_id) of the last candidate already returned
+    
+    Raises:
+        ValueError: If the cursor is malformed
     """
-    db = SessionLocal()
     try:
-        candidate = db.query(Candidate).filter(Candidate.candidate_id == candidate_id).first()
-        if candidate:
-            candidate.status = Status.SHORTLISTED
-            candidate.updated_at = datetime.utcnow()
-            db.commit()
-            return True
-        return False
-    except Exception as e:
-        db.rollback()
-        logger.error(f"Error shortlisting candidate: {e}")
-        return False
-    finally:
-        db.close()
+        position = json.loads(base64.urlsafe_b64decode(cursor + "=" * (-len(cursor) % 4)))
+        return datetime.fromisoformat(position['created_at']), int(position['candidate_id'])
+    except Exception:
+        raise ValueError("Invalid cursor")
 
-def calculate_file_hash(file_path):
+def list_candidates(db, page=1, limit=5, status=None, user_id=None, min_experience=None, max_experience=None,
+                        skills=None, location=None, company=None, position=None, education=None, cursor=None,
+                        count_strategy=None, worked_after=None, min_tenure_months=None):
+    """get_all_candidates using an open session (sync, or the sync side of an AsyncSession)"""
+    after = decode_candidate_cursor(cursor) if cursor else None
+    
+    candidate_filter = CandidateFilter(
+        user_id=user_id,
+        status=status,
+        min_experience=min_experience,
+        max_experience=max_experience,
+        skills=skills,
+        location=location,
+        company=company,
+        position=position,
+        education=education,
+        worked_after=worked_after,
+        min_tenure_months=min_tenure_months
+    )
+    
+    # Calculate pagination
+    offset = (page - 1) * limit
+
+    # Get the total count
+    total_count, is_estimate = count_candidates(db, candidate_filter, count_strategy or CANDIDATE_COUNT_STRATEGY)
+
+    # One extra row tells whether another page follows
+    params = candidate_filter.parameters()
+    params['limit'] = limit + 1
+    if after:
+        params['after_created_at'], params['after_candidate_id'] = after
+        statement = _listing_statement(candidate_filter, params, 'after')
+    else:
+        params['offset'] = offset if cursor is None else 0
+        statement = _listing_statement(candidate_filter, params, 'offset')
+    rows = db.execute(statement, params).all()
+    more = len(rows) > limit
+    rows = rows[:limit]
+
+    built = get_candidate_summaries(db, [row.candidate_id for row in rows if row.document is None])
+    candidates = [json.loads(row.document) if row.document is not None else built[row.candidate_id] for row in rows]
+
+    # Calculate pagination metadata; has_next comes from the extra row, not the (possibly estimated) count
+    total_pages = (total_count + limit - 1) // limit  # Ceiling division
+    has_next = more
+    has_prev = after is not None if cursor is not None else page > 1
+
+    return {
+        'candidates': candidates,
+        'pagination': {
+            'page': page if cursor is None else None,
+            'limit': limit,
+            'total_count': total_count,
+            'total_pages': total_pages,
+            'is_estimate': is_estimate,
+            'has_next': has_next,
+            'has_prev': has_prev,
+            'next_cursor': encode_candidate_cursor(rows[-1]) if more else None
+        }
+    }
+
+def get_all_candidates(page=1, limit=5, status=None, user_id=None, min_experience=None, max_experience=None, 
+                      skills=None, location=None, company=None, position=None, education=None, cursor=None,
+                      count_strategy=None, worked_after=None, min_tenure_months=None):
     """
-    Calculate SHA256 hash of a file
+    Get all candidates with comprehensive filtering options, ordered by (created_at, candidate_id).
+    Pages are addressed either by number (page) or, when cursor is given, by keyset: the
+    rows after the cursor are read straight from the (user_id, created_at, candidate_id)
+    index, so every page costs the same however deep it is.
     
     Args:
-        file_path (str): Path to the file
+        page (int): Page number (1-based), ignored when cursor is given
+        limit (int): Maximum number of candidates to return
+        status (Status, optional): Filter by candidate status
+        user_id (int, optional): Filter by user ID (for user-specific data)
+        min_experience (int, optional): Minimum years of experience
+        max_experience (int, optional): Maximum years of experience
+        skills (list, optional): List of skills to filter by
+        location (str, optional): Location to filter by (city, region or country; word prefix match for places not in the gazetteer)
+        company (str, optional): Company name to filter by (word prefix match)
+        position (str, optional): Position/title to filter by (word prefix match)
+        education (str, optional): Education/degree to filter by (word prefix match)
+        cursor (str, optional): next_cursor from the previous page ("" for the first page)
+        count_strategy (CountStrategy, optional): How total_count is computed (default: CANDIDATE_COUNT_STRATEGY).
+                                                  pagination['is_estimate'] is set for estimated counts.
+        worked_after (date, optional): Only candidates with a job that ran on or after this date
+        min_tenure_months (int, optional): Only candidates who spent at least this many months in one job
         
     Returns:
-        str: SHA256 hash of the file
+        dict: 'candidates' (candidate documents, see candidate_summary.py) and 'pagination'
+    
+    Raises:
+        ValueError: If the cursor is malformed
     """
-    sha256_hash = hashlib.sha256()
+    db = read_session(user_id)
     try:
-        with open(file_path, "rb") as f:
-            # Read file in chunks to handle large files
-            for chunk in iter(lambda: f.read(4096), b""):
-                sha256_hash.update(chunk)
-        return sha256_hash.hexdigest()
+        return list_candidates(db, page, limit, status, user_id, min_experience, max_experience,
+                               skills, location, company, position, education, cursor, count_strategy,
+                               worked_after, min_tenure_months)
+    except ValueError:
+        raise
     except Exception as e:
-        logger.error(f"Error calculating file hash: {e}")
-        return None
+        logger.error(f"Error fetching candidates: {str(e)}")
+        raise  # Re-raise the exception to see what's going wrong
+    finally:
+        db.close()
 
-def check_duplicate_file(file_hash, user_id=None):
+def search_candidates(user_id, query, limit=20):
     """
-    Check if a file with the given hash already exists in the database for the specific user
+    Rank a user's candidates against free text using the search index.
+    Each word of the query is prefix-matched against every indexed field; candidates
+    matching more query words rank first, then those matching in heavier fields
+    (SEARCH_FIELD_WEIGHTS: a skill outweighs a location).
     
     Args:
-        file_hash (str): SHA256 hash of the file
-        user_id (int, optional): ID of the user to check duplicates for
-        
+        user_id (int): Owner of the candidates
+        query (str): Free text, e.g. "python berlin senior"
+        limit (int): Maximum number of candidates to return
+    
     Returns:
-        dict: Information about existing candidate if duplicate, None otherwise
+        list: Dicts with 'candidate' (the candidate document), 'matched_terms' and 'score',
+              best match first
     """
-    if not file_hash:
-        return None
-        
-    db = SessionLocal()
+    terms = tokenize(query)
+    if not terms:
+        return []
+    
+    db = read_session(user_id)
     try:
-        # Build query with user_id filter if provided
-        query = db.query(Candidate).filter(Candidate.file_hash == file_hash)
+        # One row per (candidate, field, query word), however many indexed words the prefix hits
+        matches = union_all(*[
+            select(CandidateSearchTerm.candidate_id, CandidateSearchTerm.field, literal(word).label('word')).where(
+                CandidateSearchTerm.user_id == user_id,
+                CandidateSearchTerm.term >= term,
+                CandidateSearchTerm.term < prefix_upper_bound(term)
+            )
+            for word, term in enumerate(terms)
+        ]).subquery()
+        hits = select(matches.c.candidate_id, matches.c.field, matches.c.word).distinct().subquery()
         
-        if user_id is not None:
-            query = query.filter(Candidate.user_id == user_id)
+        matched_terms = func.count(func.distinct(hits.c.word)).label('matched_terms')
+        score = func.sum(case(SEARCH_FIELD_WEIGHTS, value=hits.c.field, else_=0)).label('score')
+        ranked = db.execute(
+            select(hits.c.candidate_id, matched_terms, score)
+            .group_by(hits.c.candidate_id)
+            .order_by(matched_terms.desc(), score.desc(), hits.c.candidate_id)
+            .limit(limit)
+        ).all()
+        if not ranked:
+            return []
         
-        existing_candidate = query.first()
+        by_id = get_candidate_summaries(db, [row.candidate_id for row in ranked])
         
-        if existing_candidate:
-            return {
-                "candidate_id": existing_candidate.candidate_id,
-                "candidate_name": existing_candidate.full_name,
-                "upload_date": existing_candidate.created_at.isoformat(),
-                "original_filename": existing_candidate.original_filename,
-                "user_id": existing_candidate.user_id
-            }
-        return None
+        return [
+            {'candidate': by_id[row.candidate_id], 'matched_terms': row.matched_terms, 'score': int(row.score)}
+            for row in ranked if row.candidate_id in by_id
+        ]
     except Exception as e:
-        logger.error(f"Error checking duplicate file: {e}")
-        return None
+        logger.error(f"Error searching candidates: {str(e)}")
+        raise
     finally:
         db.close()
 
-def generate_batch_id():
+def rebuild_search_terms(user_id=None, batch_size=500):
     """
-    Generate a unique batch ID for batch uploads
+    Re-index stored candidates, e.g. after creating the candidate_search_terms table.
+    Runs one transaction per batch of candidates, so it can be interrupted and re-run.
+    
+    Args:
+        user_id (int, optional): Only re-index this user's candidates
+        batch_size (int): Candidates per transaction
     
     Returns:
-        str: UUID string for batch identification
+        int: Number of candidates indexed
     """
-    return str(uuid.uuid4())
+    indexed = 0
+    last_id = 0
+    while True:
+        db = SessionLocal()
+        try:
+            query = db.query(Candidate).options(
+                selectinload(Candidate.skills),
+                selectinload(Candidate.education),
+                selectinload(Candidate.work_experiences)
+            ).filter(Candidate.candidate_id > last_id)
+            if user_id:
+                query = query.filter(Candidate.user_id == user_id)
+            candidates = query.order_by(Candidate.candidate_id).limit(batch_size).all()
+            if not candidates:
+                return indexed
+            
+            by_user = {}
+            for candidate in candidates:
+                children = {
+                    Education: [{'degree': edu.degree, 'institution': edu.institution} for edu in candidate.education],
+                    Skill: [{'skill_name': skill.skill_name} for skill in candidate.skills],
+                    WorkExperience: [{'company': exp.company, 'position': exp.position} for exp in candidate.work_experiences]
+                }
+                by_user.setdefault(candidate.user_id, {})[candidate.candidate_id] = (candidate.location, children)
+            for owner_id, indexed_by_candidate in by_user.items():
+                _sync_search_terms(db, owner_id, indexed_by_candidate)
+            
+            db.commit()
+            indexed += len(candidates)
+            last_id = candidates[-1].candidate_id
+            logger.info(f"Indexed {indexed} candidates (up to ID {last_id})")
+        except Exception as e:
+            db.rollback()
+            logger.error(f"Error rebuilding search terms after candidate {last_id}: {e}")
+            raise
+        finally:
+            db.close()
 
-def save_candidate_data_with_hash(parsed_data, resume_file_path=None, resume_s3_url=None, 
-                                 original_filename=None, file_hash=None, batch_id=None, user_id=None):
+def rebuild_candidate_summaries(user_id=None, batch_size=500):
     """
-    Save parsed resume data to database with file hash and batch ID
+    Rewrite the summaries of stored candidates, e.g. after creating the candidate_summaries table.
+    Runs one transaction per batch of candidates, so it can be interrupted and re-run.
     
     Args:
-        parsed_data (dict): The parsed resume data
-        resume_file_path (str, optional): Path or key to the resume in S3
-        resume_s3_url (str, optional): Full S3 URL to the resume
-        original_filename (str, optional): Original filename of the uploaded resume
-        file_hash (str, optional): SHA256 hash of the file
-        batch_id (str, optional): Batch ID for batch uploads
-        user_id (int, optional): ID of the user uploading the resume
+        user_id (int, optional): Only rebuild this user's candidates
+        batch_size (int): Candidates per transaction
     
     Returns:
-        int: The ID of the inserted candidate
+        int: Number of summaries written
     """
-    db = SessionLocal()
-    
-    try:
-        # Check for existing file hash (exact same file)
-        if file_hash:
-            existing_by_hash = db.query(Candidate).filter(
-                Candidate.file_hash == file_hash,
-                Candidate.user_id == user_id
-            ).first()
-            
-            if existing_by_hash:
-                logger.info(f"File with hash {file_hash} already exists (Candidate ID: {existing_by_hash.candidate_id}). Updating candidate information.")
-                
-                # Update existing candidate with new information if provided
-                if 'full_name' in parsed_data:
-                    existing_by_hash.full_name = parsed_data.get('full_name')
-                if 'email' in parsed_data and parsed_data.get('email'):
-                    existing_by_hash.email = parsed_data.get('email')
-                if 'phone' in parsed_data and parsed_data.get('phone'):
-                    existing_by_hash.phone = parsed_data.get('phone')
-                if 'location' in parsed_data and parsed_data.get('location'):
-                    existing_by_hash.location = parsed_data.get('location')
-                if 'years_experience' in parsed_data:
-                    existing_by_hash.years_experience = parsed_data.get('years_experience', 0)
-                
-                # Update metadata
-                existing_by_hash.batch_id = batch_id or existing_by_hash.batch_id
-                existing_by_hash.updated_at = datetime.utcnow()
-                
-                db.commit()
-                return existing_by_hash.candidate_id
-
-        # Check for existing email if one is provided
-        email = parsed_data.get('email')
-        if email:
-            existing_by_email = db.query(Candidate).filter(
-                Candidate.email == email,
-                Candidate.user_id == user_id
-            ).first()
+    rebuilt = 0
+    last_id = 0
+    while True:
+        db = SessionLocal()
+        try:
+            query = db.query(Candidate.candidate_id).filter(Candidate.candidate_id > last_id)
+            if user_id:
+                query = query.filter(Candidate.user_id == user_id)
+            candidate_ids = [row.candidate_id for row in query.order_by(Candidate.candidate_id).limit(batch_size).all()]
+            if not candidate_ids:
+                return rebuilt
             
-            if existing_by_email:
-                logger.info(f"Candidate with email {email} already exists (ID: {existing_by_email.candidate_id}). Updating with new information.")
-                
-                # Update existing candidate with new information
-                existing_by_email.full_name = parsed_data.get('full_name', existing_by_email.full_name)
-                existing_by_email.phone = parsed_data.get('phone', existing_by_email.phone)
-                existing_by_email.location = parsed_data.get('location', existing_by_email.location)
-                existing_by_email.years_experience = parsed_data.get('years_experience', existing_by_email.years_experience)
-                
-                # Only update resume file info if provided
-                if resume_file_path and resume_s3_url and file_hash:
-                    existing_by_email.resume_file_path = resume_file_path
-                    existing_by_email.resume_s3_url = resume_s3_url
-                    existing_by_email.original_filename = original_filename
-                    existing_by_email.file_hash = file_hash
-                    existing_by_email.batch_id = batch_id
-                
-                existing_by_email.updated_at = datetime.utcnow()
-                
-                # Remove existing education, skills, and work experiences
-                db.query(Education).filter(Education.candidate_id == existing_by_email.candidate_id).delete()
-                db.query(Skill).filter(Skill.candidate_id == existing_by_email.candidate_id).delete()
-                db.query(WorkExperience).filter(WorkExperience.candidate_id == existing_by_email.candidate_id).delete()
-                
-                candidate_id = existing_by_email.candidate_id
-            else:
-                # Create new candidate
-                candidate = Candidate(
-                    full_name=parsed_data.get('full_name', 'Unknown'),
-                    email=email,
-                    phone=parsed_data.get('phone'),
-                    location=parsed_data.get('location'),
-                    years_experience=parsed_data.get('years_experience', 0),
-                    resume_file_path=resume_file_path,
-                    resume_s3_url=resume_s3_url,
-                    original_filename=original_filename,
-                    file_hash=file_hash,
-                    batch_id=batch_id,
-                    user_id=user_id,
-                    status=Status.PENDING
-                )
-                
-                db.add(candidate)
-                db.flush()  # Get the ID without committing
-                candidate_id = candidate.candidate_id
-        else:
-            # No email provided, just create a new candidate
-            candidate = Candidate(
-                full_name=parsed_data.get('full_name', 'Unknown'),
-                email=email,
-                phone=parsed_data.get('phone'),
-                location=parsed_data.get('location'),
-                years_experience=parsed_data.get('years_experience', 0),
-                resume_file_path=resume_file_path,
-                resume_s3_url=resume_s3_url,
-                original_filename=original_filename,
-                file_hash=file_hash,
-                batch_id=batch_id,
-                user_id=user_id,
-                status=Status.PENDING
-            )
-            
-            db.add(candidate)
-            db.flush()  # Get the ID without committing
-            candidate_id = candidate.candidate_id
-        
-        # Add education entries
-        for edu in parsed_data.get('education', []):
-            # Safely convert year to integer, default to None if invalid
-            graduation_year = None
-            year_str = edu.get('year', '').strip()
-            if year_str:
-                try:
-                    # Extract 4-digit year if it exists
-                    import re
-                    year_match = re.search(r'\b(19|20)\d{2}\b', year_str)
-                    if year_match:
-                        graduation_year = int(year_match.group())
-                    else:
-                        # Try to convert the whole string to int
-                        graduation_year = int(year_str)
-                except (ValueError, TypeError):
-                    graduation_year = None
+            refresh_candidate_summaries(db, candidate_ids)
+            db.commit()
+            rebuilt += len(candidate_ids)
+            last_id = candidate_ids[-1]
+            logger.info(f"Rebuilt {rebuilt} candidate summaries (up to ID {last_id})")
+        except Exception as e:
+            db.rollback()
+            logger.error(f"Error rebuilding candidate summaries after candidate {last_id}: {e}")
+            raise
+        finally:
+            db.close()
+
+def backfill_skill_catalog(batch_size=1000):
+    """
+    Link skill rows saved before the skill catalog existed to their catalog skills, deleting
+    rows that only repeat a skill the candidate already has under another spelling.
+    Runs one transaction per batch, so it can be interrupted and re-run.
+    
+    Args:
+        batch_size (int): Skill rows per transaction
+    
+    Returns:
+        int: Number of skill rows linked
+    """
+    linked = 0
+    last_id = 0
+    link = update(Skill.__table__).where(Skill.skill_id == bindparam('row_id')).values(catalog_skill_id=bindparam('catalog_id'))
+    while True:
+        db = SessionLocal()
+        try:
+            rows = db.query(Skill.skill_id, Skill.candidate_id, Skill.skill_name).filter(
+                Skill.catalog_skill_id.is_(None),
+                Skill.skill_id > last_id
+            ).order_by(Skill.skill_id).limit(batch_size).all()
+            if not rows:
+                return linked
             
-            education = Education(
-                candidate_id=candidate_id,
-                degree=edu.get('degree'),
-                institution=edu.get('institution'),
-                graduation_year=graduation_year
-            )
-            db.add(education)
-        
-        # Add skills
-        for skill_name in parsed_data.get('skills', []):
-            skill = Skill(
-                candidate_id=candidate_id,
-                skill_name=skill_name,
-                # Default values for category and proficiency
-                skill_category=SkillCategory.TECHNICAL,
-                proficiency_level=ProficiencyLevel.UNKNOWN
-            )
-            db.add(skill)
+            catalog_ids = _resolve_catalog_skills(db, [row.skill_name for row in rows])
             
-        # Add work experiences
-        for exp in parsed_data.get('work_experience', []):
-            work_exp = WorkExperience(
-                candidate_id=candidate_id,
-                company=exp.get('company'),
-                position=exp.get('position'),
-                duration=exp.get('duration'),
-                # Additional fields could be parsed if available
-                start_date=exp.get('start_date', ''),
-                end_date=exp.get('end_date', '')
-            )
-            db.add(work_exp)
+            # A candidate keeps one row per catalog skill, so spellings of a skill it already has are dropped
+            seen = set(db.query(Skill.candidate_id, Skill.catalog_skill_id).filter(
+                Skill.candidate_id.in_({row.candidate_id for row in rows}),
+                Skill.catalog_skill_id.isnot(None)
+            ).all())
+            links = []
+            duplicate_ids = []
+            for row in rows:
+                key = skill_key(row.skill_name)
+                if not key:
+                    continue
+                if (row.candidate_id, catalog_ids[key]) in seen:
+                    duplicate_ids.append(row.skill_id)
+                else:
+                    seen.add((row.candidate_id, catalog_ids[key]))
+                    links.append({'row_id': row.skill_id, 'catalog_id': catalog_ids[key]})
+            if links:
+                db.execute(link, links)
+            if duplicate_ids:
+                db.execute(delete(Skill.__table__).where(Skill.skill_id.in_(duplicate_ids)))
             
-        db.commit()
-        return candidate_id
-        
+            db.commit()
+            linked += len(links)
+            last_id = rows[-1].skill_id
+            logger.info(f"Linked {linked} skill rows to the catalog (up to ID {last_id})")
+        except Exception as e:
+            db.rollback()
+            logger.error(f"Error backfilling the skill catalog after skill {last_id}: {e}")
+            raise
+        finally:
+            db.close()
+
+def backfill_experience_dates(only_missing=True, batch_size=1000):
+    """
+    Fill the structured date columns of work experience saved before they existed
+    (see experience_dates.py). Runs one transaction per batch, so it can be interrupted and re-run.
+
+    Args:
+        only_missing (bool): Only rows never normalised (is_current is NULL); False redoes every
+                             row, e.g. after improving the date parser
+        batch_size (int): Work experience rows per transaction
+
+    Returns:
+        int: Number of rows updated
+    """
+    updated = 0
+    last_id = 0
+    table = WorkExperience.__table__
+    normalise = update(table).where(table.c.experience_id == bindparam('row_id')).values(
+        start_on=bindparam('start_on'),
+        end_on=bindparam('end_on'),
+        is_current=bindparam('is_current'),
+        tenure_months=bindparam('tenure_months')
+    )
+    while True:
+        db = SessionLocal()
+        try:
+            query = db.query(
+                WorkExperience.experience_id, WorkExperience.start_date, WorkExperience.end_date, WorkExperience.duration
+            ).filter(WorkExperience.experience_id > last_id)
+            if only_missing:
+                query = query.filter(WorkExperience.is_current.is_(None))
+            rows = query.order_by(WorkExperience.experience_id).limit(batch_size).all()
+            if not rows:
+                return updated
+
+            db.execute(normalise, [
+                dict(normalize_experience(row.start_date, row.end_date, row.duration), row_id=row.experience_id)
+                for row in rows
+            ])
+            db.commit()
+            updated += len(rows)
+            last_id = rows[-1].experience_id
+            logger.info(f"Normalised {updated} work experience rows (up to ID {last_id})")
+        except Exception as e:
+            db.rollback()
+            logger.error(f"Error backfilling experience dates after row {last_id}: {e}")
+            raise
+        finally:
+            db.close()
+
+def backfill_candidate_locations(only_missing=True, batch_size=1000):
+    """
+    Fill the normalised city, region and country of candidates saved before they existed
+    (see location_gazetteer.py). Runs one transaction per batch, so it can be interrupted and re-run.
+
+    Args:
+        only_missing (bool): Only candidates with a location but no country; False redoes every
+                             candidate, e.g. after extending the gazetteer
+        batch_size (int): Candidates per transaction
+
+    Returns:
+        int: Number of candidates updated
+    """
+    updated = 0
+    last_id = 0
+    table = Candidate.__table__
+    normalise = update(table).where(table.c.candidate_id == bindparam('row_id')).values(
+        city=bindparam('city'),
+        region=bindparam('region'),
+        country=bindparam('country')
+    )
+    while True:
+        db = SessionLocal()
+        try:
+            query = db.query(Candidate.candidate_id, Candidate.location).filter(Candidate.candidate_id > last_id)
+            if only_missing:
+                query = query.filter(Candidate.location.isnot(None), Candidate.country.is_(None))
+            rows = query.order_by(Candidate.candidate_id).limit(batch_size).all()
+            if not rows:
+                return updated
+
+            db.execute(normalise, [dict(parse_location(row.location), row_id=row.candidate_id) for row in rows])
+            db.commit()
+            updated += len(rows)
+            last_id = rows[-1].candidate_id
+            logger.info(f"Normalised the location of {updated} candidates (up to ID {last_id})")
+        except Exception as e:
+            db.rollback()
+            logger.error(f"Error backfilling candidate locations after candidate {last_id}: {e}")
+            raise
+        finally:
+            db.close()
+
+def archive_criteria(rejected_after_days=ARCHIVE_REJECTED_AFTER_DAYS, stale_after_days=ARCHIVE_STALE_AFTER_DAYS, now=None):
+    """
+    WHERE criterion selecting the candidates due for archival, or None if both rules are off
+
+    Args:
+        rejected_after_days (int): Archive rejected candidates not updated for this many days (0: never)
+        stale_after_days (int): Archive pending candidates not updated for this many days (0: never)
+        now (datetime, optional): Reference time (default: now, UTC)
+    """
+    now = now or datetime.utcnow()
+    last_update = func.coalesce(Candidate.updated_at, Candidate.created_at)
+    rules = []
+    if rejected_after_days > 0:
+        rules.append(and_(Candidate.status == Status.REJECTED, last_update < now - timedelta(days=rejected_after_days)))
+    if stale_after_days > 0:
+        rules.append(and_(Candidate.status == Status.PENDING, last_update < now - timedelta(days=stale_after_days)))
+    return or_(*rules) if rules else None
+
+def _move_candidates(db, candidate_ids, source_tables, target_tables, extra=None):
+    """Copy the candidate rows and child rows of candidate_ids from one table set to the other, then delete them"""
+    for model in (Candidate, Education, Skill, WorkExperience):
+        source, target = source_tables[model], target_tables[model]
+        columns = [column for column in target.columns if column.name in source.columns]
+        values = [source.c[column.name] for column in columns]
+        if model is Candidate and extra:
+            columns += [target.c[name] for name in extra]
+            values += [literal(value, type_=target.c[name].type) for name, value in extra.items()]
+        db.execute(insert(target).from_select(columns, select(*values).where(source.c.candidate_id.in_(candidate_ids))))
+    for model in (Education, Skill, WorkExperience, Candidate):
+        source = source_tables[model]
+        db.execute(delete(source).where(source.c.candidate_id.in_(candidate_ids)))
+
+def archive_candidates(user_id=None, rejected_after_days=ARCHIVE_REJECTED_AFTER_DAYS,
+                       stale_after_days=ARCHIVE_STALE_AFTER_DAYS, batch_size=ARCHIVE_BATCH_SIZE, dry_run=False):
+    """
+    Move rejected and stale candidates, with their education, skills and work experience, to the
+    archive tables, so listings, filters and counts only touch the active working set. Their
+    search terms and summaries are deleted (rebuilt on restore). Shortlisted candidates are
+    never archived. Runs one transaction per batch, so it can be interrupted and re-run.
+
+    Args:
+        user_id (int, optional): Only archive this user's candidates
+        rejected_after_days (int): Archive rejected candidates not updated for this many days (0: never)
+        stale_after_days (int): Archive pending candidates not updated for this many days (0: never)
+        batch_size (int): Candidates per transaction
+        dry_run (bool): Only count the candidates due for archival
+
+    Returns:
+        int: Number of candidates archived (or due, for a dry run)
+    """
+    due = archive_criteria(rejected_after_days, stale_after_days)
+    if due is None:
+        return 0
+    if user_id:
+        due = and_(due, Candidate.user_id == user_id)
+
+    if dry_run:
+        db = SessionLocal()
+        try:
+            return db.query(func.count(Candidate.candidate_id)).filter(due).scalar()
+        finally:
+            db.close()
+
+    active_tables = {model: model.__table__ for model in ARCHIVE_TABLES}
+    archived = 0
+    last_id = 0
+    while True:
+        db = SessionLocal()
+        try:
+            rows = db.query(Candidate.candidate_id, Candidate.user_id).filter(
+                due, Candidate.candidate_id > last_id
+            ).order_by(Candidate.candidate_id).limit(batch_size).all()
+            if not rows:
+                return archived
+
+            candidate_ids = [row.candidate_id for row in rows]
+            db.execute(delete(CandidateSearchTerm.__table__).where(CandidateSearchTerm.candidate_id.in_(candidate_ids)))
+            db.execute(delete(CandidateSummary.__table__).where(CandidateSummary.candidate_id.in_(candidate_ids)))
+            _move_candidates(db, candidate_ids, active_tables, ARCHIVE_TABLES, extra={'archived_at': datetime.utcnow()})
+            db.info.setdefault('candidate_count_users', set()).update(row.user_id for row in rows)
+            db.commit()
+
+            archived += len(rows)
+            last_id = candidate_ids[-1]
+            logger.info(f"Archived {archived} candidates (up to ID {last_id})")
+        except Exception as e:
+            db.rollback()
+            logger.error(f"Error archiving candidates after candidate {last_id}: {e}")
+            raise
+        finally:
+            db.close()
+
+def restore_archived_candidates(db, candidate_ids, user_id):
+    """
+    Move a user's archived candidates back to the active tables, in the caller's transaction,
+    rebuilding their search terms and summaries. A candidate is not restored while the user
+    has an active candidate with the same email or file (uploaded again since archival).
+
+    Args:
+        db: Open session
+        candidate_ids (list): Archived candidates to restore
+        user_id (int): Owner of the candidates
+
+    Returns:
+        dict: 'restored' (candidate IDs moved back) and 'conflicts' (IDs left archived because of a duplicate)
+    """
+    archive = candidates_archive
+    rows = db.execute(
+        select(archive.c.candidate_id, archive.c.email, archive.c.file_hash)
+        .where(archive.c.user_id == user_id, archive.c.candidate_id.in_(sorted(set(candidate_ids))))
+    ).all()
+    if not rows:
+        return {'restored': [], 'conflicts': []}
+
+    emails = {row.email.lower() for row in rows if row.email}
+    hashes = {row.file_hash for row in rows if row.file_hash}
+    active = db.query(Candidate.email, Candidate.file_hash).filter(
+        Candidate.user_id == user_id,
+        or_(func.lower(Candidate.email).in_(emails), Candidate.file_hash.in_(hashes))
+    ).all() if emails or hashes else []
+    active_emails = {row.email.lower() for row in active if row.email}
+    active_hashes = {row.file_hash for row in active if row.file_hash}
+
+    restored, conflicts = [], []
+    for row in rows:
+        if (row.email and row.email.lower() in active_emails) or (row.file_hash and row.file_hash in active_hashes):
+            conflicts.append(row.candidate_id)
+        else:
+            restored.append(row.candidate_id)
+            # Two archived candidates can share an email if it was uploaded again in between
+            active_emails.update([row.email.lower()] if row.email else [])
+            active_hashes.update([row.file_hash] if row.file_hash else [])
+    if not restored:
+        return {'restored': [], 'conflicts': conflicts}
+
+    _move_candidates(db, restored, ARCHIVE_TABLES, {model: model.__table__ for model in ARCHIVE_TABLES})
+
+    candidates = db.query(Candidate).options(
+        selectinload(Candidate.skills),
+        selectinload(Candidate.education),
+        selectinload(Candidate.work_experiences)
+    ).filter(Candidate.candidate_id.in_(restored)).all()
+    _sync_search_terms(db, user_id, {
+        candidate.candidate_id: (candidate.location, {
+            Education: [{'degree': edu.degree, 'institution': edu.institution} for edu in candidate.education],
+            Skill: [{'skill_name': skill.skill_name} for skill in candidate.skills],
+            WorkExperience: [{'company': exp.company, 'position': exp.position} for exp in candidate.work_experiences]
+        })
+        for candidate in candidates
+    })
+    refresh_candidate_summaries(db, restored)
+    db.info.setdefault('candidate_count_users', set()).add(user_id)
+    return {'restored': restored, 'conflicts': conflicts}
+
+def list_archived_candidates(user_id, limit=50, after_id=None):
+    """
+    A user's archived candidates, in candidate_id order (keyset pages on the archive primary key)
+
+    Args:
+        user_id (int): Owner of the candidates
+        limit (int): Maximum number of candidates to return
+        after_id (int, optional): Last candidate_id of the previous page
+
+    Returns:
+        list: Dicts with candidate_id, full_name, email, location, status, created_at and archived_at
+    """
+    archive = candidates_archive
+    db = read_session(user_id)
+    try:
+        query = select(
+            archive.c.candidate_id, archive.c.full_name, archive.c.email, archive.c.location,
+            archive.c.status, archive.c.created_at, archive.c.archived_at
+        ).where(archive.c.user_id == user_id)
+        if after_id:
+            query = query.where(archive.c.candidate_id > after_id)
+        rows = db.execute(query.order_by(archive.c.candidate_id).limit(limit)).all()
+        return [
+            {
+                'candidate_id': row.candidate_id,
+                'full_name': row.full_name,
+                'email': row.email,
+                'location': row.location,
+                'status': row.status.value if row.status else None,
+                'created_at': row.created_at.isoformat() if row.created_at else None,
+                'archived_at': row.archived_at.isoformat()
+            }
+            for row in rows
+        ]
+    finally:
+        db.close()
+
+def get_skill_counts(user_id=None, limit=50):
+    """
+    Most common catalog skills, counted from the (catalog_skill_id, candidate_id) index
+    
+    Args:
+        user_id (int, optional): Only count this user's candidates
+        limit (int): Number of skills to return
+    
+    Returns:
+        list: Dicts with 'catalog_skill_id', 'skill_name' (canonical) and 'count' (candidates), most common first
+    """
+    db = SessionLocal()
+    try:
+        # Saves keep one row per candidate and catalog skill, so rows are candidates
+        candidates = func.count().label('candidates')
+        counts = select(Skill.catalog_skill_id, candidates).where(Skill.catalog_skill_id.isnot(None))
+        if user_id:
+            counts = counts.join(Candidate, Candidate.candidate_id == Skill.candidate_id).where(Candidate.user_id == user_id)
+        counts = counts.group_by(Skill.catalog_skill_id).order_by(candidates.desc()).limit(limit).subquery()
+        
+        rows = db.execute(
+            select(counts.c.catalog_skill_id, CatalogSkill.canonical_name, counts.c.candidates)
+            .join(CatalogSkill, CatalogSkill.catalog_skill_id == counts.c.catalog_skill_id)
+            .order_by(counts.c.candidates.desc(), CatalogSkill.canonical_name)
+        ).all()
+        return [
+            {'catalog_skill_id': row.catalog_skill_id, 'skill_name': row.canonical_name, 'count': int(row.candidates)}
+            for row in rows
+        ]
+    finally:
+        db.close()
+
+def _top_values(db, column, candidate_ids, limit):
+    """
+    Most common non-empty values of a child row column among candidate_ids, counted once per
+    candidate. Counts are for the exact stored value, not the word prefix match of its filter.
+    """
+    candidates = func.count(column.class_.candidate_id.distinct()).label('candidates')
+    rows = db.execute(
+        select(column, candidates)
+        .where(column.class_.candidate_id.in_(candidate_ids), column.isnot(None), column != '')
+        .group_by(column).order_by(candidates.desc(), column).limit(limit)
+    ).all()
+    return [{'value': row[0], 'count': int(row.candidates)} for row in rows]
+
+def candidate_facets(db, candidate_filter, limit=FACET_LIMIT):
+    """
+    get_candidate_facets using an open session; one grouped query per facet
+    (location facets share one, grouped on the normalised location index)
+    """
+    def matching(*cleared):
+        return select(Candidate.candidate_id).where(*candidate_filter.without(*cleared).criteria())
+
+    facets = {}
+
+    status_counts = dict(db.execute(
+        select(Candidate.status, func.count()).where(*candidate_filter.without('status').criteria()).group_by(Candidate.status)
+    ).all())
+    facets['status'] = [{'value': status.value, 'count': int(status_counts.get(status, 0))} for status in Status]
+
+    bucket = case(
+        *[(Candidate.years_experience <= high, label) for label, _, high in EXPERIENCE_FACET_BUCKETS if high is not None],
+        else_=EXPERIENCE_FACET_BUCKETS[-1][0]
+    ).label('bucket')
+    bucket_counts = dict(db.execute(
+        select(bucket, func.count())
+        .where(*candidate_filter.without('min_experience', 'max_experience').criteria(), Candidate.years_experience.isnot(None))
+        .group_by(bucket.name)
+    ).all())
+    facets['experience'] = [
+        {'value': label, 'min': low, 'max': high, 'count': int(bucket_counts.get(label, 0))}
+        for label, low, high in EXPERIENCE_FACET_BUCKETS
+    ]
+
+    # Saves keep one row per candidate and catalog skill, so rows are candidates
+    candidates = func.count().label('candidates')
+    skill_counts = select(Skill.catalog_skill_id, candidates).where(
+        Skill.catalog_skill_id.isnot(None), Skill.candidate_id.in_(matching('skills'))
+    ).group_by(Skill.catalog_skill_id).order_by(candidates.desc()).limit(limit).subquery()
+    facets['skills'] = [
+        {'value': row.canonical_name, 'count': int(row.candidates)}
+        for row in db.execute(
+            select(CatalogSkill.canonical_name, skill_counts.c.candidates)
+            .join(skill_counts, skill_counts.c.catalog_skill_id == CatalogSkill.catalog_skill_id)
+            .order_by(skill_counts.c.candidates.desc(), CatalogSkill.canonical_name)
+        ).all()
+    ]
+
+    # Values are location filters that select exactly the counted candidates
+    countries = {}
+    cities = {}
+    for country, city, count in db.execute(
+        select(Candidate.country, Candidate.city, func.count())
+        .where(*candidate_filter.without('location').criteria(), Candidate.country.isnot(None))
+        .group_by(Candidate.country, Candidate.region, Candidate.city)
+    ).all():
+        countries[country] = countries.get(country, 0) + count
+        if city:
+            cities[f"{city}, {country}"] = cities.get(f"{city}, {country}", 0) + count
+    for name, counts in (('country', countries), ('city', cities)):
+        top = sorted(counts.items(), key=lambda item: (-item[1], item[0]))[:limit]
+        facets[name] = [{'value': value, 'count': int(count)} for value, count in top]
+
+    facets['company'] = _top_values(db, WorkExperience.company, matching('company'), limit)
+    facets['position'] = _top_values(db, WorkExperience.position, matching('position'), limit)
+    facets['education'] = _top_values(db, Education.degree, matching('education'), limit)
+    return facets
+
+def get_candidate_facets(candidate_filter, limit=FACET_LIMIT):
+    """
+    Counts of candidates per value of each listing filter, for the filter panel ("Python (142)").
+    Each facet is counted under every other filter in candidate_filter but not its own, so
+    the other values of a facet stay visible once one is selected. Results are cached per
+    user and filter set until a write touches the user's candidates.
+
+    Args:
+        candidate_filter (CandidateFilter): Current filters, including the user
+        limit (int): Values returned per facet, most common first
+
+    Returns:
+        dict: Facet name -> list of {'value', 'count'}: status, experience (with 'min' and
+              'max'), skills, country, city, company, position and education. Values can be
+              passed back as the matching filter; for status, experience, skills and the
+              location facets it selects exactly the counted candidates. Company, position
+              and education values are stored strings, while their filters match word
+              prefixes, so filtering by "Acme" also finds "Acme Labs" and can return more
+              candidates than the facet count.
+    """
+    def compute():
+        db = read_session(candidate_filter.user_id)
+        try:
+            return candidate_facets(db, candidate_filter, limit)
+        finally:
+            db.close()
+
+    key = (candidate_filter.user_id, candidate_filter.signature(), limit)
+    return _generation_cached(_facet_cache, candidate_filter.user_id, key, compute)
+
+def shortlist_candidate(candidate_id):
+    """
+    Mark a candidate as shortlisted
+    
+    Args:
+        candidate_id (int): The ID of the candidate to shortlist
+        
+    Returns:
+        bool: True if successful, False otherwise
+    """
+    db = SessionLocal()
+    try:
+        candidate = db.query(Candidate).filter(Candidate.candidate_id == candidate_id).first()
+        if candidate:
+            candidate.status = Status.SHORTLISTED
+            candidate.updated_at = datetime.utcnow()
+            set_candidate_summary_status(db, [candidate_id], Status.SHORTLISTED)
+            db.commit()
+            return True
+        return False
     except Exception as e:
         db.rollback()
-        logger.error(f"Error saving candidate data: {e}")
-        return None
+        logger.error(f"Error shortlisting candidate: {e}")
+        return False
     finally:
         db.close()
 
-def check_duplicate_candidate_content(parsed_data, user_id):
+def calculate_file_hash(file_path):
     """
-    Check if a candidate with very similar content already exists for the user
-    This helps identify updated resumes vs completely new candidates
+    Calculate SHA256 hash of a file
     
     Args:
-        parsed_data (dict): The parsed resume data to check
-        user_id (int): ID of the user to check duplicates for
+        file_path (str): Path to the file
         
     Returns:
-        dict: Information about similar candidate if found, None otherwise
+        str: SHA256 hash of the file
     """
-    if not parsed_data or not user_id:
+    sha256_hash = hashlib.sha256()
+    try:
+        with open(file_path, "rb") as f:
+            # Read file in chunks to handle large files
+            for chunk in iter(lambda: f.read(4096), b""):
+                sha256_hash.update(chunk)
+        return sha256_hash.hexdigest()
+    except Exception as e:
+        logger.error(f"Error calculating file hash: {e}")
+        return None
+
+def find_duplicate_file(db, file_hash, user_id=None):
+    """check_duplicate_file using an open session"""
+    if not file_hash:
         return None
         
+    # Build query with user_id filter if provided
+    query = db.query(Candidate).filter(Candidate.file_hash == file_hash)
+
+    if user_id is not None:
+        query = query.filter(Candidate.user_id == user_id)
+
+    existing_candidate = query.first()
+
+    if existing_candidate:
+        return {
+            "candidate_id": existing_candidate.candidate_id,
+            "candidate_name": existing_candidate.full_name,
+            "upload_date": existing_candidate.created_at.isoformat(),
+            "original_filename": existing_candidate.original_filename,
+            "user_id": existing_candidate.user_id
+        }
+    return None
+
+def check_duplicate_file(file_hash, user_id=None):
+    """
+    Check if a file with the given hash already exists in the database for the specific user
+    
+    Args:
+        file_hash (str): SHA256 hash of the file
+        user_id (int, optional): ID of the user to check duplicates for
+        
+    Returns:
+        dict: Information about existing candidate if duplicate, None otherwise
+    """
     db = SessionLocal()
     try:
-        full_name = parsed_data.get('full_name', '').strip()
-        email = parsed_data.get('email', '').strip() if parsed_data.get('email') else None
-        phone = parsed_data.get('phone', '').strip() if parsed_data.get('phone') else None
+        return find_duplicate_file(db, file_hash, user_id)
+    except Exception as e:
+        logger.error(f"Error checking duplicate file: {e}")
+        return None
+    finally:
+        db.close()
+
+def find_duplicate_files(db, file_hashes, user_id=None):
+    """check_duplicate_files using an open session"""
+    hashes = list({file_hash for file_hash in file_hashes if file_hash})
+    if not hashes:
+        return {}
         
-        # If we don't have at least a name, we can't check for duplicates
-        if not full_name or full_name.lower() == 'unknown':
-            return None
+    query = db.query(
+        Candidate.candidate_id,
+        Candidate.full_name,
+        Candidate.created_at,
+        Candidate.original_filename,
+        Candidate.user_id,
+        Candidate.file_hash
+    ).filter(Candidate.file_hash.in_(hashes))
+
+    if user_id is not None:
+        query = query.filter(Candidate.user_id == user_id)
+
+    return {
+        row.file_hash: {
+            "candidate_id": row.candidate_id,
+            "candidate_name": row.full_name,
+            "upload_date": row.created_at.isoformat(),
+            "original_filename": row.original_filename,
+            "user_id": row.user_id
+        }
+        for row in query.all()
+    }
+
+def check_duplicate_files(file_hashes, user_id=None):
+    """
+    Check many file hashes for existing candidates in a single query (set-based check_duplicate_file)
+    
+    Args:
+        file_hashes (list): SHA256 hashes of the files
+        user_id (int, optional): ID of the user to check duplicates for
         
-        # Start with candidates for this user with the same name
-        query = db.query(Candidate).filter(
-            Candidate.user_id == user_id,
-            Candidate.full_name.ilike(f'%{full_name}%')
-        )
+    Returns:
+        dict: Maps each duplicate file hash to information about the existing candidate
+    """
+    db = SessionLocal()
+    try:
+        return find_duplicate_files(db, file_hashes, user_id)
+    except Exception as e:
+        logger.error(f"Error checking duplicate files: {e}")
+        return {}
+    finally:
+        db.close()
+
+def generate_batch_id():
+    """
+    Generate a unique batch ID for batch uploads
+    
+    Returns:
+        str: UUID string for batch identification
+    """
+    return str(uuid.uuid4())
+
+def _parse_graduation_year(year_str):
+    """Safely convert a graduation year to an integer, None if invalid"""
+    year_str = (year_str or '').strip()
+    if not year_str:
+        return None
+    try:
+        # Extract 4-digit year if it exists
+        year_match = re.search(r'\b(19|20)\d{2}\b', year_str)
+        if year_match:
+            return int(year_match.group())
+        # Try to convert the whole string to int
+        return int(year_str)
+    except (ValueError, TypeError):
+        return None
+
+def _child_rows(parsed_data):
+    """Build the education, skill and work experience rows of a parsed resume (without candidate_id)"""
+    return {
+        Education: [
+            {
+                'degree': edu.get('degree'),
+                'institution': edu.get('institution'),
+                'graduation_year': _parse_graduation_year(edu.get('year')),
+                'gpa': None
+            }
+            for edu in parsed_data.get('education', [])
+        ],
+        Skill: [
+            {
+                'skill_name': skill_name,
+                'skill_category': SkillCategory.TECHNICAL,
+                'proficiency_level': ProficiencyLevel.UNKNOWN
+            }
+            for skill_name in parsed_data.get('skills', [])
+        ],
+        WorkExperience: [
+            {
+                'company': exp.get('company'),
+                'position': exp.get('position'),
+                'start_date': exp.get('start_date', ''),
+                'end_date': exp.get('end_date', ''),
+                'duration': exp.get('duration'),
+                'description': None,
+                **normalize_experience(exp.get('start_date'), exp.get('end_date'), exp.get('duration'))
+            }
+            for exp in parsed_data.get('work_experience', [])
+        ]
+    }
+
+def _candidate_upsert(db):
+    """
+    INSERT for candidates that updates the existing row instead when the user already has
+    a candidate with the same email or file hash. New values win, except that a missing
+    value never clears an existing one and an existing email is never replaced.
+    """
+    table = Candidate.__table__
+    is_sqlite = db.get_bind().dialect.name == 'sqlite'
+    if is_sqlite:
+        # SQLite is only used for local benchmarks (benchmarks.py --sqlite)
+        statement = sqlite_insert(table)
+        new = statement.excluded
+    else:
+        statement = mysql_insert(table)
+        new = statement.inserted
+    
+    updates = {
+        'email': func.coalesce(table.c.email, new.email),
+        'updated_at': new.updated_at
+    }
+    for column in ('full_name', 'phone', 'location', 'years_experience', 'resume_file_path',
+                   'resume_s3_url', 'original_filename', 'file_hash', 'batch_id'):
+        updates[column] = func.coalesce(new[column], table.c[column])
+    for column in ('city', 'region', 'country'):
+        # Normalised from location, so they change together with it
+        updates[column] = case((new.location.isnot(None), new[column]), else_=table.c[column])
+    
+    if is_sqlite:
+        return statement.on_conflict_do_update(set_=updates)
+    return statement.on_duplicate_key_update(updates)
+
+def _insert_ignore(db, table):
+    """INSERT that leaves rows already present under a primary or unique key untouched"""
+    if db.get_bind().dialect.name == 'sqlite':
+        return sqlite_insert(table).on_conflict_do_nothing()
+    primary_key = list(table.primary_key.columns)[0]
+    return mysql_insert(table).on_duplicate_key_update({primary_key.name: primary_key})
+
+def _resolve_catalog_skills(db, skill_names):
+    """
+    Find the catalog skill of each skill name, adding catalog entries and aliases for
+    spellings not seen before. Safe against concurrent writers adding the same skill.
+    
+    Args:
+        db: Open session
+        skill_names (iterable): Skill names as written in resumes
+    
+    Returns:
+        dict: skill_key -> catalog_skill_id
+    """
+    canonical_by_key = {}
+    for name in skill_names:
+        key = skill_key(name)
+        if key:
+            canonical_by_key.setdefault(key, canonical_skill_name(name))
+    if not canonical_by_key:
+        return {}
+    
+    def aliased(keys):
+        return dict(db.query(SkillAlias.alias, SkillAlias.catalog_skill_id).filter(SkillAlias.alias.in_(keys)).all())
+    
+    catalog_ids = aliased(list(canonical_by_key))
+    missing = {key: canonical for key, canonical in canonical_by_key.items() if key not in catalog_ids}
+    if missing:
+        names = set(missing.values())
+        db.execute(_insert_ignore(db, CatalogSkill.__table__), [{'canonical_name': name, 'created_at': datetime.utcnow()} for name in names])
+        # MySQL compares canonical names ignoring case and accents, so match them on skill_key
+        ids_by_name = {
+            skill_key(name): catalog_skill_id
+            for name, catalog_skill_id in db.query(CatalogSkill.canonical_name, CatalogSkill.catalog_skill_id).filter(
+                CatalogSkill.canonical_name.in_(names)
+            ).all()
+        }
+        db.execute(_insert_ignore(db, SkillAlias.__table__), [
+            {'alias': key, 'catalog_skill_id': ids_by_name[skill_key(canonical)]} for key, canonical in missing.items()
+        ])
+        # Re-read rather than trust our inserts: another writer may have added the alias first
+        catalog_ids.update(aliased(list(missing)))
+    return catalog_ids
+
+def _catalog_skill_rows(skill_rows, catalog_ids):
+    """Set catalog_skill_id on a candidate's skill rows, keeping one row per catalog skill"""
+    rows = []
+    seen = set()
+    for row in skill_rows:
+        catalog_skill_id = catalog_ids.get(skill_key(row['skill_name']))
+        if catalog_skill_id is not None:
+            if catalog_skill_id in seen:
+                continue
+            seen.add(catalog_skill_id)
+        rows.append(dict(row, catalog_skill_id=catalog_skill_id))
+    return rows
+
+def _sync_child_rows(db, children_by_candidate):
+    """
+    Bring each candidate's education, skills and work experience in line with its latest
+    parsed resume. Rows are matched on CHILD_ROW_KEYS, so only rows that changed are
+    deleted or inserted and a re-uploaded resume leaves unchanged rows untouched.
+    
+    Args:
+        db: Open session
+        children_by_candidate (dict): candidate_id -> rows from _child_rows
+    """
+    candidate_ids = list(children_by_candidate)
+    for model, key_columns in CHILD_ROW_KEYS.items():
+        primary_key = list(model.__table__.primary_key.columns)[0]
         
-        # If we have email, add it as additional filter
-        if email:
-            query = query.filter(Candidate.email == email)
+        # Existing row IDs by (candidate_id, key); a list since a resume can repeat a row
+        existing = {}
+        rows = db.query(primary_key, model.candidate_id, *[getattr(model, column) for column in key_columns]).filter(
+            model.candidate_id.in_(candidate_ids)
+        ).all()
+        for row in rows:
+            existing.setdefault((row[1], tuple(row[2:])), []).append(row[0])
         
-        # If we have phone, add it as additional filter  
-        if phone:
-            query = query.filter(Candidate.phone == phone)
-            
-        existing_candidate = query.first()
+        inserts = []
+        for candidate_id, children in children_by_candidate.items():
+            for child in children[model]:
+                matches = existing.get((candidate_id, tuple(child[column] for column in key_columns)))
+                if matches:
+                    matches.pop()
+                else:
+                    inserts.append(dict(child, candidate_id=candidate_id))
         
-        if existing_candidate:
-            # Calculate similarity score based on matching fields
-            similarity_score = 0
-            total_fields = 0
-            
-            # Check name similarity
-            if existing_candidate.full_name and full_name:
-                if existing_candidate.full_name.lower() == full_name.lower():
-                    similarity_score += 3  # Name is most important
-                elif full_name.lower() in existing_candidate.full_name.lower():
-                    similarity_score += 2
-                total_fields += 3
-            
-            # Check email match
-            if existing_candidate.email and email:
-                if existing_candidate.email.lower() == email.lower():
-                    similarity_score += 2
-                total_fields += 2
-            
-            # Check phone match
-            if existing_candidate.phone and phone:
-                if existing_candidate.phone == phone:
-                    similarity_score += 2
-                total_fields += 2
-            
-            # Calculate similarity percentage
-            similarity_percentage = (similarity_score / total_fields * 100) if total_fields > 0 else 0
+        stale_ids = [row_id for row_ids in existing.values() for row_id in row_ids]
+        if stale_ids:
+            db.execute(delete(model.__table__).where(primary_key.in_(stale_ids)))
+        if inserts:
+            db.execute(insert(model.__table__), inserts)
+
+def _sync_search_terms(db, user_id, indexed_by_candidate):
+    """
+    Bring each candidate's candidate_search_terms in line with its location and child rows,
+    deleting and inserting only the terms that changed.
+    
+    Args:
+        db: Open session
+        user_id (int): Owner of the candidates
+        indexed_by_candidate (dict): candidate_id -> (location, rows from _child_rows)
+    """
+    existing = {}
+    rows = db.query(
+        CandidateSearchTerm.term_id, CandidateSearchTerm.candidate_id, CandidateSearchTerm.field, CandidateSearchTerm.term
+    ).filter(CandidateSearchTerm.candidate_id.in_(list(indexed_by_candidate))).all()
+    for row in rows:
+        existing[(row.candidate_id, row.field, row.term)] = row.term_id
+    
+    inserts = []
+    for candidate_id, (location, children) in indexed_by_candidate.items():
+        for field, term in candidate_terms(location, children):
+            if existing.pop((candidate_id, field, term), None) is None:
+                inserts.append({'user_id': user_id, 'candidate_id': candidate_id, 'field': field, 'term': term})
+    
+    # Whatever is left in existing no longer appears in the candidate's resume
+    if existing:
+        db.execute(delete(CandidateSearchTerm.__table__).where(CandidateSearchTerm.term_id.in_(list(existing.values()))))
+    if inserts:
+        db.execute(insert(CandidateSearchTerm.__table__), inserts)
+
+def _build_candidate_summaries(db, candidate_ids):
+    """
+    Build summary rows from the candidates and child tables, with one query per table
+    
+    Returns:
+        dict: candidate_id -> candidate_summaries row
+    """
+    if not candidate_ids:
+        return {}
+    candidate_ids = list(candidate_ids)
+    
+    children = {}
+    for model in (Education, Skill, WorkExperience):
+        primary_key = list(model.__table__.primary_key.columns)[0]
+        rows = db.execute(select(model.__table__).where(model.candidate_id.in_(candidate_ids)).order_by(primary_key)).all()
+        for row in rows:
+            children.setdefault((model, row.candidate_id), []).append(row)
+    
+    now = datetime.utcnow()
+    summaries = {}
+    for candidate in db.execute(select(Candidate.__table__).where(Candidate.candidate_id.in_(candidate_ids))).all():
+        document = summary_document(
+            candidate,
+            education=children.get((Education, candidate.candidate_id), []),
+            skills=children.get((Skill, candidate.candidate_id), []),
+            work_experience=children.get((WorkExperience, candidate.candidate_id), [])
+        )
+        summaries[candidate.candidate_id] = _summary_row(candidate.candidate_id, candidate.user_id, document, now)
+    return summaries
+
+def _summary_row(candidate_id, user_id, document, updated_at):
+    return {
+        'candidate_id': candidate_id,
+        'user_id': user_id,
+        'document': json.dumps(document),
+        'prompt_text': summary_prompt_text(document),
+        'updated_at': updated_at
+    }
+
+def _write_summary_rows(db, rows):
+    """Insert or replace candidate_summaries rows"""
+    if not rows:
+        return
+    table = CandidateSummary.__table__
+    if db.get_bind().dialect.name == 'sqlite':
+        statement = sqlite_insert(table)
+        statement = statement.on_conflict_do_update(set_={
+            column: statement.excluded[column] for column in ('user_id', 'document', 'prompt_text', 'updated_at')
+        })
+    else:
+        statement = mysql_insert(table)
+        statement = statement.on_duplicate_key_update({
+            column: statement.inserted[column] for column in ('user_id', 'document', 'prompt_text', 'updated_at')
+        })
+    db.execute(statement, rows)
+
+def refresh_candidate_summaries(db, candidate_ids):
+    """
+    Rewrite the summaries of candidates from their stored rows, in the caller's transaction
+    
+    Args:
+        db: Open session
+        candidate_ids (list): Candidates whose rows changed
+    """
+    _write_summary_rows(db, list(_build_candidate_summaries(db, candidate_ids).values()))
+
+def set_candidate_summary_status(db, candidate_ids, status, user_id=None):
+    """
+    Record a status change in the candidates' summaries, in the caller's transaction.
+    Call it with every status update so summaries never disagree with candidates.status.
+    
+    Args:
+        db: Open session
+        candidate_ids (list): Candidates whose status changed
+        status (Status): The new status
+        user_id (int, optional): Only touch this user's candidates
+    """
+    query = db.query(CandidateSummary.candidate_id, CandidateSummary.user_id, CandidateSummary.document).filter(
+        CandidateSummary.candidate_id.in_(list(candidate_ids))
+    )
+    if user_id is not None:
+        query = query.filter(CandidateSummary.user_id == user_id)
+    rows = query.all()
+    
+    now = datetime.utcnow()
+    updates = []
+    for row in rows:
+        document = json.loads(row.document)
+        document['status'] = status.value
+        updates.append(_summary_row(row.candidate_id, row.user_id, document, now))
+    _write_summary_rows(db, updates)
+    
+    # Candidates saved before summaries existed get a full one
+    missing = set(candidate_ids) - {row.candidate_id for row in rows}
+    if missing and user_id is not None:
+        missing = {row.candidate_id for row in db.query(Candidate.candidate_id).filter(
+            Candidate.candidate_id.in_(missing), Candidate.user_id == user_id
+        )}
+    if missing:
+        db.flush()
+        refresh_candidate_summaries(db, missing)
+
+def update_candidate_statuses(db, candidate_ids, status, user_id):
+    """
+    Set the status of many of a user's candidates with one ownership-checked UPDATE,
+    in the caller's transaction. IDs of other users' candidates, or of no candidate, are skipped.
+    
+    Args:
+        db: Open session
+        candidate_ids (list): Candidates to update
+        status (Status): The new status
+        user_id (int): Owner of the candidates
+    
+    Returns:
+        int: Number of candidates updated
+    """
+    candidate_ids = sorted(set(candidate_ids))
+    if not candidate_ids:
+        return 0
+    
+    result = db.execute(
+        update(Candidate)
+        .where(Candidate.candidate_id.in_(candidate_ids), Candidate.user_id == user_id)
+        .values(status=status, updated_at=datetime.utcnow()),
+        execution_options={"synchronize_session": False}
+    )
+    # Core UPDATEs bypass the flush events; listing counts are invalidated on commit
+    db.info.setdefault('candidate_count_users', set()).add(user_id)
+    set_candidate_summary_status(db, candidate_ids, status, user_id=user_id)
+    return result.rowcount
+
+def get_candidate_summaries(db, candidate_ids):
+    """
+    Candidate documents by ID, read from candidate_summaries in one query.
+    Candidates without a summary yet are built from their rows instead.
+    
+    Args:
+        db: Open session
+        candidate_ids (list): Candidates to load
+    
+    Returns:
+        dict: candidate_id -> candidate document
+    """
+    candidate_ids = list(candidate_ids)
+    if not candidate_ids:
+        return {}
+    documents = {
+        row.candidate_id: json.loads(row.document)
+        for row in db.query(CandidateSummary.candidate_id, CandidateSummary.document).filter(
+            CandidateSummary.candidate_id.in_(candidate_ids)
+        ).all()
+    }
+    missing = [candidate_id for candidate_id in candidate_ids if candidate_id not in documents]
+    for candidate_id, row in _build_candidate_summaries(db, missing).items():
+        documents[candidate_id] = json.loads(row['document'])
+    return documents
+
+def get_candidate_prompts(db, user_id=None):
+    """
+    Chat context blocks of a user's candidates, in candidate order
+    
+    Args:
+        db: Open session
+        user_id (int, optional): Owner of the candidates
+    
+    Returns:
+        list: Prompt text of each candidate
+    """
+    query = db.query(Candidate.candidate_id, CandidateSummary.prompt_text).outerjoin(
+        CandidateSummary, CandidateSummary.candidate_id == Candidate.candidate_id
+    )
+    if user_id is not None:
+        query = query.filter(Candidate.user_id == user_id)
+    rows = query.order_by(Candidate.candidate_id).all()
+    
+    missing = _build_candidate_summaries(db, [row.candidate_id for row in rows if row.prompt_text is None])
+    return [row.prompt_text if row.prompt_text is not None else missing[row.candidate_id]['prompt_text'] for row in rows]
+
+def iter_candidate_documents(candidate_filter, batch_size=EXPORT_BATCH_SIZE):
+    """
+    Stream the documents of every candidate matching a filter, in candidate_id order.
+    Candidates are read in keyset batches (candidate_id > last one read), each in its own
+    short read transaction, so memory stays constant however many candidates match and
+    no cursor or snapshot is held open on the server for the length of the export.
+    
+    Args:
+        candidate_filter (CandidateFilter): Candidates to export
+        batch_size (int, optional): Candidates read per query
+    
+    Yields:
+        dict: Candidate document (see candidate_summary.py)
+    """
+    db = read_session(candidate_filter.user_id)
+    try:
+        criteria = candidate_filter.criteria()
+        last_id = 0
+        while True:
+            rows = db.query(Candidate.candidate_id, CandidateSummary.document).outerjoin(
+                CandidateSummary, CandidateSummary.candidate_id == Candidate.candidate_id
+            ).filter(*criteria, Candidate.candidate_id > last_id).order_by(Candidate.candidate_id).limit(batch_size).all()
+            if not rows:
+                return
             
-            return {
-                "candidate_id": existing_candidate.candidate_id,
-                "candidate_name": existing_candidate.full_name,
-                "email": existing_candidate.email,
-                "phone": existing_candidate.phone,
-                "upload_date": existing_candidate.created_at.isoformat(),
-                "similarity_percentage": similarity_percentage,
-                "is_likely_same_person": similarity_percentage >= 70  # 70% or higher suggests same person
-            }
+            missing = _build_candidate_summaries(db, [row.candidate_id for row in rows if row.document is None])
+            # End the read transaction before handing rows to a possibly slow client
+            db.rollback()
+            for row in rows:
+                yield json.loads(row.document if row.document is not None else missing[row.candidate_id]['document'])
+            last_id = rows[-1].candidate_id
+    finally:
+        db.close()
+
+def _split_key_matches(db, user_id, keyed):
+    """
+    Drop the email from rows whose email and file hash belong to two different candidates.
+    The upsert could only update one of them, and moving the other's file hash onto it
+    breaks uq_candidates_user_file_hash, so such a row counts as a re-upload of the file
+    hash's candidate. Rows are walked in order so candidates created earlier in the same
+    chunk are matched the way the upsert will match them.
+    """
+    hashes = {row['file_hash'] for row in keyed if row['file_hash']}
+    emails = {row['email'] for row in keyed if row['email']}
+    existing = db.query(Candidate.candidate_id, Candidate.file_hash, Candidate.email).filter(
+        Candidate.user_id == user_id,
+        or_(Candidate.file_hash.in_(hashes), Candidate.email.in_(emails))
+    ).all()
+    
+    by_hash = {candidate.file_hash: candidate.candidate_id for candidate in existing if candidate.file_hash}
+    # Emails compare case-insensitively under MySQL's default collation
+    by_email = {candidate.email.lower(): candidate.candidate_id for candidate in existing if candidate.email}
+    hash_of = {candidate.candidate_id: candidate.file_hash for candidate in existing}
+    email_of = {candidate.candidate_id: candidate.email for candidate in existing}
+    
+    for position, row in enumerate(keyed):
+        email = row['email'].lower() if row['email'] else None
+        hash_match = by_hash.get(row['file_hash'])
+        email_match = by_email.get(email)
+        if hash_match is not None and email_match is not None and hash_match != email_match:
+            row['email'] = None
+            email = None
+        
+        # Follow what the upsert does to the matched (or newly inserted) candidate's keys
+        target = hash_match if hash_match is not None else email_match
+        if target is None:
+            target = ('new', position)
+        if row['file_hash']:
+            by_hash.pop(hash_of.get(target), None)
+            by_hash[row['file_hash']] = target
+            hash_of[target] = row['file_hash']
+        if email and not email_of.get(target):
+            by_email[email] = target
+            email_of[target] = row['email']
+
+def save_candidate_chunk(db, records, user_id, batch_id):
+    """Save one chunk of records and commit (see save_candidates_bulk); raises on failure"""
+    now = datetime.utcnow()
+    rows = []
+    for record in records:
+        parsed_data = record['parsed_data']
+        rows.append({
+            'user_id': user_id,
+            'full_name': parsed_data.get('full_name', 'Unknown'),
+            'email': parsed_data.get('email') or None,
+            'phone': parsed_data.get('phone'),
+            'location': parsed_data.get('location'),
+            **parse_location(parsed_data.get('location')),
+            'years_experience': parsed_data.get('years_experience', 0),
+            'resume_file_path': record.get('resume_file_path'),
+            'resume_s3_url': record.get('resume_s3_url'),
+            'original_filename': record.get('original_filename'),
+            'file_hash': record.get('file_hash'),
+            'batch_id': batch_id,
+            'status': Status.PENDING,
+            'created_at': now,
+            'updated_at': now
+        })
+
+    # Rows with an email or file hash are upserted together; the unique keys route each
+    # one to the user's existing candidate, including earlier rows of this chunk
+    keyed = [row for row in rows if row['email'] or row['file_hash']]
+    by_hash = {}
+    by_email = {}
+    locations = {}
+    if keyed:
+        _split_key_matches(db, user_id, keyed)
+        db.execute(_candidate_upsert(db), keyed)
+
+        hashes = {row['file_hash'] for row in keyed if row['file_hash']}
+        emails = {row['email'] for row in keyed if row['email']}
+        saved = db.query(Candidate.candidate_id, Candidate.file_hash, Candidate.email, Candidate.location).filter(
+            Candidate.user_id == user_id,
+            or_(Candidate.file_hash.in_(hashes), Candidate.email.in_(emails))
+        ).all()
+        for candidate in saved:
+            locations[candidate.candidate_id] = candidate.location
+            if candidate.file_hash:
+                by_hash[candidate.file_hash] = candidate.candidate_id
+            if candidate.email:
+                # Emails compare case-insensitively under MySQL's default collation
+                by_email[candidate.email.lower()] = candidate.candidate_id
+
+    candidate_ids = []
+    for row in rows:
+        if row['file_hash'] in by_hash:
+            candidate_id = by_hash[row['file_hash']]
+        elif row['email'] and row['email'].lower() in by_email:
+            candidate_id = by_email[row['email'].lower()]
+        elif not (row['email'] or row['file_hash']):
+            # Nothing to match on, so this is always a new candidate
+            candidate_id = db.execute(insert(Candidate.__table__).values(**row)).inserted_primary_key[0]
+            locations[candidate_id] = row['location']
+        else:
+            raise ValueError(f"Saved candidate for {row['original_filename']} not found")
+        candidate_ids.append(candidate_id)
+
+    # The last resume saved for a candidate decides its child rows and search terms
+    children_by_candidate = {
+        candidate_id: _child_rows(record['parsed_data'])
+        for record, candidate_id in zip(records, candidate_ids)
+    }
+    catalog_ids = _resolve_catalog_skills(db, [
+        row['skill_name'] for children in children_by_candidate.values() for row in children[Skill]
+    ])
+    for children in children_by_candidate.values():
+        children[Skill] = _catalog_skill_rows(children[Skill], catalog_ids)
+    _sync_child_rows(db, children_by_candidate)
+    _sync_search_terms(db, user_id, {
+        candidate_id: (locations[candidate_id], children)
+        for candidate_id, children in children_by_candidate.items()
+    })
+    refresh_candidate_summaries(db, children_by_candidate)
+
+    # Core statements bypass the flush events; listing counts are invalidated on commit
+    db.info.setdefault('candidate_count_users', set()).add(user_id)
+    db.commit()
+    return candidate_ids
+
+def save_candidates_bulk(records, user_id=None, batch_id=None, chunk_size=BULK_SAVE_CHUNK_SIZE):
+    """
+    Save many parsed resumes at once, with one transaction per chunk.
+    Candidates are written with a single multi-row upsert: a resume whose email or file
+    hash the user already has updates that candidate, anything else is inserted. Child
+    rows are then diffed against what is stored, so unchanged rows are not rewritten.
+    
+    Args:
+        records (list): Dicts with 'parsed_data' and optionally 'resume_file_path',
+                        'resume_s3_url', 'original_filename' and 'file_hash'
+        user_id (int, optional): ID of the user uploading the resumes
+        batch_id (str, optional): Batch ID for batch uploads
+        chunk_size (int, optional): Number of records written per transaction
+    
+    Returns:
+        list: Candidate ID for each record in order (None for records in a chunk that failed)
+    """
+    candidate_ids = []
+    for start in range(0, len(records), chunk_size):
+        chunk = records[start:start + chunk_size]
+        db = SessionLocal()
+        try:
+            candidate_ids.extend(save_candidate_chunk(db, chunk, user_id, batch_id))
+        except Exception as e:
+            db.rollback()
+            logger.error(f"Error saving {len(chunk)} candidates: {e}")
+            candidate_ids.extend([None] * len(chunk))
+        finally:
+            db.close()
+    return candidate_ids
+
+def save_candidate_data_with_hash(parsed_data, resume_file_path=None, resume_s3_url=None, 
+                                 original_filename=None, file_hash=None, batch_id=None, user_id=None):
+    """
+    Save parsed resume data to database with file hash and batch ID.
+    Upserts on the user's (email) and (file_hash) unique keys, so an updated resume of an
+    existing candidate updates that candidate and only its changed child rows.
+    
+    Args:
+        parsed_data (dict): The parsed resume data
+        resume_file_path (str, optional): Path or key to the resume in S3
+        resume_s3_url (str, optional): Full S3 URL to the resume
+        original_filename (str, optional): Original filename of the uploaded resume
+        file_hash (str, optional): SHA256 hash of the file
+        batch_id (str, optional): Batch ID for batch uploads
+        user_id (int, optional): ID of the user uploading the resume
+    
+    Returns:
+        int: The ID of the inserted or updated candidate
+    """
+    record = {
+        'parsed_data': parsed_data,
+        'resume_file_path': resume_file_path,
+        'resume_s3_url': resume_s3_url,
+        'original_filename': original_filename,
+        'file_hash': file_hash
+    }
+    return save_candidates_bulk([record], user_id=user_id, batch_id=batch_id)[0]
+
+def find_similar_candidate(db, parsed_data, user_id):
+    """check_duplicate_candidate_content using an open session"""
+    if not parsed_data or not user_id:
+        return None
         
+    full_name = parsed_data.get('full_name', '').strip()
+    email = parsed_data.get('email', '').strip() if parsed_data.get('email') else None
+    phone = parsed_data.get('phone', '').strip() if parsed_data.get('phone') else None
+
+    # If we don't have at least a name, we can't check for duplicates
+    if not full_name or full_name.lower() == 'unknown':
         return None
+
+    # Start with candidates for this user with the same name
+    query = db.query(Candidate).filter(
+        Candidate.user_id == user_id,
+        Candidate.full_name.ilike(f'%{full_name}%')
+    )
+
+    # If we have email, add it as additional filter
+    if email:
+        query = query.filter(Candidate.email == email)
+
+    # If we have phone, add it as additional filter  
+    if phone:
+        query = query.filter(Candidate.phone == phone)
+
+    existing_candidate = query.first()
+
+    if existing_candidate:
+        # Calculate similarity score based on matching fields
+        similarity_score = 0
+        total_fields = 0
+
+        # Check name similarity
+        if existing_candidate.full_name and full_name:
+            if existing_candidate.full_name.lower() == full_name.lower():
+                similarity_score += 3  # Name is most important
+            elif full_name.lower() in existing_candidate.full_name.lower():
+                similarity_score += 2
+            total_fields += 3
+
+        # Check email match
+        if existing_candidate.email and email:
+            if existing_candidate.email.lower() == email.lower():
+                similarity_score += 2
+            total_fields += 2
+
+        # Check phone match
+        if existing_candidate.phone and phone:
+            if existing_candidate.phone == phone:
+                similarity_score += 2
+            total_fields += 2
+
+        # Calculate similarity percentage
+        similarity_percentage = (similarity_score / total_fields * 100) if total_fields > 0 else 0
+
+        return {
+            "candidate_id": existing_candidate.candidate_id,
+            "candidate_name": existing_candidate.full_name,
+            "email": existing_candidate.email,
+            "phone": existing_candidate.phone,
+            "upload_date": existing_candidate.created_at.isoformat(),
+            "similarity_percentage": similarity_percentage,
+            "is_likely_same_person": similarity_percentage >= 70  # 70% or higher suggests same person
+        }
+
+    return None
+
+def check_duplicate_candidate_content(parsed_data, user_id):
+    """
+    Check if a candidate with very similar content already exists for the user
+    This helps identify updated resumes vs completely new candidates
+    
+    Args:
+        parsed_data (dict): The parsed resume data to check
+        user_id (int): ID of the user to check duplicates for
+        
+    Returns:
+        dict: Information about similar candidate if found, None otherwise
+    """
+    db = SessionLocal()
+    try:
+        return find_similar_candidate(db, parsed_data, user_id)
     except Exception as e:
         logger.error(f"Error checking duplicate candidate content: {e}")
         return None
@@ -0,0 +1,220 @@
+"""
+Experience Dates for Sen AI
+Normalises the free-text dates and durations of work experience ("Jan 2019 - Present",
+"2018 – 2020", "2 years 3 months") into the structured columns of work_experiences
+(see database.WorkExperience): start_on and end_on (first day of the month), is_current
+and tenure_months, computed at save time so tenure and date range filters use indexes.
+A start year alone stands for its January and an end year alone for its December, so
+date filters keep jobs that ran through that year, but tenure only counts up to the end
+year's January ("2018 – 2020" is 24 months) unless the resume states the duration.
+
+Normalise the work experience of existing candidates with:
+
+    python experience_dates.py --backfill
+"""
+
+import re
+import logging
+import argparse
+from datetime import date
+from typing import Any, Dict, Optional, Tuple
+
+# Configure logging
+logging.basicConfig(level=logging.INFO)
+logger = logging.getLogger(__name__)
+
+# Longer tenures are parsing mistakes and are stored as unknown
+MAX_TENURE_MONTHS = 70 * 12
+
+MONTHS = {
+    "jan": 1, "feb": 2, "mar": 3, "apr": 4, "may": 5, "jun": 6,
+    "jul": 7, "aug": 8, "sep": 9, "oct": 10, "nov": 11, "dec": 12,
+}
+CURRENT_WORDS = ("present", "current", "now", "ongoing", "today", "till date", "to date")
+NUMBER_WORDS = {
+    "a": 1, "an": 1, "one": 1, "two": 2, "three": 3, "four": 4, "five": 5, "six": 6,
+    "seven": 7, "eight": 8, "nine": 9, "ten": 10, "eleven": 11, "twelve": 12,
+}
+
+# Dashes between dates, but not inside ISO dates ("2019-03 - 2021-06" splits once)
+_RANGE_PATTERN = re.compile(r"\s*[–—]\s*|\s+-\s*|\s*-\s+|(?<=\d{4})-(?=\d{4}\b|[a-z])|\s+(?:to|until|till)\s+")
+_TO_DATE_PATTERN = re.compile(r"\b(?:till|to|up to) date\b")
+_ISO_PATTERN = re.compile(r"^(\d{4})[-/.](\d{1,2})(?:[-/.]\d{1,2})?$")
+_MONTH_YEAR_PATTERN = re.compile(r"^(\d{1,2})[-/.](\d{4})$")
+_NAMED_MONTH_PATTERN = re.compile(r"^([a-z]{3})[a-z]*\.?,?\s*'?(\d{4}|\d{2})$")
+_YEAR_PATTERN = re.compile(r"^(\d{4})$")
+_NUMBER = r"(\d+(?:\.\d+)?|" + "|".join(NUMBER_WORDS) + r")"
+_YEARS_PATTERN = re.compile(r"\b" + _NUMBER + r"\+?\s*(?:years?|yrs?|y)\b")
+_MONTHS_PATTERN = re.compile(r"\b" + _NUMBER + r"\+?\s*(?:months?|mos?|m)\b")
+
+def _number(text: str) -> float:
+    return float(NUMBER_WORDS[text]) if text in NUMBER_WORDS else float(text)
+
+def _clean(text) -> str:
+    return " ".join(str(text).strip().lower().split()) if text else ""
+
+def is_current(text) -> bool:
+    """Whether an end date means the job is ongoing ("Present", "Current", ...)"""
+    cleaned = _clean(text)
+    return any(word == cleaned or cleaned.startswith(word) for word in CURRENT_WORDS)
+
+def is_year(text) -> bool:
+    """Whether a resume date is a year alone ("2020")"""
+    return bool(_YEAR_PATTERN.match(_clean(text)))
+
+def parse_month(text) -> Optional[date]:
+    """
+    Parse a resume date to the first day of its month
+
+    Args:
+        text (str): "2020-03", "03/2020", "Mar 2020", "March, 2020", "Mar '20" or "2020" (January)
+
+    Returns:
+        date: First day of the month, or None if the text is not a date
+    """
+    cleaned = _clean(text)
+    if not cleaned:
+        return None
+
+    year = month = None
+    match = _ISO_PATTERN.match(cleaned)
+    if match:
+        year, month = int(match.group(1)), int(match.group(2))
+    elif _MONTH_YEAR_PATTERN.match(cleaned):
+        match = _MONTH_YEAR_PATTERN.match(cleaned)
+        month, year = int(match.group(1)), int(match.group(2))
+    elif _NAMED_MONTH_PATTERN.match(cleaned):
+        match = _NAMED_MONTH_PATTERN.match(cleaned)
+        month = MONTHS.get(match.group(1))
+        year = int(match.group(2))
+        if year < 100:
+            # Two-digit years: the most recent matching year not in the future
+            year += 2000 if year <= date.today().year % 100 else 1900
+    elif _YEAR_PATTERN.match(cleaned):
+        year = int(cleaned)
+        month = 1
+
+    if year is None or month is None or not 1 <= month <= 12 or not 1900 <= year <= date.today().year + 1:
+        return None
+    return date(year, month, 1)
+
+def parse_duration(text) -> Optional[int]:
+    """
+    Parse a duration to whole months
+
+    Args:
+        text (str): "2 years 3 months", "1.5 yrs", "18 months", "two years"
+
+    Returns:
+        int: Months, or None if the text has no duration
+    """
+    cleaned = _clean(text)
+    years = _YEARS_PATTERN.search(cleaned)
+    months = _MONTHS_PATTERN.search(cleaned)
+    if not years and not months:
+        return None
+    total = (_number(years.group(1)) * 12 if years else 0) + (_number(months.group(1)) if months else 0)
+    return int(round(total)) or None
+
+def split_range(text) -> Optional[Tuple[str, str]]:
+    """Split "Jan 2019 - Present (4 years)" into its start and end, or None if it is not a range"""
+    cleaned = re.sub(r"\(.*?\)", "", _clean(text)).strip()
+    cleaned = _TO_DATE_PATTERN.sub(" - present", cleaned)
+    parts = _RANGE_PATTERN.split(cleaned, maxsplit=1)
+    if len(parts) == 2 and parts[0] and parts[1]:
+        return parts[0], parts[1]
+    return None
+
+def add_months(day: date, months: int) -> date:
+    index = day.year * 12 + day.month - 1 + months
+    return date(index // 12, index % 12 + 1, 1)
+
+def months_between(start: date, end: date) -> int:
+    """Months worked from start to end, counting both months ("Jan - Mar" is 3)"""
+    return (end.year - start.year) * 12 + end.month - start.month + 1
+
+def normalize_experience(start_date=None, end_date=None, duration=None, today: Optional[date] = None) -> Dict[str, Any]:
+    """
+    Structured dates of one work experience entry. A date range written in start_date
+    or duration is split, a missing start or end is derived from the other and the
+    duration, and tenure counts months up to today for ongoing jobs. A finished job's
+    tenure is the duration the resume states ("2015 - 2018 (3 years)") where it has one.
+
+    Args:
+        start_date (str): Free-text start date
+        end_date (str): Free-text end date ("Present" for an ongoing job)
+        duration (str): Free-text duration or date range
+        today (date, optional): Date ongoing jobs run until (default: today)
+
+    Returns:
+        dict: start_on, end_on, is_current and tenure_months (None where unknown)
+    """
+    today = today or date.today()
+    start_text, end_text, range_text = start_date, end_date, None
+    for text in (start_date, duration):
+        if not _clean(end_text):
+            date_range = split_range(text)
+            if date_range:
+                (start_text, end_text), range_text = date_range, text
+                break
+
+    current = is_current(end_text)
+    start_on = parse_month(start_text)
+    end_on = None if current else parse_month(end_text)
+    end_year_only = end_on is not None and is_year(end_text)
+    if end_year_only:
+        # "2015 - 2018" may have run to any month of 2018; end it in December so
+        # worked_after doesn't miss it, but count tenure only up to the January
+        end_on = date(end_on.year, 12, 1)
+    if start_on and end_on and end_on < start_on:
+        start_on = end_on = None
+
+    # Also a duration written next to the range ("2015 - 2018 (3 years)")
+    duration_months = parse_duration(duration) or parse_duration(range_text)
+    if duration_months:
+        if start_on and not end_on and not current:
+            end_on = add_months(start_on, duration_months - 1)
+        elif end_on and not start_on:
+            start_on = add_months(end_on, -(duration_months - 1))
+        elif current and not start_on:
+            start_on = add_months(date(today.year, today.month, 1), -(duration_months - 1))
+
+    if start_on and current:
+        tenure_months = months_between(start_on, today)
+    elif duration_months:
+        tenure_months = duration_months
+    elif start_on and end_on:
+        end_month = date(end_on.year, 1, 1) if end_year_only else end_on
+        tenure_months = months_between(start_on, end_month)
+        if end_year_only and end_month > start_on:
+            # "2018 – 2020" ended during 2020: count up to its January, not through it
+            tenure_months -= 1
+    else:
+        tenure_months = None
+    if tenure_months is not None and not 0 < tenure_months <= MAX_TENURE_MONTHS:
+        tenure_months = None
+
+    return {
+        'start_on': start_on,
+        'end_on': end_on,
+        'is_current': current,
+        'tenure_months': tenure_months,
+    }
+
+def main():
+    parser = argparse.ArgumentParser(description="Maintain the structured work experience dates")
+    parser.add_argument("--backfill", action="store_true", help="Normalise work experience saved before the date columns existed")
+    parser.add_argument("--all", action="store_true", help="Normalise every row again, not only unprocessed ones")
+    args = parser.parse_args()
+
+    if not args.backfill:
+        parser.print_help()
+        return
+
+    from database import init_db, backfill_experience_dates
+    init_db()
+    updated = backfill_experience_dates(only_missing=not args.all)
+    logger.info(f"Normalised {updated} work experience rows")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,198 @@
+"""
+Staged Ingestion Pipeline for Sen AI
+Runs items through a sequence of stages connected by bounded queues. Each stage
+has its own concurrency limit, and a full queue blocks the stage feeding it, so
+throughput is set by the slowest stage rather than the sum of all latencies.
+"""
+
+import os
+import time
+import asyncio
+import inspect
+import logging
+import multiprocessing
+import concurrent.futures
+from typing import Any, Awaitable, Callable, Dict, List, Optional
+
+# Configure logging
+logging.basicConfig(level=logging.INFO)
+logger = logging.getLogger(__name__)
+
+# Per-stage concurrency limits for the batch ingestion pipeline
+PIPELINE_EXTRACT_CONCURRENCY = int(os.environ.get("PIPELINE_EXTRACT_CONCURRENCY", str(os.cpu_count() or 2)))
+PIPELINE_LLM_CONCURRENCY = int(os.environ.get("PIPELINE_LLM_CONCURRENCY", "8"))
+PIPELINE_S3_CONCURRENCY = int(os.environ.get("PIPELINE_S3_CONCURRENCY", "8"))
+PIPELINE_DB_CONCURRENCY = int(os.environ.get("PIPELINE_DB_CONCURRENCY", "4"))
+# Parsed resumes saved together in one bulk transaction
+PIPELINE_DB_BATCH_SIZE = int(os.environ.get("PIPELINE_DB_BATCH_SIZE", "25"))
+
+_DONE = object()
+_process_pool = None
+
+class Stage:
+    """
+    A pipeline stage
+
+    Args:
+        name (str): Stage name used in logs
+        func (callable): Async function taking an item dict and returning it.
+                         Setting item['result'] finishes the item early.
+                         With batch_size > 1 it takes and returns a list of items instead.
+        concurrency (int): Number of items (or batches) processed by this stage at once
+        queue_size (int, optional): Capacity of the stage's input queue (default: 2 x concurrency x batch_size)
+        batch_size (int): Maximum items handed to func at once. A batch is whatever is
+                          already waiting in the queue, so batching never delays an item.
+    """
+
+    def __init__(self, name: str, func: Callable[[Any], Awaitable[Any]],
+                 concurrency: int = 1, queue_size: Optional[int] = None, batch_size: int = 1):
+        self.name = name
+        self.func = func
+        self.concurrency = max(1, concurrency)
+        self.batch_size = max(1, batch_size)
+        self.queue_size = queue_size if queue_size is not None else self.concurrency * self.batch_size * 2
+        self.processed = 0
+        self.busy_seconds = 0.0
+
+def get_process_pool() -> concurrent.futures.ProcessPoolExecutor:
+    """Shared process pool for CPU-bound stages, created on first use"""
+    global _process_pool
+    if _process_pool is None:
+        # Spawn so workers only import what the submitted function needs
+        _process_pool = concurrent.futures.ProcessPoolExecutor(
+            max_workers=PIPELINE_EXTRACT_CONCURRENCY,
+            mp_context=multiprocessing.get_context("spawn")
+        )
+    return _process_pool
+
+async def run_in_process(func: Callable, *args):
+    """Run a picklable top-level function in the shared process pool"""
+    loop = asyncio.get_running_loop()
+    return await loop.run_in_executor(get_process_pool(), func, *args)
+
+async def run_pipeline(source, stages: List[Stage],
+                       on_error: Callable[[Dict[str, Any], Stage, Exception], Any],
+                       on_finished: Optional[Callable[[Dict[str, Any]], Any]] = None,
+                       collect_results: bool = True) -> List[Dict[str, Any]]:
+    """
+    Run every item from source through the stages
+
+    Args:
+        source: Iterable or async iterable of item dicts
+        stages (list): Stages in order
+        on_error (callable): Builds item['result'] when a stage raises
+        on_finished (callable, optional): Called (or awaited) once per item as soon as it leaves the pipeline
+        collect_results (bool): Keep finished items for the return value. Disable for large
+                                sources whose results are handled by on_finished.
+
+    Returns:
+        list: Finished items in source order (empty if collect_results is False)
+
+    Raises:
+        Exception: Whatever the source raised, once every stage has been cancelled
+    """
+    queues = [asyncio.Queue(maxsize=stage.queue_size) for stage in stages]
+    finished = {}
+    finished_count = 0
+
+    async def finish(index, item):
+        nonlocal finished_count
+        finished_count += 1
+        if collect_results:
+            finished[index] = item
+        if on_finished:
+            outcome = on_finished(item)
+            if inspect.isawaitable(outcome):
+                await outcome
+
+    async def put(index, item):
+        # Items that arrive already finished skip every stage
+        if item.get('result') is not None:
+            await finish(index, item)
+        else:
+            await queues[0].put((index, item))
+
+    async def feed():
+        index = 0
+        if hasattr(source, "__aiter__"):
+            async for item in source:
+                await put(index, item)
+                index += 1
+        else:
+            for item in source:
+                await put(index, item)
+                index += 1
+        for _ in range(stages[0].concurrency):
+            await queues[0].put(_DONE)
+
+    async def take_batch(position: int, stage: Stage):
+        """Wait for one entry, then take whatever else is already queued up to the batch size"""
+        entry = await queues[position].get()
+        if entry is _DONE:
+            return [], True
+        entries = [entry]
+        while len(entries) < stage.batch_size:
+            try:
+                entry = queues[position].get_nowait()
+            except asyncio.QueueEmpty:
+                break
+            if entry is _DONE:
+                return entries, True
+            entries.append(entry)
+        return entries, False
+
+    async def worker(position: int, stage: Stage):
+        is_last = position == len(stages) - 1
+        done = False
+        while not done:
+            entries, done = await take_batch(position, stage)
+            if not entries:
+                return
+            indexes = [index for index, _ in entries]
+            items = [item for _, item in entries]
+
+            started = time.monotonic()
+            try:
+                if stage.batch_size > 1:
+                    items = await stage.func(items)
+                else:
+                    items = [await stage.func(items[0])]
+            except Exception as e:
+                logger.error(f"Pipeline stage '{stage.name}' failed: {str(e)}")
+                for item in items:
+                    item['result'] = on_error(item, stage, e)
+            stage.busy_seconds += time.monotonic() - started
+            stage.processed += len(items)
+
+            for index, item in zip(indexes, items):
+                if is_last or item.get('result') is not None:
+                    await finish(index, item)
+                else:
+                    # Blocks when the next stage is saturated (backpressure)
+                    await queues[position + 1].put((index, item))
+
+    async def run_stage(position: int, stage: Stage):
+        await asyncio.gather(*[worker(position, stage) for _ in range(stage.concurrency)])
+        if position + 1 < len(stages):
+            for _ in range(stages[position + 1].concurrency):
+                await queues[position + 1].put(_DONE)
+
+    started = time.monotonic()
+    tasks = [asyncio.ensure_future(feed())] + [
+        asyncio.ensure_future(run_stage(position, stage)) for position, stage in enumerate(stages)
+    ]
+    try:
+        await asyncio.gather(*tasks)
+    except BaseException:
+        # A failed source never sends _DONE, so the stage workers would wait on their queues forever
+        for task in tasks:
+            task.cancel()
+        await asyncio.gather(*tasks, return_exceptions=True)
+        raise
+
+    elapsed = time.monotonic() - started
+    logger.info(
+        f"Pipeline processed {finished_count} items in {elapsed:.2f}s: " +
+        ", ".join(f"{s.name}={s.processed} items/{s.busy_seconds:.2f}s busy (x{s.concurrency})" for s in stages)
+    )
+    return [finished[index] for index in sorted(finished)]
@@ -0,0 +1,431 @@
+"""
+Durable Ingestion Queue for Sen AI
+DB-backed job queue for batch resume ingestion. Jobs are keyed by batch_id and
+hold one row per file so that any number of worker processes can share the work.
+"""
+
+import os
+import logging
+from datetime import datetime, timedelta
+from typing import Dict, Any, Optional, List
+from sqlalchemy import Column, Integer, String, Boolean, DateTime, Text, ForeignKey, or_, and_, case, select
+from sqlalchemy.orm import relationship
+from database import Base, engine, SessionLocal
+
+# Configure logging
+logging.basicConfig(level=logging.INFO)
+logger = logging.getLogger(__name__)
+
+# A claimed file whose worker has not reported back within the lease is handed out again
+INGESTION_LEASE_SECONDS = int(os.environ.get("INGESTION_LEASE_SECONDS", "900"))
+INGESTION_MAX_ATTEMPTS = int(os.environ.get("INGESTION_MAX_ATTEMPTS", "3"))
+
+# File states
+QUEUED = "queued"
+PROCESSING = "processing"
+# Job state of an in-process job whose process stopped before finishing it
+FAILED = "failed"
+
+class IngestionJob(Base):
+    __tablename__ = "ingestion_jobs"
+
+    job_id = Column(Integer, primary_key=True, autoincrement=True)
+    batch_id = Column(String(36), unique=True, nullable=False)
+    user_id = Column(Integer, nullable=False, index=True)
+    status = Column(String(20), default=QUEUED)  # queued, processing, completed, failed
+    parse = Column(Boolean, default=True)
+    save_to_db = Column(Boolean, default=True)
+    duplicate_handling = Column(String(20), default="strict")
+    total_files = Column(Integer, default=0)
+    created_at = Column(DateTime, default=datetime.utcnow)
+    updated_at = Column(DateTime, default=datetime.utcnow, onupdate=datetime.utcnow)
+    finished_at = Column(DateTime, nullable=True)
+
+    # Relationship
+    files = relationship("IngestionJobFile", back_populates="job", cascade="all, delete-orphan",
+                         order_by="IngestionJobFile.position")
+
+class IngestionJobFile(Base):
+    __tablename__ = "ingestion_job_files"
+
+    file_id = Column(Integer, primary_key=True, autoincrement=True)
+    batch_id = Column(String(36), ForeignKey("ingestion_jobs.batch_id", ondelete="CASCADE"), nullable=False)
+    position = Column(Integer, default=0)
+    filename = Column(String(255))
+    staging_key = Column(String(1000), nullable=True)  # S3 key of the staged upload
+    status = Column(String(20), default=QUEUED, index=True)
+    attempts = Column(Integer, default=0)
+    locked_by = Column(String(100), nullable=True)
+    locked_at = Column(DateTime, nullable=True)
+    candidate_id = Column(Integer, nullable=True)
+    existing_candidate_id = Column(Integer, nullable=True)
+    message = Column(Text, nullable=True)
+    created_at = Column(DateTime, default=datetime.utcnow)
+    finished_at = Column(DateTime, nullable=True)
+
+    # Relationship
+    job = relationship("IngestionJob", back_populates="files")
+
+def init_queue_tables():
+    """Create the queue tables if they don't exist"""
+    Base.metadata.create_all(bind=engine, tables=[IngestionJob.__table__, IngestionJobFile.__table__])
+
+def enqueue_batch(batch_id: str, user_id: int, files: List[Dict[str, Any]], parse: bool = True,
+                  save_to_db: bool = True, duplicate_handling: str = "strict") -> bool:
+    """
+    Persist a batch ingestion job and its files in a single transaction
+
+    Args:
+        batch_id (str): Batch ID for this upload session
+        user_id (int): ID of the user uploading the files
+        files (list): Dicts with 'filename', 'staging_key' and optionally 'message'.
+                      Entries without a staging_key are recorded as already failed.
+        parse (bool): Whether to parse the resumes
+        save_to_db (bool): Whether to save candidates to the database
+        duplicate_handling (str): Duplicate handling mode
+
+    Returns:
+        bool: True if the job was queued, False otherwise
+    """
+    db = SessionLocal()
+    try:
+        job = IngestionJob(
+            batch_id=batch_id,
+            user_id=user_id,
+            status=QUEUED,
+            parse=parse,
+            save_to_db=save_to_db,
+            duplicate_handling=duplicate_handling,
+            total_files=len(files)
+        )
+        db.add(job)
+
+        now = datetime.utcnow()
+        staged_count = 0
+        for position, entry in enumerate(files):
+            staged = bool(entry.get('staging_key'))
+            staged_count += 1 if staged else 0
+            db.add(IngestionJobFile(
+                batch_id=batch_id,
+                position=position,
+                filename=entry.get('filename'),
+                staging_key=entry.get('staging_key'),
+                status=QUEUED if staged else "error",
+                message=None if staged else entry.get('message', "File could not be staged for processing"),
+                finished_at=None if staged else now
+            ))
+
+        # Nothing left for the workers if every file failed to stage
+        if staged_count == 0:
+            job.status = "completed"
+            job.finished_at = now
+
+        db.commit()
+        return True
+    except Exception as e:
+        db.rollback()
+        logger.error(f"Error enqueuing batch {batch_id}: {e}")
+        return False
+    finally:
+        db.close()
+
+def create_job(batch_id: str, user_id: int, parse: bool = True, save_to_db: bool = True,
+               duplicate_handling: str = "strict", total_files: int = 0) -> bool:
+    """
+    Create a job that is processed in-process rather than by the workers (e.g. archive imports).
+    Results are added with record_file_result as each file finishes; a job whose process
+    stops reporting is marked failed by fail_stale_jobs.
+
+    Returns:
+        bool: True if the job was created, False otherwise
+    """
+    db = SessionLocal()
+    try:
+        db.add(IngestionJob(
+            batch_id=batch_id,
+            user_id=user_id,
+            status=PROCESSING,
+            parse=parse,
+            save_to_db=save_to_db,
+            duplicate_handling=duplicate_handling,
+            total_files=total_files
+        ))
+        db.commit()
+        return True
+    except Exception as e:
+        db.rollback()
+        logger.error(f"Error creating ingestion job {batch_id}: {e}")
+        return False
+    finally:
+        db.close()
+
+def record_file_result(batch_id: str, position: int, filename: str, status: str, candidate_id: Optional[int] = None,
+                       existing_candidate_id: Optional[int] = None, message: Optional[str] = None):
+    """
+    Record a finished file of an in-process job, growing total_files as files are discovered.
+    Also touches the job's updated_at, which tells fail_stale_jobs the job is still running.
+    """
+    db = SessionLocal()
+    try:
+        now = datetime.utcnow()
+        db.add(IngestionJobFile(
+            batch_id=batch_id,
+            position=position,
+            filename=filename,
+            status=status,
+            candidate_id=candidate_id,
+            existing_candidate_id=existing_candidate_id,
+            message=message,
+            finished_at=now
+        ))
+        db.query(IngestionJob).filter(IngestionJob.batch_id == batch_id).update({
+            IngestionJob.total_files: case((IngestionJob.total_files < position + 1, position + 1), else_=IngestionJob.total_files),
+            IngestionJob.updated_at: now
+        }, synchronize_session=False)
+        db.commit()
+    except Exception as e:
+        db.rollback()
+        logger.error(f"Error recording result for {filename} in batch {batch_id}: {e}")
+    finally:
+        db.close()
+
+def finish_job(batch_id: str, total_files: int, status: str = "completed"):
+    """Mark an in-process job completed once its last file has been recorded (or failed if it stopped early)"""
+    db = SessionLocal()
+    try:
+        job = db.query(IngestionJob).filter(IngestionJob.batch_id == batch_id).first()
+        if job:
+            job.status = status
+            # A failed job keeps the member count of the archive, not just the files it got to
+            job.total_files = total_files if status == "completed" else max(job.total_files or 0, total_files)
+            job.finished_at = datetime.utcnow()
+        db.commit()
+    except Exception as e:
+        db.rollback()
+        logger.error(f"Error finishing ingestion job {batch_id}: {e}")
+    finally:
+        db.close()
+
+def fail_stale_jobs() -> int:
+    """
+    Mark in-process jobs failed when their process has stopped: still processing, with no
+    files left for the workers, and no file recorded within INGESTION_LEASE_SECONDS
+    (e.g. an archive import whose API process restarted). Their recorded files are kept.
+
+    Returns:
+        int: Number of jobs marked failed
+    """
+    db = SessionLocal()
+    try:
+        now = datetime.utcnow()
+        pending_files = select(IngestionJobFile.file_id).where(
+            IngestionJobFile.batch_id == IngestionJob.batch_id,
+            IngestionJobFile.status.in_([QUEUED, PROCESSING])
+        )
+        failed = db.query(IngestionJob).filter(
+            IngestionJob.status == PROCESSING,
+            IngestionJob.updated_at < now - timedelta(seconds=INGESTION_LEASE_SECONDS),
+            ~pending_files.exists()
+        ).update({IngestionJob.status: FAILED, IngestionJob.finished_at: now}, synchronize_session=False)
+        db.commit()
+        if failed:
+            logger.warning(f"Marked {failed} abandoned ingestion jobs as failed")
+        return failed
+    except Exception as e:
+        db.rollback()
+        logger.error(f"Error failing stale ingestion jobs: {e}")
+        return 0
+    finally:
+        db.close()
+
+def delete_staged_file(staging_key: Optional[str]):
+    """Delete the staged S3 copy of a file whose result is final"""
+    if not staging_key:
+        return
+    from s3_storage import delete_file_from_s3
+    if not delete_file_from_s3(staging_key):
+        logger.warning(f"Could not delete staged file {staging_key}")
+
+def claim_next_file(worker_id: str) -> Optional[Dict[str, Any]]:
+    """
+    Claim the oldest queued file (or one whose lease expired) for processing
+
+    Uses SELECT ... FOR UPDATE SKIP LOCKED so concurrent workers never claim the same row.
+
+    Returns:
+        dict: The claimed file and its job settings, None if the queue is empty
+    """
+    db = SessionLocal()
+    try:
+        while True:
+            lease_expired = datetime.utcnow() - timedelta(seconds=INGESTION_LEASE_SECONDS)
+            job_file = (
+                db.query(IngestionJobFile)
+                .filter(or_(
+                    IngestionJobFile.status == QUEUED,
+                    and_(IngestionJobFile.status == PROCESSING, IngestionJobFile.locked_at < lease_expired)
+                ))
+                .order_by(IngestionJobFile.file_id)
+                .with_for_update(skip_locked=True)
+                .first()
+            )
+
+            if not job_file:
+                db.commit()
+                return None
+
+            # Give up on files that keep killing workers and look for the next one
+            if job_file.attempts >= INGESTION_MAX_ATTEMPTS:
+                job_file.status = "error"
+                job_file.message = f"Gave up after {job_file.attempts} attempts"
+                job_file.finished_at = datetime.utcnow()
+                job_file.locked_by = None
+                job = (
+                    db.query(IngestionJob)
+                    .filter(IngestionJob.batch_id == job_file.batch_id)
+                    .with_for_update()
+                    .first()
+                )
+                _refresh_job_status(db, job)
+                db.commit()
+                delete_staged_file(job_file.staging_key)
+                continue
+
+            job_file.status = PROCESSING
+            job_file.attempts = (job_file.attempts or 0) + 1
+            job_file.locked_by = worker_id
+            job_file.locked_at = datetime.utcnow()
+            # Conditional update so a stale read can't undo a status another worker just set
+            db.query(IngestionJob).filter(
+                IngestionJob.batch_id == job_file.batch_id,
+                IngestionJob.status == QUEUED
+            ).update({IngestionJob.status: PROCESSING}, synchronize_session=False)
+            job = db.query(IngestionJob).filter(IngestionJob.batch_id == job_file.batch_id).first()
+
+            claimed = {
+                "file_id": job_file.file_id,
+                "batch_id": job_file.batch_id,
+                "filename": job_file.filename,
+                "staging_key": job_file.staging_key,
+                "attempts": job_file.attempts,
+                "user_id": job.user_id if job else None,
+                "parse": job.parse if job else True,
+                "save_to_db": job.save_to_db if job else True,
+                "duplicate_handling": job.duplicate_handling if job else "strict"
+            }
+            db.commit()
+            return claimed
+    except Exception as e:
+        db.rollback()
+        logger.error(f"Error claiming ingestion file: {e}")
+        return None
+    finally:
+        db.close()
+
+def complete_file(file_id: int, worker_id: str, status: str, candidate_id: Optional[int] = None,
+                  existing_candidate_id: Optional[int] = None, message: Optional[str] = None) -> bool:
+    """
+    Record the result of a processed file and update the job status
+
+    Returns:
+        bool: True if the result was recorded, False if the lease was lost to another worker
+    """
+    db = SessionLocal()
+    try:
+        job_file = (
+            db.query(IngestionJobFile)
+            .filter(IngestionJobFile.file_id == file_id)
+            .with_for_update()
+            .first()
+        )
+        if not job_file or job_file.locked_by != worker_id or job_file.status != PROCESSING:
+            db.commit()
+            logger.warning(f"Lease on ingestion file {file_id} was lost, discarding result")
+            return False
+
+        job_file.status = status
+        job_file.candidate_id = candidate_id
+        job_file.existing_candidate_id = existing_candidate_id
+        job_file.message = message
+        job_file.finished_at = datetime.utcnow()
+        job_file.locked_by = None
+
+        job = (
+            db.query(IngestionJob)
+            .filter(IngestionJob.batch_id == job_file.batch_id)
+            .with_for_update()
+            .first()
+        )
+        _refresh_job_status(db, job)
+        db.commit()
+        return True
+    except Exception as e:
+        db.rollback()
+        logger.error(f"Error completing ingestion file {file_id}: {e}")
+        return False
+    finally:
+        db.close()
+
+def _refresh_job_status(db, job: Optional[IngestionJob]):
+    """Mark the job completed once none of its files are pending"""
+    if not job:
+        return
+    db.flush()
+    pending = db.query(IngestionJobFile).filter(
+        IngestionJobFile.batch_id == job.batch_id,
+        IngestionJobFile.status.in_([QUEUED, PROCESSING])
+    ).count()
+    if pending == 0:
+        job.status = "completed"
+        job.finished_at = datetime.utcnow()
+
+def get_job_status(batch_id: str, user_id: int) -> Optional[Dict[str, Any]]:
+    """
+    Get the status of a batch ingestion job with per-file results
+
+    Args:
+        batch_id (str): Batch ID of the job
+        user_id (int): ID of the user who owns the job
+
+    Returns:
+        dict: Job status and per-file results, None if not found for this user
+    """
+    db = SessionLocal()
+    try:
+        job = db.query(IngestionJob).filter(
+            IngestionJob.batch_id == batch_id,
+            IngestionJob.user_id == user_id
+        ).first()
+
+        if not job:
+            return None
+
+        results = [
+            {
+                "filename": f.filename,
+                "status": f.status,
+                "candidate_id": f.candidate_id,
+                "existing_candidate_id": f.existing_candidate_id,
+                "message": f.message
+            }
+            for f in job.files
+        ]
+
+        return {
+            "batch_id": job.batch_id,
+            "status": job.status,
+            "total_files": job.total_files,
+            "queued": len([r for r in results if r["status"] == QUEUED]),
+            "processing": len([r for r in results if r["status"] == PROCESSING]),
+            "successful": len([r for r in results if r["status"] == "success"]),
+            "failed": len([r for r in results if r["status"] == "error"]),
+            "duplicates": len([r for r in results if r["status"] == "duplicate"]),
+            "created_at": job.created_at.isoformat() if job.created_at else None,
+            "finished_at": job.finished_at.isoformat() if job.finished_at else None,
+            "results": results
+        }
+    except Exception as e:
+        logger.error(f"Error getting ingestion job status: {e}")
+        return None
+    finally:
+        db.close()
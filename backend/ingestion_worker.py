@@ -0,0 +1,141 @@
+"""
+Ingestion Worker for Sen AI
+Processes batch ingestion jobs queued by POST /upload-resumes-batch/async/.
+Run it separately from the API and scale by adding processes or hosts:
+
+    python ingestion_worker.py --processes 4
+"""
+
+import os
+import time
+import signal
+import socket
+import logging
+import argparse
+import tempfile
+import multiprocessing
+from dotenv import load_dotenv
+
+# Load environment variables
+load_dotenv()
+
+# Configure logging
+logging.basicConfig(level=logging.INFO)
+logger = logging.getLogger(__name__)
+
+# Seconds to wait before polling again when the queue is empty
+INGESTION_POLL_INTERVAL = float(os.environ.get("INGESTION_POLL_INTERVAL", "2.0"))
+
+_stop_requested = False
+
+def _request_stop(signum, frame):
+    global _stop_requested
+    _stop_requested = True
+
+def process_claimed_file(claimed, worker_id):
+    """
+    Download a claimed file from staging, process it and record the result
+
+    Args:
+        claimed (dict): File claimed from the queue (see ingestion_queue.claim_next_file)
+        worker_id (str): ID of the worker holding the lease
+    """
+    from api import process_resume_file, DuplicateHandling
+    from ingestion_queue import complete_file, delete_staged_file
+    from s3_storage import download_file_from_s3
+
+    filename = claimed['filename']
+    file_extension = filename.split('.')[-1].lower()
+
+    with tempfile.NamedTemporaryFile(delete=False, suffix=f".{file_extension}") as temp_file:
+        temp_file_path = temp_file.name
+
+    try:
+        if not download_file_from_s3(claimed['staging_key'], temp_file_path):
+            if complete_file(claimed['file_id'], worker_id, "error", message="Failed to download staged file"):
+                delete_staged_file(claimed['staging_key'])
+            return
+
+        result = process_resume_file(
+            temp_file_path,
+            filename,
+            claimed['batch_id'],
+            claimed['user_id'],
+            parse=claimed['parse'],
+            save_to_db=claimed['save_to_db'],
+            duplicate_handling=DuplicateHandling(claimed['duplicate_handling'])
+        )
+
+        recorded = complete_file(
+            claimed['file_id'],
+            worker_id,
+            result.status,
+            candidate_id=result.candidate_id,
+            existing_candidate_id=result.existing_candidate_id,
+            message=result.message
+        )
+
+        # The staged copy is no longer needed once the result is durable
+        if recorded:
+            delete_staged_file(claimed['staging_key'])
+
+        logger.info(f"[{worker_id}] {filename} (batch {claimed['batch_id']}): {result.status}")
+    finally:
+        if os.path.exists(temp_file_path):
+            os.unlink(temp_file_path)
+
+def run_worker():
+    """Claim and process queued files until asked to stop"""
+    from ingestion_queue import claim_next_file, fail_stale_jobs, INGESTION_LEASE_SECONDS
+
+    signal.signal(signal.SIGTERM, _request_stop)
+    signal.signal(signal.SIGINT, _request_stop)
+
+    worker_id = f"{socket.gethostname()}:{os.getpid()}"
+    logger.info(f"Ingestion worker {worker_id} started")
+
+    last_sweep = 0.0
+    while not _stop_requested:
+        claimed = claim_next_file(worker_id)
+        if not claimed:
+            # Idle: also fail archive imports abandoned by a stopped API process
+            if time.monotonic() - last_sweep >= INGESTION_LEASE_SECONDS:
+                fail_stale_jobs()
+                last_sweep = time.monotonic()
+            time.sleep(INGESTION_POLL_INTERVAL)
+            continue
+
+        try:
+            process_claimed_file(claimed, worker_id)
+        except Exception as e:
+            # Leave the file leased; it is retried once the lease expires
+            logger.error(f"[{worker_id}] Error processing {claimed['filename']}: {str(e)}")
+
+    logger.info(f"Ingestion worker {worker_id} stopped")
+
+def main():
+    parser = argparse.ArgumentParser(description="Process queued batch ingestion jobs")
+    parser.add_argument("--processes", type=int, default=1, help="Number of worker processes to run")
+    args = parser.parse_args()
+
+    from ingestion_queue import init_queue_tables
+    init_queue_tables()
+
+    if args.processes <= 1:
+        run_worker()
+        return
+
+    # Spawn rather than fork so each worker builds its own DB and HTTP clients
+    context = multiprocessing.get_context("spawn")
+    workers = [context.Process(target=run_worker, name=f"ingestion-worker-{i}") for i in range(args.processes)]
+    for worker in workers:
+        worker.start()
+
+    # Workers handle SIGINT/SIGTERM themselves; just wait for them to drain
+    signal.signal(signal.SIGINT, signal.SIG_IGN)
+    signal.signal(signal.SIGTERM, lambda signum, frame: [w.terminate() for w in workers])
+    for worker in workers:
+        worker.join()
+
+if __name__ == "__main__":
+    main()
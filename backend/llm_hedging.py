@@ -0,0 +1,174 @@
+"""
+Hedged LLM Requests for Sen AI
+Issues a backup request when an LLM call outlives the observed latency percentile
+and returns whichever response arrives first
+"""
+
+import os
+import logging
+import threading
+import time
+import concurrent.futures
+from collections import deque
+from typing import Dict, Any, Callable
+from dotenv import load_dotenv
+
+# Load environment variables
+load_dotenv()
+
+# Configure logging
+logging.basicConfig(level=logging.INFO)
+logger = logging.getLogger(__name__)
+
+# Hedging configuration (opt-in)
+LLM_HEDGING_ENABLED = os.environ.get("LLM_HEDGING_ENABLED", "false").lower() in ("1", "true", "yes")
+LLM_HEDGE_PERCENTILE = float(os.environ.get("LLM_HEDGE_PERCENTILE", "95"))        # Latency percentile used as the hedge deadline
+LLM_HEDGE_BUDGET = float(os.environ.get("LLM_HEDGE_BUDGET", "0.1"))               # Max fraction of calls allowed to hedge
+LLM_HEDGE_MIN_DELAY = float(os.environ.get("LLM_HEDGE_MIN_DELAY", "1.0"))         # Never hedge earlier than this (seconds)
+LLM_HEDGE_DEFAULT_DELAY = float(os.environ.get("LLM_HEDGE_DEFAULT_DELAY", "10.0"))  # Deadline used until enough samples exist
+LLM_HEDGE_MIN_SAMPLES = int(os.environ.get("LLM_HEDGE_MIN_SAMPLES", "20"))
+LLM_HEDGE_MAX_WORKERS = int(os.environ.get("LLM_HEDGE_MAX_WORKERS", "16"))
+
+class HedgedRequester:
+    """
+    Runs blocking LLM calls with an optional hedge request.
+
+    If the primary call has not returned by the configured latency percentile,
+    a duplicate call is issued and the first successful response wins. The
+    losing call cannot be cancelled mid-flight; its result is discarded.
+    """
+
+    def __init__(self, enabled: bool = LLM_HEDGING_ENABLED, percentile: float = LLM_HEDGE_PERCENTILE,
+                 budget: float = LLM_HEDGE_BUDGET, min_delay: float = LLM_HEDGE_MIN_DELAY,
+                 default_delay: float = LLM_HEDGE_DEFAULT_DELAY, min_samples: int = LLM_HEDGE_MIN_SAMPLES,
+                 max_workers: int = LLM_HEDGE_MAX_WORKERS, window: int = 500):
+        self.enabled = enabled
+        self.percentile = percentile
+        self.budget = budget
+        self.min_delay = min_delay
+        self.default_delay = default_delay
+        self.min_samples = min_samples
+        self.max_workers = max_workers
+
+        self._latencies = deque(maxlen=window)
+        self._lock = threading.Lock()
+        self._executor = None
+
+        # Metrics
+        self._calls = 0
+        self._hedges_fired = 0
+        self._hedge_wins = 0
+        self._budget_denied = 0
+        self._errors = 0
+
+    def _get_executor(self) -> concurrent.futures.ThreadPoolExecutor:
+        """Create the worker pool lazily so disabled hedging costs nothing"""
+        with self._lock:
+            if self._executor is None:
+                self._executor = concurrent.futures.ThreadPoolExecutor(
+                    max_workers=self.max_workers, thread_name_prefix="llm-hedge"
+                )
+            return self._executor
+
+    def _record_latency(self, started_at: float):
+        def callback(future):
+            if not future.cancelled() and future.exception() is None:
+                with self._lock:
+                    self._latencies.append(time.monotonic() - started_at)
+        return callback
+
+    def _submit(self, func: Callable, *args, **kwargs) -> concurrent.futures.Future:
+        future = self._get_executor().submit(func, *args, **kwargs)
+        future.add_done_callback(self._record_latency(time.monotonic()))
+        return future
+
+    def hedge_delay(self) -> float:
+        """Current hedge deadline in seconds, derived from recent call latencies"""
+        with self._lock:
+            samples = sorted(self._latencies)
+
+        if len(samples) < self.min_samples:
+            return max(self.min_delay, self.default_delay)
+
+        index = min(len(samples) - 1, int(round(self.percentile / 100.0 * (len(samples) - 1))))
+        return max(self.min_delay, samples[index])
+
+    def _try_acquire_budget(self) -> bool:
+        with self._lock:
+            if self._hedges_fired + 1 > self.budget * self._calls:
+                self._budget_denied += 1
+                return False
+            self._hedges_fired += 1
+            return True
+
+    def call(self, func: Callable, *args, **kwargs):
+        """
+        Call func(*args, **kwargs), hedging it if it runs past the deadline
+
+        Returns:
+            The result of whichever call finished first successfully.
+            If every issued call fails, the primary call's exception is raised.
+        """
+        if not self.enabled:
+            return func(*args, **kwargs)
+
+        with self._lock:
+            self._calls += 1
+
+        primary = self._submit(func, *args, **kwargs)
+        done, _ = concurrent.futures.wait([primary], timeout=self.hedge_delay())
+        if done or not self._try_acquire_budget():
+            try:
+                return primary.result()
+            except Exception:
+                with self._lock:
+                    self._errors += 1
+                raise
+
+        logger.info("LLM call exceeded hedge deadline, issuing hedge request")
+        hedge = self._submit(func, *args, **kwargs)
+
+        pending = {primary, hedge}
+        first_error = None
+        while pending:
+            done, pending = concurrent.futures.wait(pending, return_when=concurrent.futures.FIRST_COMPLETED)
+            for future in done:
+                if future.exception() is None:
+                    if future is hedge:
+                        with self._lock:
+                            self._hedge_wins += 1
+                    return future.result()
+                if future is primary or first_error is None:
+                    first_error = future.exception()
+
+        with self._lock:
+            self._errors += 1
+        raise first_error
+
+    def get_stats(self) -> Dict[str, Any]:
+        """Get hedging statistics"""
+        with self._lock:
+            calls = self._calls
+            hedges_fired = self._hedges_fired
+            hedge_wins = self._hedge_wins
+            budget_denied = self._budget_denied
+            errors = self._errors
+            samples = len(self._latencies)
+
+        return {
+            "enabled": self.enabled,
+            "percentile": float(self.percentile),
+            "budget": float(self.budget),
+            "current_delay_seconds": float(self.hedge_delay()),
+            "latency_samples": int(samples),
+            "calls": int(calls),
+            "hedges_fired": int(hedges_fired),
+            "hedge_wins": int(hedge_wins),
+            "budget_denied": int(budget_denied),
+            "errors": int(errors),
+            "hedge_rate": float(hedges_fired / calls) if calls > 0 else 0.0,
+            "hedge_win_rate": float(hedge_wins / hedges_fired) if hedges_fired > 0 else 0.0
+        }
+
+# Global hedged requester used for resume parsing calls
+llm_hedger = HedgedRequester()
@@ -0,0 +1,420 @@
+"""
+Location Gazetteer for Sen AI
+Parses the free-text location of a resume ("Bengaluru, KA", "San Francisco Bay Area",
+"Austin, TX, USA") into canonical city, region and country names using a local gazetteer,
+with no external geocoding service. The result is stored on candidates (see
+database.Candidate) at save time, so location filters and facet counts are index seeks.
+
+Places not listed here leave the columns empty; location filters then fall back to the
+word-prefix search index. Normalise the locations of existing candidates with:
+
+    python location_gazetteer.py --backfill
+"""
+
+import re
+import logging
+import argparse
+from typing import Dict, List, Optional, Tuple
+
+from search_index import normalize
+
+# Configure logging
+logging.basicConfig(level=logging.INFO)
+logger = logging.getLogger(__name__)
+
+# Country -> other names seen in resumes
+COUNTRIES = {
+    "United States": ["us", "usa", "united states of america"],
+    "Canada": [],
+    "Mexico": ["méxico"],
+    "Brazil": ["brasil"],
+    "Argentina": [],
+    "Chile": [],
+    "Colombia": [],
+    "United Kingdom": ["uk", "gb", "great britain", "britain"],
+    "Ireland": ["republic of ireland"],
+    "France": [],
+    "Germany": ["deutschland"],
+    "Netherlands": ["the netherlands", "holland"],
+    "Belgium": [],
+    "Switzerland": [],
+    "Austria": [],
+    "Spain": ["españa"],
+    "Portugal": [],
+    "Italy": ["italia"],
+    "Sweden": [],
+    "Norway": [],
+    "Denmark": [],
+    "Finland": [],
+    "Estonia": [],
+    "Poland": [],
+    "Czech Republic": ["czechia"],
+    "Hungary": [],
+    "Romania": [],
+    "Ukraine": [],
+    "Greece": [],
+    "Turkey": ["türkiye"],
+    "Israel": [],
+    "United Arab Emirates": ["uae", "emirates"],
+    "Saudi Arabia": ["ksa"],
+    "Egypt": [],
+    "Nigeria": [],
+    "Kenya": [],
+    "South Africa": [],
+    "India": ["bharat"],
+    "Pakistan": [],
+    "Bangladesh": [],
+    "Sri Lanka": [],
+    "Nepal": [],
+    "China": ["prc"],
+    "Hong Kong": [],
+    "Taiwan": [],
+    "Japan": [],
+    "South Korea": ["korea", "republic of korea"],
+    "Singapore": [],
+    "Malaysia": [],
+    "Indonesia": [],
+    "Philippines": [],
+    "Vietnam": ["viet nam"],
+    "Thailand": [],
+    "Australia": [],
+    "New Zealand": ["nz"],
+}
+
+# Country -> region -> abbreviations and other names
+REGIONS = {
+    "United States": {
+        "Alabama": ["al"], "Alaska": ["ak"], "Arizona": ["az"], "Arkansas": ["ar"],
+        "California": ["ca", "calif"], "Colorado": ["co"], "Connecticut": ["ct"], "Delaware": ["de"],
+        "District of Columbia": ["dc"], "Florida": ["fl"], "Georgia": ["ga"], "Hawaii": ["hi"],
+        "Idaho": ["id"], "Illinois": ["il"], "Indiana": ["in"], "Iowa": ["ia"], "Kansas": ["ks"],
+        "Kentucky": ["ky"], "Louisiana": ["la"], "Maine": ["me"], "Maryland": ["md"],
+        "Massachusetts": ["ma"], "Michigan": ["mi"], "Minnesota": ["mn"], "Mississippi": ["ms"],
+        "Missouri": ["mo"], "Montana": ["mt"], "Nebraska": ["ne"], "Nevada": ["nv"],
+        "New Hampshire": ["nh"], "New Jersey": ["nj"], "New Mexico": ["nm"], "New York": ["ny"],
+        "North Carolina": ["nc"], "North Dakota": ["nd"], "Ohio": ["oh"], "Oklahoma": ["ok"],
+        "Oregon": ["or"], "Pennsylvania": ["pa"], "Rhode Island": ["ri"], "South Carolina": ["sc"],
+        "South Dakota": ["sd"], "Tennessee": ["tn"], "Texas": ["tx"], "Utah": ["ut"], "Vermont": ["vt"],
+        "Virginia": ["va"], "Washington": ["wa", "washington state"], "West Virginia": ["wv"],
+        "Wisconsin": ["wi"], "Wyoming": ["wy"],
+    },
+    "Canada": {
+        "Alberta": ["ab"], "British Columbia": ["bc"], "Manitoba": ["mb"], "New Brunswick": ["nb"],
+        "Newfoundland and Labrador": ["nl"], "Nova Scotia": ["ns"], "Ontario": ["on"],
+        "Prince Edward Island": ["pe", "pei"], "Quebec": ["qc", "québec"], "Saskatchewan": ["sk"],
+    },
+    "United Kingdom": {
+        "England": [], "Scotland": [], "Wales": [], "Northern Ireland": [],
+    },
+    "India": {
+        "Andhra Pradesh": ["ap"], "Delhi": ["nct", "new delhi"], "Gujarat": ["gj"], "Haryana": ["hr"],
+        "Karnataka": ["ka"], "Kerala": ["kl"], "Madhya Pradesh": ["mp"], "Maharashtra": ["mh"],
+        "Punjab": ["pb"], "Rajasthan": ["rj"], "Tamil Nadu": ["tn"], "Telangana": ["ts", "tg"],
+        "Uttar Pradesh": ["up"], "West Bengal": ["wb"],
+    },
+    "Australia": {
+        "New South Wales": ["nsw"], "Victoria": ["vic"], "Queensland": ["qld"],
+        "Western Australia": ["wa"], "South Australia": ["sa"], "Tasmania": ["tas"],
+        "Australian Capital Territory": ["act"], "Northern Territory": ["nt"],
+    },
+    "Germany": {
+        "Bavaria": ["bayern"], "Berlin": [], "Hamburg": [], "Hesse": ["hessen"],
+        "North Rhine-Westphalia": ["nrw", "nordrhein-westfalen"], "Baden-Württemberg": ["bw"],
+    },
+}
+
+# (city, region, country) -> other names
+CITIES = {
+    # United States
+    ("New York", "New York", "United States"): ["nyc", "new york city", "manhattan", "brooklyn"],
+    ("San Francisco", "California", "United States"): ["sf", "san francisco bay area", "bay area"],
+    ("San Jose", "California", "United States"): [],
+    ("Palo Alto", "California", "United States"): [],
+    ("Mountain View", "California", "United States"): [],
+    ("Sunnyvale", "California", "United States"): [],
+    ("Santa Clara", "California", "United States"): [],
+    ("Oakland", "California", "United States"): [],
+    ("Los Angeles", "California", "United States"): ["la", "l.a."],
+    ("San Diego", "California", "United States"): [],
+    ("Sacramento", "California", "United States"): [],
+    ("Seattle", "Washington", "United States"): [],
+    ("Redmond", "Washington", "United States"): [],
+    ("Bellevue", "Washington", "United States"): [],
+    ("Portland", "Oregon", "United States"): [],
+    ("Austin", "Texas", "United States"): [],
+    ("Dallas", "Texas", "United States"): [],
+    ("Houston", "Texas", "United States"): [],
+    ("San Antonio", "Texas", "United States"): [],
+    ("Chicago", "Illinois", "United States"): [],
+    ("Boston", "Massachusetts", "United States"): [],
+    ("Cambridge", "Massachusetts", "United States"): [],
+    ("Washington", "District of Columbia", "United States"): ["washington dc", "washington d.c."],
+    ("Atlanta", "Georgia", "United States"): [],
+    ("Miami", "Florida", "United States"): [],
+    ("Orlando", "Florida", "United States"): [],
+    ("Tampa", "Florida", "United States"): [],
+    ("Denver", "Colorado", "United States"): [],
+    ("Boulder", "Colorado", "United States"): [],
+    ("Phoenix", "Arizona", "United States"): [],
+    ("Salt Lake City", "Utah", "United States"): ["slc"],
+    ("Las Vegas", "Nevada", "United States"): [],
+    ("Minneapolis", "Minnesota", "United States"): [],
+    ("Detroit", "Michigan", "United States"): [],
+    ("Philadelphia", "Pennsylvania", "United States"): ["philly"],
+    ("Pittsburgh", "Pennsylvania", "United States"): [],
+    ("Raleigh", "North Carolina", "United States"): [],
+    ("Charlotte", "North Carolina", "United States"): [],
+    ("Nashville", "Tennessee", "United States"): [],
+    ("Columbus", "Ohio", "United States"): [],
+    ("St. Louis", "Missouri", "United States"): ["saint louis"],
+    ("Baltimore", "Maryland", "United States"): [],
+    ("Jersey City", "New Jersey", "United States"): [],
+    # Canada
+    ("Toronto", "Ontario", "Canada"): ["gta"],
+    ("Ottawa", "Ontario", "Canada"): [],
+    ("Waterloo", "Ontario", "Canada"): [],
+    ("Vancouver", "British Columbia", "Canada"): [],
+    ("Montreal", "Quebec", "Canada"): ["montréal"],
+    ("Calgary", "Alberta", "Canada"): [],
+    ("Edmonton", "Alberta", "Canada"): [],
+    # Latin America
+    ("Mexico City", None, "Mexico"): ["cdmx", "ciudad de mexico"],
+    ("Guadalajara", None, "Mexico"): [],
+    ("São Paulo", None, "Brazil"): ["sao paulo"],
+    ("Rio de Janeiro", None, "Brazil"): [],
+    ("Buenos Aires", None, "Argentina"): [],
+    ("Santiago", None, "Chile"): [],
+    ("Bogotá", None, "Colombia"): ["bogota"],
+    ("Medellín", None, "Colombia"): ["medellin"],
+    # Europe
+    ("London", "England", "United Kingdom"): ["greater london"],
+    ("Manchester", "England", "United Kingdom"): [],
+    ("Birmingham", "England", "United Kingdom"): [],
+    ("Cambridge", "England", "United Kingdom"): [],
+    ("Oxford", "England", "United Kingdom"): [],
+    ("Bristol", "England", "United Kingdom"): [],
+    ("Edinburgh", "Scotland", "United Kingdom"): [],
+    ("Glasgow", "Scotland", "United Kingdom"): [],
+    ("Cardiff", "Wales", "United Kingdom"): [],
+    ("Belfast", "Northern Ireland", "United Kingdom"): [],
+    ("Dublin", None, "Ireland"): [],
+    ("Paris", None, "France"): [],
+    ("Lyon", None, "France"): [],
+    ("Berlin", "Berlin", "Germany"): [],
+    ("Munich", "Bavaria", "Germany"): ["münchen", "munchen"],
+    ("Hamburg", "Hamburg", "Germany"): [],
+    ("Frankfurt", "Hesse", "Germany"): ["frankfurt am main"],
+    ("Cologne", "North Rhine-Westphalia", "Germany"): ["köln", "koln"],
+    ("Stuttgart", "Baden-Württemberg", "Germany"): [],
+    ("Amsterdam", None, "Netherlands"): [],
+    ("Rotterdam", None, "Netherlands"): [],
+    ("Brussels", None, "Belgium"): ["bruxelles"],
+    ("Zurich", None, "Switzerland"): ["zürich"],
+    ("Geneva", None, "Switzerland"): ["genève", "geneve"],
+    ("Vienna", None, "Austria"): ["wien"],
+    ("Madrid", None, "Spain"): [],
+    ("Barcelona", None, "Spain"): [],
+    ("Lisbon", None, "Portugal"): ["lisboa"],
+    ("Porto", None, "Portugal"): [],
+    ("Milan", None, "Italy"): ["milano"],
+    ("Rome", None, "Italy"): ["roma"],
+    ("Stockholm", None, "Sweden"): [],
+    ("Oslo", None, "Norway"): [],
+    ("Copenhagen", None, "Denmark"): ["københavn"],
+    ("Helsinki", None, "Finland"): [],
+    ("Tallinn", None, "Estonia"): [],
+    ("Warsaw", None, "Poland"): ["warszawa"],
+    ("Krakow", None, "Poland"): ["kraków", "cracow"],
+    ("Prague", None, "Czech Republic"): ["praha"],
+    ("Budapest", None, "Hungary"): [],
+    ("Bucharest", None, "Romania"): ["bucurești"],
+    ("Kyiv", None, "Ukraine"): ["kiev"],
+    ("Athens", None, "Greece"): [],
+    ("Istanbul", None, "Turkey"): [],
+    # Middle East and Africa
+    ("Tel Aviv", None, "Israel"): ["tel aviv-yafo"],
+    ("Dubai", None, "United Arab Emirates"): [],
+    ("Abu Dhabi", None, "United Arab Emirates"): [],
+    ("Riyadh", None, "Saudi Arabia"): [],
+    ("Cairo", None, "Egypt"): [],
+    ("Lagos", None, "Nigeria"): [],
+    ("Nairobi", None, "Kenya"): [],
+    ("Cape Town", None, "South Africa"): [],
+    ("Johannesburg", None, "South Africa"): ["joburg"],
+    # Asia
+    ("Bengaluru", "Karnataka", "India"): ["bangalore", "blr"],
+    ("Mumbai", "Maharashtra", "India"): ["bombay", "navi mumbai"],
+    ("Pune", "Maharashtra", "India"): [],
+    ("New Delhi", "Delhi", "India"): ["delhi", "delhi ncr", "ncr"],
+    ("Gurugram", "Haryana", "India"): ["gurgaon"],
+    ("Noida", "Uttar Pradesh", "India"): [],
+    ("Hyderabad", "Telangana", "India"): [],
+    ("Chennai", "Tamil Nadu", "India"): ["madras"],
+    ("Kolkata", "West Bengal", "India"): ["calcutta"],
+    ("Ahmedabad", "Gujarat", "India"): [],
+    ("Kochi", "Kerala", "India"): ["cochin"],
+    ("Thiruvananthapuram", "Kerala", "India"): ["trivandrum"],
+    ("Jaipur", "Rajasthan", "India"): [],
+    ("Chandigarh", "Punjab", "India"): [],
+    ("Indore", "Madhya Pradesh", "India"): [],
+    ("Karachi", None, "Pakistan"): [],
+    ("Lahore", None, "Pakistan"): [],
+    ("Islamabad", None, "Pakistan"): [],
+    ("Dhaka", None, "Bangladesh"): [],
+    ("Colombo", None, "Sri Lanka"): [],
+    ("Kathmandu", None, "Nepal"): [],
+    ("Beijing", None, "China"): [],
+    ("Shanghai", None, "China"): [],
+    ("Shenzhen", None, "China"): [],
+    ("Hong Kong", None, "Hong Kong"): [],
+    ("Taipei", None, "Taiwan"): [],
+    ("Tokyo", None, "Japan"): [],
+    ("Osaka", None, "Japan"): [],
+    ("Seoul", None, "South Korea"): [],
+    ("Singapore", None, "Singapore"): [],
+    ("Kuala Lumpur", None, "Malaysia"): ["kl"],
+    ("Jakarta", None, "Indonesia"): [],
+    ("Manila", None, "Philippines"): ["metro manila"],
+    ("Ho Chi Minh City", None, "Vietnam"): ["saigon", "hcmc"],
+    ("Hanoi", None, "Vietnam"): [],
+    ("Bangkok", None, "Thailand"): [],
+    # Oceania
+    ("Sydney", "New South Wales", "Australia"): [],
+    ("Melbourne", "Victoria", "Australia"): [],
+    ("Brisbane", "Queensland", "Australia"): [],
+    ("Perth", "Western Australia", "Australia"): [],
+    ("Adelaide", "South Australia", "Australia"): [],
+    ("Canberra", "Australian Capital Territory", "Australia"): [],
+    ("Auckland", None, "New Zealand"): [],
+    ("Wellington", None, "New Zealand"): [],
+}
+
+# Aliases this short are abbreviations, only matched as a whole part of the location: a city
+# or country first ("NYC", "USA"), a region or country after it ("Austin, TX"). Never as a
+# word inside a part, so "in" is Indiana only in "Indianapolis, IN".
+SHORT_ALIAS_LENGTH = 3
+# Longest place name in words
+MAX_NAME_WORDS = 4
+
+_PART_SEPARATOR = re.compile(r"[,;/|()]|\s+-\s+|\s+–\s+")
+
+def place_key(name) -> str:
+    """Lookup key of a place name: accents and case folded, punctuation dropped ("St. Louis" -> "st louis")"""
+    folded = normalize(str(name)).replace(".", "")
+    return " ".join(re.sub(r"[^a-z0-9]+", " ", folded).split())
+
+# Key -> places it names, as (level, city, region, country) with level 'city', 'region' or 'country'
+_PLACES_BY_KEY: Dict[str, List[Tuple[str, Optional[str], Optional[str], str]]] = {}
+
+def _add_place(names, place):
+    for name in names:
+        places = _PLACES_BY_KEY.setdefault(place_key(name), [])
+        if place not in places:
+            places.append(place)
+
+for _country, _aliases in COUNTRIES.items():
+    _add_place([_country] + _aliases, ("country", None, None, _country))
+for _country, _regions in REGIONS.items():
+    for _region, _aliases in _regions.items():
+        _add_place([_region] + _aliases, ("region", None, _region, _country))
+for (_city, _region, _country), _aliases in CITIES.items():
+    _add_place([_city] + _aliases, ("city", _city, _region, _country))
+
+def _part_matches(part: str, first: bool) -> List[Tuple[str, tuple]]:
+    """(key, place) of every place named in one comma-separated part, longest names first"""
+    words = part.split()
+    whole = _PLACES_BY_KEY.get(part, [])
+    if len(part) <= SHORT_ALIAS_LENGTH:
+        if first:
+            cities = [place for place in whole if place[0] == "city"]
+            return [(part, place) for place in cities or [place for place in whole if place[0] == "country"]]
+        return [(part, place) for place in whole if place[0] != "city"]
+
+    matches = []
+    start = 0
+    while start < len(words):
+        for end in range(min(len(words), start + MAX_NAME_WORDS), start, -1):
+            key = " ".join(words[start:end])
+            places = _PLACES_BY_KEY.get(key) if len(key) > SHORT_ALIAS_LENGTH else None
+            if places:
+                matches.extend((key, place) for place in places)
+                start = end
+                break
+        else:
+            start += 1
+    return matches
+
+def _consistent(place, other) -> bool:
+    """Whether a region or country match agrees with a place"""
+    level, _, region, country = other
+    return country == place[3] and (level != "region" or region == place[2])
+
+def parse_location(text) -> Dict[str, Optional[str]]:
+    """
+    Resolve a free-text location to canonical place names
+
+    Args:
+        text (str): Location from a resume, e.g. "Bangalore, India" or "Seattle, WA"
+
+    Returns:
+        dict: 'city', 'region' and 'country' (None where not found in the gazetteer)
+    """
+    location = {'city': None, 'region': None, 'country': None}
+    parts = [place_key(part) for part in _PART_SEPARATOR.split(str(text or ""))]
+    parts = [part for part in parts if part]
+    if not parts:
+        return location
+
+    matches = []
+    for index, part in enumerate(parts):
+        for key, place in _part_matches(part, first=index == 0):
+            # After the first part, a name that is also a region is the region ("Buffalo, New York")
+            if place[0] == "city" and index > 0 and any(other[0] == "region" for other in _PLACES_BY_KEY[key]):
+                continue
+            matches.append((key, place))
+
+    # The city agreeing with most of the regions and countries named elsewhere in the text
+    best = None
+    best_score = None
+    for key, place in matches:
+        if place[0] != "city":
+            continue
+        others = [other for other_key, other in matches if other_key != key and other[0] != "city"]
+        agreeing = sum(1 for other in others if _consistent(place, other))
+        if agreeing == 0 and others:
+            # "Paris, Texas" is not Paris, France
+            continue
+        if best_score is None or agreeing - (len(others) - agreeing) > best_score:
+            best, best_score = place, agreeing - (len(others) - agreeing)
+
+    if best is not None:
+        _, location['city'], location['region'], location['country'] = best
+        return location
+
+    countries = [place for _, place in matches if place[0] == "country"]
+    regions = [place for _, place in matches if place[0] == "region"]
+    if countries:
+        regions = [place for place in regions if place[3] == countries[0][3]]
+    if regions:
+        location['region'], location['country'] = regions[0][2], regions[0][3]
+    elif countries:
+        location['country'] = countries[0][3]
+    return location
+
+def main():
+    parser = argparse.ArgumentParser(description="Maintain the normalised candidate locations")
+    parser.add_argument("--backfill", action="store_true", help="Normalise the locations of candidates saved before the location columns existed")
+    parser.add_argument("--all", action="store_true", help="Normalise every candidate again, e.g. after extending the gazetteer")
+    args = parser.parse_args()
+
+    if not args.backfill:
+        parser.print_help()
+        return
+
+    from database import init_db, backfill_candidate_locations
+    init_db()
+    updated = backfill_candidate_locations(only_missing=not args.all)
+    logger.info(f"Normalised the location of {updated} candidates")
+
+if __name__ == "__main__":
+    main()
@@ -7,9 +7,10 @@ import os
 import logging
 from datetime import datetime, timedelta
 from typing import Dict, Any, Optional, List
-from sqlalchemy import text, Index, inspect
+from sqlalchemy import text, Index
 from sqlalchemy.orm import sessionmaker
 from database import engine, SessionLocal, Candidate, Skill, WorkExperience, Education
+from schema_migrations import upgrade
 import json
 import hashlib
 from functools import wraps
@@ -19,6 +20,9 @@ import time
 logging.basicConfig(level=logging.INFO)
 logger = logging.getLogger(__name__)
 
+# Revision of schema_migrations.py adding the query indexes
+QUERY_INDEXES_REVISION = "0004_query_indexes"
+
 # In-memory cache for API responses
 _cache = {}
 _cache_ttl = {}
@@ -33,97 +37,14 @@ class PerformanceOptimizer:
         
     def create_database_indexes(self):
         """
-        Create indexes on frequently queried fields for better query performance
+        Create indexes on frequently queried fields for better query performance.
+        They are revisions of schema_migrations.py, built online and recorded there.
         """
         logger.info("Creating database indexes for performance optimization...")
         
         try:
-            with engine.connect() as conn:
-                # Check if indexes already exist
-                inspector = inspect(engine)
-                existing_indexes = inspector.get_indexes('candidates')
-                existing_index_names = [idx['name'] for idx in existing_indexes]
-                
-                # Define indexes to create
-                indexes_to_create = [
-                    # Candidates table indexes
-                    ("idx_candidates_user_id", "candidates", "user_id"),
-                    ("idx_candidates_status", "candidates", "status"),
-                    ("idx_candidates_years_experience", "candidates", "years_experience"),
-                    ("idx_candidates_location", "candidates", "location"),
-                    ("idx_candidates_email", "candidates", "email"),
-                    ("idx_candidates_created_at", "candidates", "created_at"),
-                    ("idx_candidates_file_hash", "candidates", "file_hash"),
-                    
-                    # Composite indexes for common query patterns
-                    ("idx_candidates_user_status", "candidates", "user_id, status"),
-                    ("idx_candidates_user_experience", "candidates", "user_id, years_experience"),
-                ]
-                
-                # Skills table indexes
-                skills_indexes = inspector.get_indexes('skills')
-                skills_index_names = [idx['name'] for idx in skills_indexes]
-                
-                skills_indexes_to_create = [
-                    ("idx_skills_candidate_id", "skills", "candidate_id"),
-                    ("idx_skills_skill_name", "skills", "skill_name"),
-                    ("idx_skills_category", "skills", "skill_category"),
-                ]
-                
-                # Work Experience table indexes
-                work_exp_indexes = inspector.get_indexes('work_experiences')
-                work_exp_index_names = [idx['name'] for idx in work_exp_indexes]
-                
-                work_exp_indexes_to_create = [
-                    ("idx_work_exp_candidate_id", "work_experiences", "candidate_id"),
-                    ("idx_work_exp_company", "work_experiences", "company"),
-                    ("idx_work_exp_position", "work_experiences", "position"),
-                ]
-                
-                # Education table indexes
-                education_indexes = inspector.get_indexes('education')
-                education_index_names = [idx['name'] for idx in education_indexes]
-                
-                education_indexes_to_create = [
-                    ("idx_education_candidate_id", "education", "candidate_id"),
-                    ("idx_education_degree", "education", "degree"),
-                    ("idx_education_institution", "education", "institution"),
-                    ("idx_education_graduation_year", "education", "graduation_year"),
-                ]
-                
-                # Create indexes if they don't exist
-                all_indexes = (
-                    indexes_to_create + 
-                    skills_indexes_to_create + 
-                    work_exp_indexes_to_create + 
-                    education_indexes_to_create
-                )
-                
-                for index_name, table_name, columns in all_indexes:
-                    # Check the appropriate existing indexes list based on table
-                    if table_name == 'candidates':
-                        existing_names = existing_index_names
-                    elif table_name == 'skills':
-                        existing_names = skills_index_names
-                    elif table_name == 'work_experiences':
-                        existing_names = work_exp_index_names
-                    elif table_name == 'education':
-                        existing_names = education_index_names
-                    else:
-                        existing_names = []
-                    
-                    if index_name not in existing_names:
-                        try:
-                            sql = f"CREATE INDEX {index_name} ON {table_name} ({columns})"
-                            conn.execute(text(sql))
-                            conn.commit()
-                            logger.info(f"✅ Created index: {index_name} on {table_name}({columns})")
-                        except Exception as e:
-                            logger.warning(f"⚠️ Could not create index {index_name}: {str(e)}")
-                    else:
-                        logger.info(f"ℹ️ Index {index_name} already exists")
-                
-                logger.info("✅ Database indexing completed successfully!")
+            applied = upgrade(engine, target=QUERY_INDEXES_REVISION)
+            logger.info(f"✅ Database indexing completed successfully! ({len(applied)} revisions applied)")
                 
         except Exception as e:
             logger.error(f"❌ Error creating database indexes: {str(e)}")
@@ -286,24 +207,10 @@ def get_candidates_optimized(page=1, limit=5, **filters):
 @monitor_performance
 def get_skills_summary():
     """
-    Get summary of skills across all candidates (cached)
+    Get summary of skills across all candidates (cached), grouped by catalog skill
     """
-    db = SessionLocal()
-    try:
-        # Optimized query using indexes
-        query = text("""
-            SELECT skill_name, COUNT(*) as count 
-            FROM skills 
-            GROUP BY skill_name 
-            ORDER BY count DESC 
-            LIMIT 50
-        """)
-        
-        result = db.execute(query).fetchall()
-        return [{"skill_name": row[0], "count": row[1]} for row in result]
-    
-    finally:
-        db.close()
+    from database import get_skill_counts
+    return get_skill_counts(limit=50)
 
 @cache_response(ttl_seconds=900)  # Cache for 15 minutes
 @monitor_performance
@@ -0,0 +1,281 @@
+"""
+Read Replicas for Sen AI
+Routes read-only sessions (listings, chat context, shortlisting scans) to MySQL read
+replicas, so large read scans stop competing with ingestion writes on the primary.
+
+Replication lag is checked in the background. A replica serves a user's reads only once
+it has applied that user's latest write (read-your-writes); otherwise, or when every
+replica lags more than DB_REPLICA_MAX_LAG or cannot be reached, reads fall back to the
+primary. Writes always go to the primary (see database.CandidateSession.get_bind).
+
+Read-your-writes holds across processes: every write bumps the user's row in
+replica_write_marks on the primary, in the same transaction as the write (see
+database._record_write_marks), and a replica is only used once its replicated copy
+of that row has caught up (replication applies transactions in order, so the write is
+there too). This costs two primary-key lookups per read session.
+
+Configure replicas with DB_REPLICA_HOSTS="replica1:3306,replica2" in every process that
+reads or writes candidates (API and ingestion workers); without it every session uses
+the primary and no write marks are kept.
+"""
+
+import os
+import time
+import logging
+import itertools
+import threading
+from typing import Dict, Any, List, Optional, Tuple
+from dotenv import load_dotenv
+from sqlalchemy import MetaData, Table, Column, Integer, BigInteger, text, select
+from sqlalchemy.dialects.mysql import insert as mysql_insert
+from sqlalchemy.dialects.sqlite import insert as sqlite_insert
+
+# Load environment variables
+load_dotenv()
+
+# Configure logging
+logging.basicConfig(level=logging.INFO)
+logger = logging.getLogger(__name__)
+
+# Replica configuration
+DB_REPLICA_HOSTS = os.environ.get("DB_REPLICA_HOSTS", "")                            # Comma-separated host[:port] list
+DB_REPLICA_MAX_LAG = float(os.environ.get("DB_REPLICA_MAX_LAG", "5"))                # Stop reading from replicas further behind (seconds)
+DB_REPLICA_CHECK_INTERVAL = float(os.environ.get("DB_REPLICA_CHECK_INTERVAL", "2"))  # Seconds between lag checks
+WRITE_HISTORY_SIZE = 100000
+
+# Write marks: user_id -> number of committed writes to the user's candidates.
+# UNKNOWN_WRITER counts writes whose owner is not known, which every user waits for.
+UNKNOWN_WRITER = 0
+write_marks_metadata = MetaData()
+replica_write_marks = Table(
+    "replica_write_marks", write_marks_metadata,
+    Column("user_id", Integer, primary_key=True, autoincrement=False),
+    Column("version", BigInteger, nullable=False),
+)
+
+def init_write_marks(engine):
+    """Create the replica_write_marks table if it doesn't exist"""
+    replica_write_marks.create(bind=engine, checkfirst=True)
+
+def write_marks(conn, user_id=None) -> Dict[int, int]:
+    """
+    Write versions a read of the user's data has to wait for
+
+    Returns:
+        dict: user_id (or UNKNOWN_WRITER) -> version, for the marks that exist
+    """
+    keys = [UNKNOWN_WRITER] if user_id is None else [user_id, UNKNOWN_WRITER]
+    return dict(conn.execute(
+        select(replica_write_marks.c.user_id, replica_write_marks.c.version).where(replica_write_marks.c.user_id.in_(keys))
+    ).fetchall())
+
+def bump_write_mark(conn, user_id=None):
+    """Count a committed write to the user's candidates"""
+    key = UNKNOWN_WRITER if user_id is None else user_id
+    if conn.dialect.name == "sqlite":
+        statement = sqlite_insert(replica_write_marks).values(user_id=key, version=1)
+        statement = statement.on_conflict_do_update(index_elements=["user_id"], set_={"version": replica_write_marks.c.version + 1})
+    else:
+        statement = mysql_insert(replica_write_marks).values(user_id=key, version=1)
+        statement = statement.on_duplicate_key_update(version=replica_write_marks.c.version + 1)
+    conn.execute(statement)
+
+def replica_hosts(default_port) -> List[Tuple[str, str]]:
+    """
+    Parse DB_REPLICA_HOSTS
+
+    Returns:
+        list: (host, port) of each configured replica
+    """
+    hosts = []
+    for entry in DB_REPLICA_HOSTS.split(","):
+        entry = entry.strip()
+        if entry:
+            host, _, port = entry.partition(":")
+            hosts.append((host, port or default_port))
+    return hosts
+
+def replication_lag(engine) -> Optional[float]:
+    """
+    Seconds a replica is behind its source
+
+    Returns:
+        float: The lag (0 for a server that is not replicating, e.g. a managed read
+               endpoint), or None if replication is stopped
+    """
+    with engine.connect() as conn:
+        try:
+            row = conn.execute(text("SHOW REPLICA STATUS")).mappings().first()
+            column = "Seconds_Behind_Source"
+        except Exception:
+            # MySQL before 8.0.22
+            conn.rollback()
+            row = conn.execute(text("SHOW SLAVE STATUS")).mappings().first()
+            column = "Seconds_Behind_Master"
+    if row is None:
+        return 0.0
+    return float(row[column]) if row[column] is not None else None
+
+class ReplicaSet:
+    """
+    Replicas of the primary and the point in time each has applied writes up to.
+
+    Write times of this process's own writes send reads straight to the primary without
+    a lookup; writes of other processes are found through replica_write_marks.
+    """
+
+    def __init__(self, engines: List, primary=None, max_lag: float = DB_REPLICA_MAX_LAG,
+                 check_interval: float = DB_REPLICA_CHECK_INTERVAL):
+        self.engines = engines
+        self.primary = primary
+        self.max_lag = max_lag
+        self.check_interval = check_interval
+
+        # Per replica: (applied_until, checked_at) wall-clock times, None while unusable
+        self._applied = [None] * len(engines)
+        self._lags = [None] * len(engines)
+        # user_id -> time of the user's latest write (None: a write of unknown owner)
+        self._last_writes = {}
+        self._lock = threading.Lock()
+        self._round_robin = itertools.count()
+        self._thread = None
+        self._start_lock = threading.Lock()
+
+        # Metrics
+        self._replica_reads = 0
+        self._primary_reads = 0
+        self._read_your_writes = 0
+
+    def check(self):
+        """Measure the lag of every replica"""
+        for index, engine in enumerate(self.engines):
+            checked_at = time.time()
+            try:
+                lag = replication_lag(engine)
+            except Exception as e:
+                logger.warning(f"Replica {index}: lag check failed: {e}")
+                lag = None
+            with self._lock:
+                self._lags[index] = lag
+                if lag is None or lag > self.max_lag:
+                    self._applied[index] = None
+                else:
+                    # Lag is reported in whole seconds
+                    self._applied[index] = (checked_at - lag - 1, checked_at)
+
+    def _monitor(self):
+        while True:
+            self.check()
+            time.sleep(self.check_interval)
+
+    def start(self):
+        """Start checking lag in a background thread; reads use the primary until the first check"""
+        if not self.engines or self._thread is not None:
+            return
+        with self._start_lock:
+            if self._thread is None:
+                self._thread = threading.Thread(target=self._monitor, name="replica-lag-monitor", daemon=True)
+                self._thread.start()
+
+    def record_write(self, user_id=None):
+        """
+        Note that a user's candidates changed (after the commit), so this process's reads
+        of them wait for replicas to catch up (other processes wait on the write marks)
+        """
+        if not self.engines:
+            return
+        now = time.time()
+        with self._lock:
+            if len(self._last_writes) >= WRITE_HISTORY_SIZE:
+                # Older writes are on every replica that is usable (see choose)
+                horizon = now - self.max_lag - 3 * self.check_interval - 2
+                self._last_writes = {key: written for key, written in self._last_writes.items() if written > horizon}
+            self._last_writes[user_id] = now
+
+    def mark_writes(self, conn, user_ids):
+        """
+        Bump the write marks of users whose candidates a transaction changed, on that
+        transaction's connection, so the marks commit (or roll back) with the writes
+
+        Args:
+            conn: Connection to the primary, inside the writing transaction
+            user_ids (iterable): Users whose candidates changed (None for unknown owners)
+        """
+        if not self.engines or self.primary is None:
+            return
+        # Same order in every transaction, so concurrent commits can't deadlock on the marks
+        for key in sorted({UNKNOWN_WRITER if user_id is None else user_id for user_id in user_ids}):
+            bump_write_mark(conn, key)
+
+    def _has_writes(self, index: int, user_id) -> bool:
+        """Whether a replica has applied every write to the user's candidates recorded on the primary"""
+        if self.primary is None:
+            return True
+        try:
+            with self.primary.connect() as conn:
+                required = write_marks(conn, user_id)
+            if not required:
+                return True
+            with self.engines[index].connect() as conn:
+                applied = write_marks(conn, user_id)
+        except Exception as e:
+            logger.warning(f"Replica {index}: write mark check failed: {e}")
+            return False
+        return all(applied.get(key, 0) >= version for key, version in required.items())
+
+    def choose(self, user_id=None) -> Optional[int]:
+        """
+        Pick the replica for a user's reads
+
+        Args:
+            user_id (int, optional): User whose data is read
+
+        Returns:
+            int: Index of a replica that has applied the user's latest write, or None to read from the primary
+        """
+        if not self.engines:
+            return None
+        now = time.time()
+        with self._lock:
+            last_write = max(self._last_writes.get(user_id, 0), self._last_writes.get(None, 0))
+            fresh = [
+                index for index, applied in enumerate(self._applied)
+                # A check missed by the monitor makes the measurement too old to trust
+                if applied is not None and now - applied[1] <= 3 * self.check_interval + 1
+            ]
+            usable = [index for index in fresh if self._applied[index][0] > last_write]
+            index = usable[next(self._round_robin) % len(usable)] if usable else None
+
+        # Writes made by other processes (outside the lock: these are queries)
+        if index is not None and self._has_writes(index, user_id):
+            with self._lock:
+                self._replica_reads += 1
+            return index
+        with self._lock:
+            self._primary_reads += 1
+            if fresh:
+                self._read_your_writes += 1
+        return None
+
+    def get_stats(self) -> Dict[str, Any]:
+        """
+        Get replica lag and read routing statistics
+
+        Returns:
+            dict: Per-replica lag and health, and how many reads went to replicas or the primary
+        """
+        with self._lock:
+            return {
+                "max_lag_seconds": float(self.max_lag),
+                "replicas": [
+                    {
+                        "lag_seconds": lag,
+                        "usable": applied is not None,
+                        "checked_at": applied[1] if applied is not None else None
+                    }
+                    for lag, applied in zip(self._lags, self._applied)
+                ],
+                "replica_reads": int(self._replica_reads),
+                "primary_reads": int(self._primary_reads),
+                "read_your_writes_fallbacks": int(self._read_your_writes)
+            }
@@ -0,0 +1,706 @@
+"""
+Schema Migrations for Sen AI
+Versioned schema changes, applied in order and recorded in the schema_migrations table.
+
+Each revision is a list of steps (new tables, columns, indexes, backfills). A step first
+checks whether the database already has its change, so databases upgraded with the old
+one-off scripts or created by init_db are adopted: their revisions are simply recorded.
+
+Schema changes run as online DDL on MySQL: columns are added with ALGORITHM=INSTANT
+where the server supports it, and columns and indexes otherwise with ALGORITHM=INPLACE,
+LOCK=NONE, so ingestion keeps reading and writing the table while an index builds. If
+MySQL can only run a change by locking the table, the revision stops unless
+--allow-locking is given (e.g. in a maintenance window). DDL waits at most
+MIGRATION_LOCK_WAIT_TIMEOUT seconds for the table's metadata lock, so it retries later
+instead of queueing every query behind a long transaction. Backfills use the resumable
+batch functions of database.py, one short transaction per batch.
+
+    python schema_migrations.py --status     # applied and pending revisions
+    python schema_migrations.py --plan       # pending steps with estimated impact
+    python schema_migrations.py --upgrade    # apply pending revisions
+"""
+
+import os
+import time
+import logging
+import argparse
+from datetime import datetime
+from typing import Dict, Any, Optional, List, Callable
+from dotenv import load_dotenv
+from sqlalchemy import MetaData, Table, Column, String, Float, DateTime, UniqueConstraint, inspect, text, select, insert, func
+from sqlalchemy.exc import DBAPIError
+from sqlalchemy.schema import CreateColumn
+from database import (
+    engine, Candidate, Education, CatalogSkill, SkillAlias, Skill, WorkExperience, CandidateSearchTerm, CandidateSummary,
+    ARCHIVE_TABLES, rebuild_search_terms, rebuild_candidate_summaries, backfill_skill_catalog,
+    backfill_experience_dates, backfill_candidate_locations
+)
+from ingestion_queue import IngestionJob, IngestionJobFile
+from read_replicas import replica_write_marks
+
+# Load environment variables
+load_dotenv()
+
+# Configure logging
+logging.basicConfig(level=logging.INFO)
+logger = logging.getLogger(__name__)
+
+# Migration settings
+MIGRATION_ALLOW_LOCKING = os.environ.get("MIGRATION_ALLOW_LOCKING", "false").lower() == "true"  # Allow DDL that blocks writes
+MIGRATION_LOCK_WAIT_TIMEOUT = int(os.environ.get("MIGRATION_LOCK_WAIT_TIMEOUT", "5"))  # Seconds DDL waits for a metadata lock
+MIGRATION_DDL_RETRIES = int(os.environ.get("MIGRATION_DDL_RETRIES", "5"))              # Attempts when the metadata lock is busy
+MIGRATION_SCAN_MB_PER_SECOND = float(os.environ.get("MIGRATION_SCAN_MB_PER_SECOND", "50"))  # Rebuild speed for impact estimates
+
+# MySQL errors: the requested ALGORITHM/LOCK is not supported, and lock wait timeout
+ER_ALTER_OPERATION_NOT_SUPPORTED = (1845, 1846)
+ER_LOCK_WAIT_TIMEOUT = 1205
+
+ONLINE_ADD_COLUMN = ("ALGORITHM=INSTANT", "ALGORITHM=INPLACE, LOCK=NONE")
+ONLINE_INDEX = ("ALGORITHM=INPLACE, LOCK=NONE",)
+ONLINE_MODIFY_COLUMN = ("ALGORITHM=INPLACE, LOCK=NONE",)
+FILL_BATCH_SIZE = 1000
+
+# Applied revisions
+migrations_metadata = MetaData()
+schema_migrations = Table(
+    "schema_migrations", migrations_metadata,
+    Column("revision", String(100), primary_key=True),
+    Column("description", String(255), nullable=False),
+    Column("applied_at", DateTime, nullable=False),
+    Column("duration_seconds", Float, nullable=True),
+)
+
+class MigrationError(Exception):
+    """A revision cannot be applied as requested (e.g. it would lock a table)"""
+
+def table_stats(conn, table_name: str) -> Dict[str, Any]:
+    """
+    Size of a table, from information_schema on MySQL (InnoDB's row count is an estimate)
+
+    Returns:
+        dict: rows and mb (None where unknown); both 0 for a missing table
+    """
+    if not inspect(conn).has_table(table_name):
+        return {'rows': 0, 'mb': 0.0}
+    if conn.dialect.name == "mysql":
+        row = conn.execute(text("""
+            SELECT TABLE_ROWS, DATA_LENGTH + INDEX_LENGTH
+            FROM INFORMATION_SCHEMA.TABLES
+            WHERE TABLE_SCHEMA = DATABASE() AND TABLE_NAME = :table
+        """), {"table": table_name}).fetchone()
+        return {'rows': int(row[0] or 0), 'mb': int(row[1] or 0) / (1024 * 1024)}
+    rows = conn.execute(select(func.count()).select_from(text(table_name))).scalar()
+    return {'rows': rows, 'mb': None}
+
+def _describe_size(stats: Dict[str, Any]) -> str:
+    if stats['mb'] is None:
+        return f"{stats['rows']:,} rows"
+    seconds = stats['mb'] / MIGRATION_SCAN_MB_PER_SECOND
+    return f"~{stats['rows']:,} rows, {stats['mb']:.0f} MB (~{seconds:.0f}s at {MIGRATION_SCAN_MB_PER_SECOND:g} MB/s)"
+
+def _errno(error: DBAPIError) -> Optional[int]:
+    return getattr(error.orig, "errno", None)
+
+def _execute_ddl(conn, statement: str):
+    """Run one DDL statement, retrying while another transaction holds the table's metadata lock"""
+    for attempt in range(1, MIGRATION_DDL_RETRIES + 1):
+        try:
+            conn.execute(text(statement))
+            return
+        except DBAPIError as e:
+            if _errno(e) != ER_LOCK_WAIT_TIMEOUT or attempt == MIGRATION_DDL_RETRIES:
+                raise
+            logger.warning(f"Metadata lock busy, retrying in {attempt * 2}s: {statement}")
+            time.sleep(attempt * 2)
+
+def _alter_online(conn, statement: str, clauses, allow_locking: bool) -> str:
+    """
+    Run an ALTER TABLE with the first online ALGORITHM/LOCK clause MySQL accepts
+
+    Returns:
+        str: The clause used ("default" outside MySQL or when locking was allowed)
+    """
+    if conn.dialect.name != "mysql":
+        _execute_ddl(conn, statement)
+        return "default"
+
+    for clause in clauses:
+        try:
+            _execute_ddl(conn, f"{statement}, {clause}")
+            return clause
+        except DBAPIError as e:
+            if _errno(e) not in ER_ALTER_OPERATION_NOT_SUPPORTED:
+                raise
+            logger.info(f"{clause} not supported: {e.orig}")
+
+    if not allow_locking:
+        raise MigrationError(f"MySQL cannot run this change online: {statement}. "
+                             "Re-run with --allow-locking in a maintenance window.")
+    logger.warning(f"Running with table locks: {statement}")
+    _execute_ddl(conn, statement)
+    return "default"
+
+def _index_columns(table: Table, name: str):
+    """(columns, unique) of an index or unique constraint declared on a table"""
+    for index in table.indexes:
+        if index.name == name:
+            return [column.name for column in index.columns], bool(index.unique)
+    for constraint in table.constraints:
+        if isinstance(constraint, UniqueConstraint) and constraint.name == name:
+            return [column.name for column in constraint.columns], True
+    raise KeyError(f"{table.name} declares no index {name}")
+
+def _existing_indexes(conn, table_name: str) -> Dict[str, Any]:
+    """Index and unique constraint names of a table -> (columns, unique)"""
+    inspector = inspect(conn)
+    if not inspector.has_table(table_name):
+        return {}
+    indexes = {index['name']: (index['column_names'], bool(index['unique'])) for index in inspector.get_indexes(table_name)}
+    for constraint in inspector.get_unique_constraints(table_name):
+        indexes.setdefault(constraint['name'], (constraint['column_names'], True))
+    return indexes
+
+class Step:
+    """One schema change of a revision"""
+
+    description = ""
+
+    def is_applied(self, conn) -> bool:
+        """Whether the database already has this change"""
+        return False
+
+    def impact(self, conn) -> str:
+        """Estimated cost of applying the change, for --plan"""
+        return ""
+
+    def apply(self, conn, options: Dict[str, Any]):
+        raise NotImplementedError
+
+class CreateTables(Step):
+    """Create tables from their model definitions"""
+
+    def __init__(self, *tables: Table):
+        self.tables = tables
+        self.description = f"create {', '.join(table.name for table in tables)}"
+
+    def is_applied(self, conn) -> bool:
+        inspector = inspect(conn)
+        return all(inspector.has_table(table.name) for table in self.tables)
+
+    def impact(self, conn) -> str:
+        return "new tables, existing rows are not touched"
+
+    def apply(self, conn, options):
+        for table in self.tables:
+            table.create(bind=conn, checkfirst=True)
+
+class AddColumns(Step):
+    """
+    Add columns to a table, rendered from the model unless given as (name, ddl).
+    On MySQL they are appended with ALGORITHM=INSTANT (metadata only), or else rebuilt online.
+    """
+
+    def __init__(self, table: Table, *columns):
+        self.table = table
+        self.columns = [column if isinstance(column, tuple) else (column, None) for column in columns]
+        self.description = f"add {', '.join(name for name, _ in self.columns)} to {table.name}"
+
+    def _missing(self, conn):
+        inspector = inspect(conn)
+        existing = {column['name'] for column in inspector.get_columns(self.table.name)} if inspector.has_table(self.table.name) else set()
+        return [(name, ddl) for name, ddl in self.columns if name not in existing]
+
+    def is_applied(self, conn) -> bool:
+        return not self._missing(conn)
+
+    def impact(self, conn) -> str:
+        stats = table_stats(conn, self.table.name)
+        return f"INSTANT where supported, else an online rebuild of {_describe_size(stats)}"
+
+    def apply(self, conn, options):
+        definitions = [
+            f"{name} {ddl}" if ddl else str(CreateColumn(self.table.c[name]).compile(dialect=conn.dialect)).strip()
+            for name, ddl in self._missing(conn)
+        ]
+        if conn.dialect.name != "mysql":
+            # One column per statement outside MySQL (SQLite adds a column per ALTER)
+            for definition in definitions:
+                _execute_ddl(conn, f"ALTER TABLE {self.table.name} ADD COLUMN {definition}")
+            return
+        statement = f"ALTER TABLE {self.table.name} " + ", ".join(f"ADD COLUMN {definition}" for definition in definitions)
+        _alter_online(conn, statement, ONLINE_ADD_COLUMN, options['allow_locking'])
+
+class AddIndex(Step):
+    """Add an index declared on the model, or one given by its columns, online"""
+
+    def __init__(self, table: Table, name: str, columns=None, unique: bool = False):
+        self.table = table
+        self.name = name
+        if columns is None:
+            columns, unique = _index_columns(table, name)
+        self.columns = list(columns)
+        self.unique = unique
+        self.description = f"add {'unique ' if unique else ''}index {name} on {table.name} ({', '.join(self.columns)})"
+
+    def is_applied(self, conn) -> bool:
+        return self.name in _existing_indexes(conn, self.table.name)
+
+    def impact(self, conn) -> str:
+        stats = table_stats(conn, self.table.name)
+        return f"online index build from {_describe_size(stats)}; reads and writes continue"
+
+    def apply(self, conn, options):
+        quote = conn.dialect.identifier_preparer.quote
+        columns = ", ".join(quote(column) for column in self.columns)
+        kind = "UNIQUE INDEX" if self.unique else "INDEX"
+        if conn.dialect.name != "mysql":
+            _execute_ddl(conn, f"CREATE {kind} {quote(self.name)} ON {self.table.name} ({columns})")
+            return
+        statement = f"ALTER TABLE {self.table.name} ADD {kind} {quote(self.name)} ({columns})"
+        _alter_online(conn, statement, ONLINE_INDEX, options['allow_locking'])
+
+class DropUniqueIndex(Step):
+    """Drop any unique index on exactly these columns (e.g. one replaced by a per-user key)"""
+
+    def __init__(self, table: Table, *columns: str):
+        self.table = table
+        self.columns = list(columns)
+        self.description = f"drop unique indexes on {table.name} ({', '.join(columns)})"
+
+    def _matching(self, conn):
+        return [
+            name for name, (columns, unique) in _existing_indexes(conn, self.table.name).items()
+            if unique and columns == self.columns
+        ]
+
+    def is_applied(self, conn) -> bool:
+        return not self._matching(conn)
+
+    def impact(self, conn) -> str:
+        return "metadata only"
+
+    def apply(self, conn, options):
+        quote = conn.dialect.identifier_preparer.quote
+        for name in self._matching(conn):
+            if conn.dialect.name != "mysql":
+                _execute_ddl(conn, f"DROP INDEX {quote(name)}")
+            else:
+                _alter_online(conn, f"ALTER TABLE {self.table.name} DROP INDEX {quote(name)}", ONLINE_INDEX, options['allow_locking'])
+
+class FillNulls(Step):
+    """
+    Set a column's NULLs to another column's value (or now when that is NULL too), in short
+    batches by primary key, before the column is made NOT NULL. Only touches the table
+    itself, so unlike a Backfill it runs with the schema steps.
+    """
+
+    def __init__(self, table: Table, column: str, fallback: str):
+        self.table = table
+        self.column = column
+        self.fallback = fallback
+        self.description = f"fill NULL {table.name}.{column} from {fallback}"
+
+    def _nulls(self):
+        return self.table.c[self.column].is_(None)
+
+    def is_applied(self, conn) -> bool:
+        return conn.execute(select(func.count()).select_from(self.table).where(self._nulls())).scalar() == 0
+
+    def impact(self, conn) -> str:
+        nulls = conn.execute(select(func.count()).select_from(self.table).where(self._nulls())).scalar()
+        return f"batched updates of {nulls:,} rows, one short transaction per batch"
+
+    def apply(self, conn, options):
+        keys = list(self.table.primary_key.columns)
+        fill = func.coalesce(self.table.c[self.fallback], datetime.utcnow())
+        while True:
+            rows = conn.execute(select(*keys).where(self._nulls()).limit(options['batch_size'] or FILL_BATCH_SIZE)).fetchall()
+            if not rows:
+                return
+            for row in rows:
+                conn.execute(
+                    self.table.update().where(*[key == value for key, value in zip(keys, row)], self._nulls())
+                    .values({self.column: fill})
+                )
+            conn.commit()
+
+class RequireNotNull(Step):
+    """Make a column NOT NULL (after FillNulls), rebuilding the table online on MySQL"""
+
+    def __init__(self, table: Table, column: str):
+        self.table = table
+        self.column = column
+        self.description = f"make {table.name}.{column} NOT NULL"
+
+    def is_applied(self, conn) -> bool:
+        columns = {column['name']: column for column in inspect(conn).get_columns(self.table.name)}
+        return not columns[self.column]['nullable']
+
+    def impact(self, conn) -> str:
+        return f"online rebuild of {_describe_size(table_stats(conn, self.table.name))}"
+
+    def apply(self, conn, options):
+        if conn.dialect.name != "mysql":
+            # SQLite cannot change a column's nullability in place
+            logger.info(f"Leaving {self.table.name}.{self.column} nullable on {conn.dialect.name}")
+            return
+        definition = str(CreateColumn(self.table.c[self.column]).compile(dialect=conn.dialect)).strip()
+        _alter_online(conn, f"ALTER TABLE {self.table.name} MODIFY COLUMN {definition}", ONLINE_MODIFY_COLUMN,
+                      options['allow_locking'])
+
+class RequireUnique(Step):
+    """Stop before a unique key is added while existing rows still violate it"""
+
+    def __init__(self, table: Table, name: str, hint: str):
+        self.table = table
+        self.name = name
+        self.columns, _ = _index_columns(table, name)
+        self.hint = hint
+        self.description = f"check {table.name} has no duplicate ({', '.join(self.columns)})"
+
+    def is_applied(self, conn) -> bool:
+        return self.name in _existing_indexes(conn, self.table.name)
+
+    def impact(self, conn) -> str:
+        return f"one grouped scan of {_describe_size(table_stats(conn, self.table.name))}"
+
+    def apply(self, conn, options):
+        columns = [self.table.c[column] for column in self.columns]
+        duplicates = conn.execute(
+            select(*columns, func.count())
+            .where(*[column.isnot(None) for column in columns])
+            .group_by(*columns)
+            .having(func.count() > 1)
+            .limit(10)
+        ).fetchall()
+        if duplicates:
+            examples = "; ".join(", ".join(str(value) for value in row) for row in duplicates)
+            raise MigrationError(f"Duplicate ({', '.join(self.columns)}) values in {self.table.name}, e.g. {examples}. {self.hint}")
+
+class Backfill(Step):
+    """
+    Run a resumable batch function of database.py (one transaction per batch, so rows
+    are only locked briefly). Skipped with --skip-backfills; resume it later with its command.
+    """
+
+    def __init__(self, function: Callable[..., int], table: Table, command: str, **kwargs):
+        self.function = function
+        self.table = table
+        self.command = command
+        self.kwargs = kwargs
+        self.description = f"backfill {table.name} ({function.__name__})"
+
+    def impact(self, conn) -> str:
+        return f"batched updates over {_describe_size(table_stats(conn, self.table.name))}, one short transaction per batch"
+
+    def apply(self, conn, options):
+        if options['skip_backfills']:
+            logger.info(f"Skipping {self.function.__name__}; run it later with: {self.command}")
+            return
+        kwargs = dict(self.kwargs, batch_size=options['batch_size']) if options['batch_size'] else self.kwargs
+        count = self.function(**kwargs)
+        logger.info(f"{self.function.__name__}: {count} rows")
+
+class Revision:
+    """An ordered, named set of steps, recorded in schema_migrations once all have run"""
+
+    def __init__(self, revision: str, description: str, *steps: Step):
+        self.revision = revision
+        self.description = description
+        self.steps = steps
+
+# Revisions in the order they are applied. Never edit an applied revision: add a new one.
+REVISIONS = [
+    Revision(
+        "0001_core_tables", "Candidate tables",
+        # skills references skill_catalog, so the catalog tables are part of the core set
+        CreateTables(Candidate.__table__, Education.__table__, CatalogSkill.__table__, SkillAlias.__table__,
+                     Skill.__table__, WorkExperience.__table__),
+    ),
+    Revision(
+        "0002_candidate_user_id", "Candidates belong to a user",
+        AddColumns(Candidate.__table__, ("user_id", "INT NOT NULL DEFAULT 1")),
+        AddIndex(Candidate.__table__, "idx_candidates_user_id", ["user_id"]),
+    ),
+    Revision(
+        "0003_candidate_file_hash", "File hash and batch of uploaded resumes",
+        AddColumns(Candidate.__table__, "file_hash", "batch_id"),
+    ),
+    Revision(
+        "0004_query_indexes", "Indexes for listings, filters and duplicate checks",
+        AddIndex(Candidate.__table__, "idx_candidates_status", ["status"]),
+        AddIndex(Candidate.__table__, "idx_candidates_years_experience", ["years_experience"]),
+        AddIndex(Candidate.__table__, "idx_candidates_location", ["location"]),
+        AddIndex(Candidate.__table__, "idx_candidates_created_at", ["created_at"]),
+        AddIndex(Candidate.__table__, "idx_candidates_user_status", ["user_id", "status"]),
+        AddIndex(Candidate.__table__, "idx_candidates_user_experience", ["user_id", "years_experience"]),
+        AddIndex(Candidate.__table__, "idx_candidates_user_created"),
+        AddIndex(Skill.__table__, "idx_skills_candidate_id"),
+        AddIndex(Skill.__table__, "idx_skills_category", ["skill_category"]),
+        AddIndex(WorkExperience.__table__, "idx_work_exp_candidate_id"),
+        AddIndex(WorkExperience.__table__, "idx_work_exp_company", ["company"]),
+        AddIndex(WorkExperience.__table__, "idx_work_exp_position", ["position"]),
+        AddIndex(Education.__table__, "idx_education_candidate_id"),
+        AddIndex(Education.__table__, "idx_education_degree", ["degree"]),
+        AddIndex(Education.__table__, "idx_education_institution", ["institution"]),
+        AddIndex(Education.__table__, "idx_education_graduation_year", ["graduation_year"]),
+    ),
+    Revision(
+        "0005_ingestion_queue", "Durable batch ingestion queue",
+        CreateTables(IngestionJob.__table__, IngestionJobFile.__table__),
+    ),
+    Revision(
+        "0006_candidate_unique_keys", "Per-user unique email and file hash (upsert targets)",
+        RequireUnique(Candidate.__table__, "uq_candidates_user_email",
+                      "Resolve them with: python add_candidate_unique_keys_migration.py --resolve-duplicates"),
+        RequireUnique(Candidate.__table__, "uq_candidates_user_file_hash",
+                      "Resolve them with: python add_candidate_unique_keys_migration.py --resolve-duplicates"),
+        # Replaced by the per-user key
+        DropUniqueIndex(Candidate.__table__, "file_hash"),
+        AddIndex(Candidate.__table__, "uq_candidates_user_email"),
+        AddIndex(Candidate.__table__, "uq_candidates_user_file_hash"),
+    ),
+    Revision(
+        "0007_search_index", "Candidate search terms",
+        CreateTables(CandidateSearchTerm.__table__),
+        Backfill(rebuild_search_terms, Candidate.__table__, "python search_index.py --rebuild"),
+    ),
+    Revision(
+        "0008_skill_catalog", "Skills linked to the canonical skill catalog",
+        CreateTables(CatalogSkill.__table__, SkillAlias.__table__),
+        # Without the foreign key: MySQL only adds one online with foreign_key_checks disabled
+        AddColumns(Skill.__table__, "catalog_skill_id"),
+        AddIndex(Skill.__table__, "idx_skills_catalog_candidate"),
+        Backfill(backfill_skill_catalog, Skill.__table__, "python skill_catalog.py --backfill"),
+    ),
+    Revision(
+        "0009_candidate_summaries", "Precomputed candidate summaries",
+        CreateTables(CandidateSummary.__table__),
+        Backfill(rebuild_candidate_summaries, Candidate.__table__, "python candidate_summary.py --rebuild"),
+    ),
+    Revision(
+        "0010_experience_dates", "Structured work experience dates and tenure",
+        AddColumns(WorkExperience.__table__, "start_on", "end_on", "is_current", "tenure_months"),
+        AddIndex(WorkExperience.__table__, "idx_work_exp_end_on"),
+        AddIndex(WorkExperience.__table__, "idx_work_exp_current_start_on"),
+        AddIndex(WorkExperience.__table__, "idx_work_exp_tenure"),
+        Backfill(backfill_experience_dates, WorkExperience.__table__, "python experience_dates.py --backfill"),
+    ),
+    Revision(
+        "0011_candidate_locations", "Normalised candidate city, region and country",
+        AddColumns(Candidate.__table__, "city", "region", "country"),
+        AddIndex(Candidate.__table__, "idx_candidates_user_country"),
+        AddIndex(Candidate.__table__, "idx_candidates_user_city"),
+        Backfill(backfill_candidate_locations, Candidate.__table__, "python location_gazetteer.py --backfill"),
+    ),
+    Revision(
+        "0012_candidate_archive", "Archive tables for rejected and stale candidates",
+        CreateTables(*ARCHIVE_TABLES.values()),
+    ),
+    Revision(
+        "0013_experience_tenure", "End month and tenure of year-only ranges and stated durations",
+        Backfill(backfill_experience_dates, WorkExperience.__table__, "python experience_dates.py --backfill --all",
+                 only_missing=False),
+    ),
+    Revision(
+        "0014_replica_write_marks", "Per-user write versions for read-your-writes on replicas",
+        CreateTables(replica_write_marks),
+    ),
+    Revision(
+        "0015_candidate_created_at_not_null", "Every candidate has a created_at (listing cursors)",
+        FillNulls(Candidate.__table__, "created_at", "updated_at"),
+        FillNulls(ARCHIVE_TABLES[Candidate], "created_at", "updated_at"),
+        RequireNotNull(Candidate.__table__, "created_at"),
+        RequireNotNull(ARCHIVE_TABLES[Candidate], "created_at"),
+    ),
+]
+
+def _connect(engine):
+    conn = engine.connect()
+    if conn.dialect.name == "mysql":
+        conn.execute(text(f"SET SESSION lock_wait_timeout = {int(MIGRATION_LOCK_WAIT_TIMEOUT)}"))
+    return conn
+
+def applied_revisions(conn) -> Dict[str, Any]:
+    """Revision -> applied_at of the recorded revisions"""
+    schema_migrations.create(bind=conn, checkfirst=True)
+    conn.commit()
+    return dict(conn.execute(select(schema_migrations.c.revision, schema_migrations.c.applied_at)).fetchall())
+
+def pending_revisions(conn, target: Optional[str] = None) -> List[Revision]:
+    """Revisions not recorded yet, up to and including target"""
+    names = [revision.revision for revision in REVISIONS]
+    if target is not None and target not in names:
+        raise MigrationError(f"Unknown revision {target}")
+    applied = applied_revisions(conn)
+    revisions = REVISIONS[:names.index(target) + 1] if target else REVISIONS
+    return [revision for revision in revisions if revision.revision not in applied]
+
+def migration_status(engine) -> List[Dict[str, Any]]:
+    """
+    Every revision and when it was applied
+
+    Returns:
+        list: revision, description and applied_at (None if pending)
+    """
+    with _connect(engine) as conn:
+        applied = applied_revisions(conn)
+    return [
+        {'revision': revision.revision, 'description': revision.description, 'applied_at': applied.get(revision.revision)}
+        for revision in REVISIONS
+    ]
+
+def migration_plan(engine, target: Optional[str] = None) -> List[Dict[str, Any]]:
+    """
+    Pending revisions with the steps still to run and their estimated impact
+
+    Returns:
+        list: revision, description and steps (description, applied, impact)
+    """
+    with _connect(engine) as conn:
+        plan = []
+        for revision in pending_revisions(conn, target):
+            steps = []
+            for step in revision.steps:
+                applied = step.is_applied(conn)
+                steps.append({
+                    'description': step.description,
+                    'applied': applied,
+                    'impact': "" if applied else step.impact(conn)
+                })
+            plan.append({'revision': revision.revision, 'description': revision.description, 'steps': steps})
+        return plan
+
+def _run_steps(conn, steps, options) -> float:
+    """Apply the steps whose change is not present yet, committing after each"""
+    elapsed = 0.0
+    for step in steps:
+        if step.is_applied(conn):
+            logger.info(f"  already applied: {step.description}")
+            continue
+        started = time.time()
+        step.apply(conn, options)
+        conn.commit()
+        elapsed += time.time() - started
+        logger.info(f"  {step.description} ({time.time() - started:.1f}s)")
+    return elapsed
+
+def upgrade(engine, target: Optional[str] = None, allow_locking: bool = MIGRATION_ALLOW_LOCKING,
+            skip_backfills: bool = False, batch_size: Optional[int] = None) -> List[str]:
+    """
+    Apply pending revisions in order. Steps whose change is already present are skipped,
+    so an interrupted upgrade is completed by running it again.
+
+    The backfills run after the schema changes of every pending revision, since the batch
+    functions load rows through the current models; a revision is recorded once its
+    backfills are done. For the same reason a target that would run backfills while later
+    revisions are still pending is refused before any change is made.
+
+    Args:
+        target: Last revision to apply (default: all)
+        allow_locking: Run changes MySQL cannot do online with table locks
+        skip_backfills: Record revisions without running their backfills
+        batch_size: Override the batch size of the backfills
+
+    Returns:
+        list: The applied revisions
+    """
+    options = {'allow_locking': allow_locking, 'skip_backfills': skip_backfills, 'batch_size': batch_size}
+    with _connect(engine) as conn:
+        revisions = pending_revisions(conn, target)
+        later = pending_revisions(conn)[len(revisions):]
+        backfills = [step for revision in revisions for step in revision.steps if isinstance(step, Backfill)]
+        if later and backfills and not skip_backfills:
+            raise MigrationError(
+                f"{backfills[0].description} loads rows through the current models, which need the later "
+                f"revisions ({', '.join(revision.revision for revision in later)}). Upgrade without --target, "
+                "or pass --skip-backfills and run the backfills after the final upgrade."
+            )
+
+        durations = {}
+        for revision in revisions:
+            logger.info(f"Applying {revision.revision}: {revision.description}")
+            durations[revision.revision] = _run_steps(
+                conn, [step for step in revision.steps if not isinstance(step, Backfill)], options
+            )
+
+        for revision in revisions:
+            backfills = [step for step in revision.steps if isinstance(step, Backfill)]
+            if backfills:
+                logger.info(f"Backfilling {revision.revision}")
+                durations[revision.revision] += _run_steps(conn, backfills, options)
+            conn.execute(insert(schema_migrations).values(
+                revision=revision.revision,
+                description=revision.description,
+                applied_at=datetime.utcnow(),
+                duration_seconds=durations[revision.revision]
+            ))
+            conn.commit()
+    return [revision.revision for revision in revisions]
+
+def partition_archive(engine, partitions: int) -> bool:
+    """
+    Partition candidates_archive by HASH(user_id), so per-user archive reads touch one
+    partition. Repartitioning copies the table, blocking archive writes (archive jobs and
+    restores) while it runs; the active tables are not affected. The active candidates
+    table cannot be partitioned: it is referenced by foreign keys and every unique key
+    would have to include the partitioning column.
+
+    Returns:
+        bool: Whether the table was partitioned (False if it already was)
+    """
+    with _connect(engine) as conn:
+        partitioned = conn.execute(text("""
+            SELECT COUNT(*)
+            FROM INFORMATION_SCHEMA.PARTITIONS
+            WHERE TABLE_SCHEMA = DATABASE() AND TABLE_NAME = 'candidates_archive' AND PARTITION_NAME IS NOT NULL
+        """)).scalar()
+        if partitioned:
+            return False
+        _execute_ddl(conn, f"ALTER TABLE candidates_archive PARTITION BY HASH(user_id) PARTITIONS {int(partitions)}")
+        conn.commit()
+        return True
+
+def main():
+    parser = argparse.ArgumentParser(description="Versioned schema migrations")
+    parser.add_argument("--status", action="store_true", help="List applied and pending revisions")
+    parser.add_argument("--plan", action="store_true", help="Show the pending steps and their estimated impact")
+    parser.add_argument("--upgrade", action="store_true", help="Apply pending revisions")
+    parser.add_argument("--target", help="Stop after this revision")
+    parser.add_argument("--allow-locking", action="store_true", default=MIGRATION_ALLOW_LOCKING,
+                        help="Run changes MySQL cannot do online with table locks")
+    parser.add_argument("--skip-backfills", action="store_true", help="Only change the schema")
+    parser.add_argument("--batch-size", type=int, help="Rows per backfill transaction")
+    parser.add_argument("--partition-archive", type=int, metavar="N",
+                        help="Partition candidates_archive by HASH(user_id) into N partitions")
+    args = parser.parse_args()
+
+    if args.status:
+        for row in migration_status(engine):
+            print(f"{row['revision']:<32} {row['applied_at'] or 'pending':<26} {row['description']}")
+    elif args.plan:
+        plan = migration_plan(engine, args.target)
+        if not plan:
+            print("✅ Schema is up to date")
+        for revision in plan:
+            print(f"{revision['revision']}: {revision['description']}")
+            for step in revision['steps']:
+                state = "✅ present" if step['applied'] else f"🔧 {step['impact']}"
+                print(f"   - {step['description']}: {state}")
+    elif args.upgrade:
+        try:
+            applied = upgrade(engine, args.target, args.allow_locking, args.skip_backfills, args.batch_size)
+        except MigrationError as e:
+            print(f"❌ {e}")
+            raise SystemExit(1)
+        print(f"✅ Applied {len(applied)} revisions" if applied else "✅ Schema is up to date")
+    elif args.partition_archive:
+        if partition_archive(engine, args.partition_archive):
+            print("✅ candidates_archive partitioned")
+        else:
+            print("✅ candidates_archive is already partitioned")
+    else:
+        parser.print_help()
+
+if __name__ == "__main__":
+    main()
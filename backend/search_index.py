@@ -0,0 +1,102 @@
+"""
+Search Index for Sen AI
+Tokenises candidate skills, jobs, education and location into the terms stored in the
+candidate_search_terms inverted index (see database.CandidateSearchTerm). Text filters
+and ranked search look terms up by prefix on that index instead of scanning with LIKE.
+
+Rebuild the index for existing candidates with:
+
+    python search_index.py --rebuild [--user-id N]
+"""
+
+import re
+import logging
+import argparse
+import unicodedata
+from typing import Dict, List, Set, Tuple
+
+# Configure logging
+logging.basicConfig(level=logging.INFO)
+logger = logging.getLogger(__name__)
+
+# Relevance weight of a term match in each field
+SEARCH_FIELD_WEIGHTS = {
+    "skill": 3,
+    "position": 2,
+    "company": 2,
+    "education": 1,
+    "location": 1,
+}
+
+MAX_TERM_LENGTH = 64
+
+# Words start with a letter or digit and may contain + # . (C++, C#, Node.js)
+_TOKEN_PATTERN = re.compile(r"[a-z0-9][a-z0-9+#.]*")
+
+def normalize(text: str) -> str:
+    """Lowercase and strip accents so 'Zürich' and 'zurich' index the same"""
+    decomposed = unicodedata.normalize("NFKD", text)
+    return "".join(c for c in decomposed if not unicodedata.combining(c)).casefold()
+
+def tokenize(text) -> List[str]:
+    """
+    Split text into search terms
+
+    Returns:
+        list: Distinct terms in order of appearance
+    """
+    if not text:
+        return []
+    terms = []
+    for token in _TOKEN_PATTERN.findall(normalize(str(text))):
+        token = token.rstrip(".")[:MAX_TERM_LENGTH]
+        if token and token not in terms:
+            terms.append(token)
+    return terms
+
+def prefix_upper_bound(term: str) -> str:
+    """Smallest string greater than every string starting with term (binary collation)"""
+    return term[:-1] + chr(ord(term[-1]) + 1)
+
+def candidate_terms(location, children: Dict) -> Set[Tuple[str, str]]:
+    """
+    Build the (field, term) pairs indexed for one candidate
+
+    Args:
+        location (str): Candidate location
+        children (dict): Model -> rows, as built by database._child_rows
+
+    Returns:
+        set: (field, term) pairs
+    """
+    texts = [("location", location)]
+    for model, rows in children.items():
+        for row in rows:
+            if 'skill_name' in row:
+                texts.append(("skill", row['skill_name']))
+            if 'company' in row:
+                texts.append(("company", row['company']))
+                texts.append(("position", row['position']))
+            if 'degree' in row:
+                texts.append(("education", row['degree']))
+                texts.append(("education", row['institution']))
+
+    return {(field, term) for field, text in texts for term in tokenize(text)}
+
+def main():
+    parser = argparse.ArgumentParser(description="Maintain the candidate search index")
+    parser.add_argument("--rebuild", action="store_true", help="Rebuild search terms from the stored candidates")
+    parser.add_argument("--user-id", type=int, default=None, help="Only rebuild this user's candidates")
+    args = parser.parse_args()
+
+    if not args.rebuild:
+        parser.print_help()
+        return
+
+    from database import init_db, rebuild_search_terms
+    init_db()
+    indexed = rebuild_search_terms(user_id=args.user_id)
+    logger.info(f"Indexed {indexed} candidates")
+
+if __name__ == "__main__":
+    main()
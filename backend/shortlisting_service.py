@@ -4,7 +4,7 @@ from typing import List, Dict, Any, Optional
 from groq import Groq
 from dotenv import load_dotenv
 from pydantic import BaseModel
-from database import get_db, Candidate, Education, Skill, WorkExperience
+from database import read_session, Candidate, get_candidate_summaries
 from sqlalchemy.orm import Session
 
 # Load environment variables
@@ -35,51 +35,10 @@ class ShortlistingResult(BaseModel):
 
 def get_candidate_resume_data(candidate_id: int, db: Session) -> Optional[Dict[str, Any]]:
     """
-    Get comprehensive resume data for a candidate from the database
+    Get comprehensive resume data for a candidate from the database (its precomputed summary)
     """
     try:
-        # Get candidate basic info
-        candidate = db.query(Candidate).filter(Candidate.candidate_id == candidate_id).first()
-        if not candidate:
-            return None
-        
-        # Get education
-        education = db.query(Education).filter(Education.candidate_id == candidate_id).all()
-        education_list = []
-        for edu in education:
-            education_list.append({
-                "degree": edu.degree,
-                "institution": edu.institution,
-                "graduation_year": edu.graduation_year
-            })
-        
-        # Get skills
-        skills = db.query(Skill).filter(Skill.candidate_id == candidate_id).all()
-        skills_list = [skill.skill_name for skill in skills]
-        
-        # Get work experience
-        work_experience = db.query(WorkExperience).filter(WorkExperience.candidate_id == candidate_id).all()
-        work_exp_list = []
-        for exp in work_experience:
-            work_exp_list.append({
-                "company": exp.company,
-                "position": exp.position,
-                "duration": exp.duration,
-                "start_date": exp.start_date,
-                "end_date": exp.end_date
-            })
-        
-        return {
-            "candidate_id": candidate.candidate_id,
-            "full_name": candidate.full_name,
-            "email": candidate.email,
-            "phone": candidate.phone,
-            "location": candidate.location,
-            "years_experience": candidate.years_experience,
-            "education": education_list,
-            "skills": skills_list,
-            "work_experience": work_exp_list
-        }
+        return get_candidate_summaries(db, [candidate_id]).get(candidate_id)
     
     except Exception as e:
         logger.error(f"Error getting candidate resume data: {str(e)}")
@@ -241,15 +200,15 @@ def shortlist_candidates(job_description: str, min_score: int = 70, limit: Optio
     """
     Shortlist candidates based on job description
     """
-    db = next(get_db())
+    db = read_session(user_id)
     
     try:
         # Get candidates from database (optionally filtered by user)
-        query = db.query(Candidate)
+        query = db.query(Candidate.candidate_id)
         if user_id:
             query = query.filter(Candidate.user_id == user_id)
         
-        candidates = query.all()
+        candidates = query.order_by(Candidate.candidate_id).all()
         
         if not candidates:
             return ShortlistingResult(
@@ -261,9 +220,10 @@ def shortlist_candidates(job_description: str, min_score: int = 70, limit: Optio
         
         scored_candidates = []
         
-        # Score each candidate
+        # Score each candidate, reading all their summaries in one query
+        candidates_data = get_candidate_summaries(db, [candidate.candidate_id for candidate in candidates])
         for candidate in candidates:
-            candidate_data = get_candidate_resume_data(candidate.candidate_id, db)
+            candidate_data = candidates_data.get(candidate.candidate_id)
             if candidate_data:
                 candidate_score = score_candidate_against_job(candidate_data, job_description)
                 scored_candidates.append(candidate_score)
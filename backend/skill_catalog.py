@@ -0,0 +1,124 @@
+"""
+Skill Catalog for Sen AI
+Maps the free-text skill names found in resumes to canonical skills, so that "Python",
+"python" and "Python 3" are stored as one skill_catalog entry (see database.CatalogSkill)
+and skill filters and statistics work on integer IDs.
+"""
+
+import re
+import logging
+import argparse
+from typing import Optional
+
+from search_index import normalize
+
+# Configure logging
+logging.basicConfig(level=logging.INFO)
+logger = logging.getLogger(__name__)
+
+# Canonical name -> other spellings seen in resumes (compared after skill_key).
+# Skills not listed here keep the spelling of the first resume they were seen in.
+SKILL_ALIASES = {
+    "JavaScript": ["js", "java script", "ecmascript", "es6"],
+    "TypeScript": ["ts"],
+    "Node.js": ["node", "nodejs", "node js"],
+    "React": ["react.js", "reactjs", "react js"],
+    "Vue.js": ["vue", "vuejs"],
+    "Go": ["golang"],
+    "C++": ["cpp"],
+    "C#": ["c sharp", "csharp"],
+    "PostgreSQL": ["postgres", "psql"],
+    "Kubernetes": ["k8s"],
+    "Amazon Web Services": ["aws"],
+    "Google Cloud Platform": ["gcp", "google cloud"],
+    "Machine Learning": ["ml"],
+    "Artificial Intelligence": ["ai"],
+    "Natural Language Processing": ["nlp"],
+    "HTML": ["html5"],
+    "CSS": ["css3"],
+    "Microsoft Excel": ["excel", "ms excel"],
+    "Python": ["python3", "py"],
+    "Java": ["java se", "java ee"],
+    "SQL": [],
+    "MySQL": [],
+    "Docker": [],
+    "Git": [],
+    "Linux": [],
+    "Rust": [],
+}
+
+MAX_SKILL_KEY_LENGTH = 255
+
+# Trailing qualifiers that do not change the skill: "(advanced)", " 3", " v2.7"
+_QUALIFIER_PATTERN = re.compile(r"\s*\([^)]*\)\s*$")
+_VERSION_PATTERN = re.compile(r"\s+v?\d+(\.\d+)*\+?$")
+
+def _strip_qualifiers(name: str) -> str:
+    name = " ".join(name.split())
+    name = _QUALIFIER_PATTERN.sub("", name)
+    return _VERSION_PATTERN.sub("", name).strip()
+
+def skill_key(name) -> Optional[str]:
+    """
+    Lookup key of a skill name: accents and case folded, whitespace collapsed and
+    version or level qualifiers dropped ("Python 3 (Advanced)" -> "python")
+
+    Returns:
+        str: The key, or None if the name has no usable text
+    """
+    if not name:
+        return None
+    key = _strip_qualifiers(normalize(str(name)))
+    return key[:MAX_SKILL_KEY_LENGTH] or None
+
+_CANONICAL_BY_KEY = {}
+_KEYS_BY_CANONICAL = {}
+for _canonical, _aliases in SKILL_ALIASES.items():
+    for _alias in [_canonical] + _aliases:
+        _CANONICAL_BY_KEY[skill_key(_alias)] = _canonical
+        _KEYS_BY_CANONICAL.setdefault(_canonical, set()).add(skill_key(_alias))
+
+def canonical_skill_name(name) -> Optional[str]:
+    """
+    Display name of the catalog entry for a skill name: the SKILL_ALIASES entry it is a
+    spelling of, otherwise the name itself without qualifiers
+
+    Returns:
+        str: The canonical name, or None if the name has no usable text
+    """
+    key = skill_key(name)
+    if key is None:
+        return None
+    return _CANONICAL_BY_KEY.get(key) or _strip_qualifiers(str(name))[:MAX_SKILL_KEY_LENGTH]
+
+def skill_spellings(name) -> set:
+    """
+    Lookup keys a skill may be stored under: every SKILL_ALIASES spelling of its canonical
+    skill ("golang" -> {"go", "golang"}), otherwise just its own key. The skill_aliases table
+    only holds spellings seen in resumes, so filters look up all of them.
+
+    Returns:
+        set: The keys, empty if the name has no usable text
+    """
+    key = skill_key(name)
+    if key is None:
+        return set()
+    canonical = _CANONICAL_BY_KEY.get(key)
+    return set(_KEYS_BY_CANONICAL[canonical]) if canonical else {key}
+
+def main():
+    parser = argparse.ArgumentParser(description="Maintain the skill catalog")
+    parser.add_argument("--backfill", action="store_true", help="Link skill rows saved before the catalog existed")
+    args = parser.parse_args()
+
+    if not args.backfill:
+        parser.print_help()
+        return
+
+    from database import init_db, backfill_skill_catalog
+    init_db()
+    linked = backfill_skill_catalog()
+    logger.info(f"Linked {linked} skill rows to the catalog")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,118 @@
+"""
+Text Extraction for Sen AI
+Extracts text from PDF, DOCX and TXT resumes, falling back to OCR for scanned documents.
+Kept free of API and database imports so it can run in worker processes.
+"""
+
+import io
+import PyPDF2
+import docx
+from PIL import Image
+import pytesseract
+
+try:
+    from pdf2image import convert_from_path
+except ImportError:
+    print("pdf2image is not installed. OCR functionality might be limited.")
+    # Fallback function to avoid errors if pdf2image is not installed
+    def convert_from_path(*args, **kwargs):
+        return []
+
+def extract_text_from_pdf(file_path):
+    """Extracts text from a PDF file."""
+    pdf_reader = PyPDF2.PdfReader(file_path)
+    text = ""
+    for page_num in range(len(pdf_reader.pages)):
+        page = pdf_reader.pages[page_num]
+        page_text = page.extract_text()
+        text += page_text
+    
+    # Check if text extraction failed or returned very little text
+    if len(text.strip()) < 100:  # Adjust threshold as needed
+        print("Standard text extraction yielded minimal results. Attempting OCR...")
+        text = extract_text_using_ocr(file_path)
+    
+    return text
+
+def extract_text_using_ocr(file_path):
+    """Extracts text from images/scanned PDFs using OCR."""
+    text = ""
+    try:
+        images = convert_from_path(file_path)
+        for image in images:
+            text += pytesseract.image_to_string(image)
+    except Exception as e:
+        print(f"OCR error: {str(e)}")
+    
+    return text
+
+def extract_text_from_docx(file_path):
+    """Extracts text from a Word document."""
+    doc = docx.Document(file_path)
+    full_text = []
+    
+    # Extract text from paragraphs
+    for para in doc.paragraphs:
+        full_text.append(para.text)
+    
+    # Also extract text from tables
+    for table in doc.tables:
+        for row in table.rows:
+            for cell in row.cells:
+                full_text.append(cell.text)
+    
+    extracted_text = '\n'.join(full_text)
+    
+    # Check if extracted text is minimal
+    if len(extracted_text.strip()) < 100:  # Adjust threshold as needed
+        print("Standard text extraction yielded minimal results from DOCX. Attempting OCR on document images...")
+        extracted_text = extract_text_from_docx_images(file_path) or extracted_text
+    
+    return extracted_text
+
+def extract_text_from_docx_images(file_path):
+    """Extract text from images embedded in a DOCX file using OCR."""
+    try:
+        # Load the document
+        doc = docx.Document(file_path)
+        
+        # Extract and process images
+        extracted_text = ""
+        
+        for rel in doc.part.rels.values():
+            if "image" in rel.target_ref:
+                try:
+                    # Get image data
+                    image_data = rel.target_part.blob
+                    
+                    # Create a PIL Image from binary data
+                    image = Image.open(io.BytesIO(image_data))
+                    
+                    # Use OCR to extract text
+                    image_text = pytesseract.image_to_string(image)
+                    if image_text.strip():
+                        extracted_text += image_text + "\n\n"
+                except Exception as e:
+                    print(f"Error processing image in DOCX: {str(e)}")
+                    continue
+        
+        return extracted_text
+    except Exception as e:
+        print(f"Error extracting images from DOCX: {str(e)}")
+        return ""
+
+def extract_text_from_txt(file_path):
+    """Extracts text from a text file."""
+    with open(file_path, 'r', encoding='utf-8') as file:
+        text = file.read()
+    return text
+
+def extract_text_from_file(file_path, file_extension):
+    """Extracts text from a file based on its extension (pdf, docx or txt)."""
+    if file_extension == "pdf":
+        return extract_text_from_pdf(file_path)
+    elif file_extension == "docx":
+        return extract_text_from_docx(file_path)
+    elif file_extension == "txt":
+        return extract_text_from_txt(file_path)
+    raise ValueError(f"Unsupported file format: {file_extension}")
@@ -9,22 +9,53 @@ CREATE TABLE "candidates" (
   "resume_s3_url" varchar(1000) DEFAULT NULL,
   "original_filename" varchar(255) DEFAULT NULL,
   "status" enum('PENDING','SHORTLISTED','REJECTED') DEFAULT NULL,
-  "created_at" datetime DEFAULT NULL,
+  "created_at" datetime NOT NULL,
   "updated_at" datetime DEFAULT NULL,
   "file_hash" varchar(64) DEFAULT NULL,
   "batch_id" varchar(36) DEFAULT NULL,
   "user_id" int DEFAULT NULL,
+  "city" varchar(100) DEFAULT NULL,
+  "region" varchar(100) DEFAULT NULL,
+  "country" varchar(100) DEFAULT NULL,
   PRIMARY KEY ("candidate_id"),
+  UNIQUE KEY "uq_candidates_user_email" ("user_id","email"),
+  UNIQUE KEY "uq_candidates_user_file_hash" ("user_id","file_hash"),
   KEY "idx_user_id" ("user_id"),
   KEY "idx_candidates_user_id" ("user_id"),
   KEY "idx_candidates_status" ("status"),
   KEY "idx_candidates_years_experience" ("years_experience"),
   KEY "idx_candidates_location" ("location"),
-  KEY "idx_candidates_email" ("email"),
   KEY "idx_candidates_created_at" ("created_at"),
-  KEY "idx_candidates_file_hash" ("file_hash"),
   KEY "idx_candidates_user_status" ("user_id","status"),
-  KEY "idx_candidates_user_experience" ("user_id","years_experience")
+  KEY "idx_candidates_user_experience" ("user_id","years_experience"),
+  KEY "idx_candidates_user_created" ("user_id","created_at","candidate_id"),
+  KEY "idx_candidates_user_country" ("user_id","country","region","city"),
+  KEY "idx_candidates_user_city" ("user_id","city")
+);
+
+
+CREATE TABLE "candidate_search_terms" (
+  "term_id" int NOT NULL AUTO_INCREMENT,
+  "user_id" int NOT NULL,
+  "candidate_id" int NOT NULL,
+  "field" varchar(20) NOT NULL,
+  "term" varchar(64) CHARACTER SET utf8mb4 COLLATE utf8mb4_bin NOT NULL,
+  PRIMARY KEY ("term_id"),
+  KEY "idx_search_terms_lookup" ("user_id","field","term","candidate_id"),
+  KEY "idx_search_terms_candidate_id" ("candidate_id"),
+  CONSTRAINT "candidate_search_terms_ibfk_1" FOREIGN KEY ("candidate_id") REFERENCES "candidates" ("candidate_id") ON DELETE CASCADE
+);
+
+
+CREATE TABLE "candidate_summaries" (
+  "candidate_id" int NOT NULL,
+  "user_id" int NOT NULL,
+  "document" text NOT NULL,
+  "prompt_text" text NOT NULL,
+  "updated_at" datetime DEFAULT NULL,
+  PRIMARY KEY ("candidate_id"),
+  KEY "idx_candidate_summaries_user" ("user_id","candidate_id"),
+  CONSTRAINT "candidate_summaries_ibfk_1" FOREIGN KEY ("candidate_id") REFERENCES "candidates" ("candidate_id") ON DELETE CASCADE
 );
 
 
@@ -70,6 +101,44 @@ CREATE TABLE "education" (
 );
 
 
+CREATE TABLE "ingestion_jobs" (
+  "job_id" int NOT NULL AUTO_INCREMENT,
+  "batch_id" varchar(36) NOT NULL,
+  "user_id" int NOT NULL,
+  "status" varchar(20) DEFAULT NULL,
+  "parse" tinyint(1) DEFAULT NULL,
+  "save_to_db" tinyint(1) DEFAULT NULL,
+  "duplicate_handling" varchar(20) DEFAULT NULL,
+  "total_files" int DEFAULT NULL,
+  "created_at" datetime DEFAULT NULL,
+  "updated_at" datetime DEFAULT NULL,
+  "finished_at" datetime DEFAULT NULL,
+  PRIMARY KEY ("job_id"),
+  UNIQUE KEY "batch_id" ("batch_id"),
+  KEY "ix_ingestion_jobs_user_id" ("user_id")
+);
+
+CREATE TABLE "ingestion_job_files" (
+  "file_id" int NOT NULL AUTO_INCREMENT,
+  "batch_id" varchar(36) NOT NULL,
+  "position" int DEFAULT NULL,
+  "filename" varchar(255) DEFAULT NULL,
+  "staging_key" varchar(1000) DEFAULT NULL,
+  "status" varchar(20) DEFAULT NULL,
+  "attempts" int DEFAULT NULL,
+  "locked_by" varchar(100) DEFAULT NULL,
+  "locked_at" datetime DEFAULT NULL,
+  "candidate_id" int DEFAULT NULL,
+  "existing_candidate_id" int DEFAULT NULL,
+  "message" text,
+  "created_at" datetime DEFAULT NULL,
+  "finished_at" datetime DEFAULT NULL,
+  PRIMARY KEY ("file_id"),
+  KEY "batch_id" ("batch_id"),
+  KEY "ix_ingestion_job_files_status" ("status"),
+  CONSTRAINT "ingestion_job_files_ibfk_1" FOREIGN KEY ("batch_id") REFERENCES "ingestion_jobs" ("batch_id") ON DELETE CASCADE
+);
+
 CREATE TABLE "sessions" (
   "session_id" varchar(128) CHARACTER SET utf8mb4 COLLATE utf8mb4_bin NOT NULL,
   "expires" int unsigned NOT NULL,
@@ -77,16 +146,35 @@ CREATE TABLE "sessions" (
   PRIMARY KEY ("session_id")
 );
 
+CREATE TABLE "skill_catalog" (
+  "catalog_skill_id" int NOT NULL AUTO_INCREMENT,
+  "canonical_name" varchar(255) NOT NULL,
+  "created_at" datetime DEFAULT NULL,
+  PRIMARY KEY ("catalog_skill_id"),
+  UNIQUE KEY "canonical_name" ("canonical_name")
+);
+
+CREATE TABLE "skill_aliases" (
+  "alias" varchar(255) NOT NULL,
+  "catalog_skill_id" int NOT NULL,
+  PRIMARY KEY ("alias"),
+  KEY "idx_skill_aliases_catalog_skill_id" ("catalog_skill_id"),
+  CONSTRAINT "skill_aliases_ibfk_1" FOREIGN KEY ("catalog_skill_id") REFERENCES "skill_catalog" ("catalog_skill_id") ON DELETE CASCADE
+);
+
 CREATE TABLE "skills" (
   "skill_id" int NOT NULL AUTO_INCREMENT,
   "candidate_id" int DEFAULT NULL,
+  "catalog_skill_id" int DEFAULT NULL,
   "skill_name" text,
   "skill_category" enum('TECHNICAL','SOFT','LANGUAGE','OTHER') DEFAULT NULL,
   "proficiency_level" enum('BEGINNER','INTERMEDIATE','ADVANCED','EXPERT','UNKNOWN') DEFAULT NULL,
   PRIMARY KEY ("skill_id"),
   KEY "idx_skills_candidate_id" ("candidate_id"),
+  KEY "idx_skills_catalog_candidate" ("catalog_skill_id","candidate_id"),
   KEY "idx_skills_category" ("skill_category"),
-  CONSTRAINT "skills_ibfk_1" FOREIGN KEY ("candidate_id") REFERENCES "candidates" ("candidate_id") ON DELETE CASCADE
+  CONSTRAINT "skills_ibfk_1" FOREIGN KEY ("candidate_id") REFERENCES "candidates" ("candidate_id") ON DELETE CASCADE,
+  CONSTRAINT "skills_ibfk_2" FOREIGN KEY ("catalog_skill_id") REFERENCES "skill_catalog" ("catalog_skill_id")
 );
 
 CREATE TABLE "users" (
@@ -112,15 +200,99 @@ CREATE TABLE "work_experiences" (
   "end_date" varchar(50) DEFAULT NULL,
   "duration" varchar(100) DEFAULT NULL,
   "description" text,
+  "start_on" date DEFAULT NULL,
+  "end_on" date DEFAULT NULL,
+  "is_current" tinyint(1) DEFAULT NULL,
+  "tenure_months" int DEFAULT NULL,
   PRIMARY KEY ("experience_id"),
   KEY "idx_work_exp_candidate_id" ("candidate_id"),
   KEY "idx_work_exp_company" ("company"),
   KEY "idx_work_exp_position" ("position"),
+  KEY "idx_work_exp_end_on" ("end_on","candidate_id"),
+  KEY "idx_work_exp_current_start_on" ("is_current","start_on","candidate_id"),
+  KEY "idx_work_exp_tenure" ("tenure_months","candidate_id"),
   CONSTRAINT "work_experiences_ibfk_1" FOREIGN KEY ("candidate_id") REFERENCES "candidates" ("candidate_id") ON DELETE CASCADE
 );
 
+CREATE TABLE "candidates_archive" (
+  "candidate_id" int NOT NULL,
+  "user_id" int NOT NULL,
+  "full_name" varchar(255) NOT NULL,
+  "email" varchar(255) DEFAULT NULL,
+  "phone" varchar(50) DEFAULT NULL,
+  "location" varchar(255) DEFAULT NULL,
+  "city" varchar(100) DEFAULT NULL,
+  "region" varchar(100) DEFAULT NULL,
+  "country" varchar(100) DEFAULT NULL,
+  "years_experience" int DEFAULT NULL,
+  "resume_file_path" varchar(1000) DEFAULT NULL,
+  "resume_s3_url" varchar(1000) DEFAULT NULL,
+  "original_filename" varchar(255) DEFAULT NULL,
+  "file_hash" varchar(64) DEFAULT NULL,
+  "batch_id" varchar(36) DEFAULT NULL,
+  "status" enum('PENDING','SHORTLISTED','REJECTED') DEFAULT NULL,
+  "created_at" datetime NOT NULL,
+  "updated_at" datetime DEFAULT NULL,
+  "archived_at" datetime NOT NULL,
+  PRIMARY KEY ("user_id","candidate_id")
+);
+
+CREATE TABLE "education_archive" (
+  "education_id" int NOT NULL,
+  "candidate_id" int DEFAULT NULL,
+  "degree" varchar(255) DEFAULT NULL,
+  "institution" varchar(255) DEFAULT NULL,
+  "graduation_year" int DEFAULT NULL,
+  "gpa" float DEFAULT NULL,
+  PRIMARY KEY ("education_id"),
+  KEY "idx_education_archive_candidate_id" ("candidate_id")
+);
+
+CREATE TABLE "skills_archive" (
+  "skill_id" int NOT NULL,
+  "candidate_id" int DEFAULT NULL,
+  "catalog_skill_id" int DEFAULT NULL,
+  "skill_name" varchar(255) DEFAULT NULL,
+  "skill_category" enum('TECHNICAL','SOFT','LANGUAGE','OTHER') DEFAULT NULL,
+  "proficiency_level" enum('BEGINNER','INTERMEDIATE','ADVANCED','EXPERT','UNKNOWN') DEFAULT NULL,
+  PRIMARY KEY ("skill_id"),
+  KEY "idx_skills_archive_candidate_id" ("candidate_id")
+);
+
+CREATE TABLE "work_experiences_archive" (
+  "experience_id" int NOT NULL,
+  "candidate_id" int DEFAULT NULL,
+  "company" varchar(255) DEFAULT NULL,
+  "position" varchar(255) DEFAULT NULL,
+  "start_date" varchar(50) DEFAULT NULL,
+  "end_date" varchar(50) DEFAULT NULL,
+  "duration" varchar(100) DEFAULT NULL,
+  "description" text,
+  "start_on" date DEFAULT NULL,
+  "end_on" date DEFAULT NULL,
+  "is_current" tinyint(1) DEFAULT NULL,
+  "tenure_months" int DEFAULT NULL,
+  PRIMARY KEY ("experience_id"),
+  KEY "idx_work_exp_archive_candidate_id" ("candidate_id")
+);
+
+
 
 
 
 
 
+
+CREATE TABLE "replica_write_marks" (
+  "user_id" int NOT NULL,
+  "version" bigint NOT NULL,
+  PRIMARY KEY ("user_id")
+);
+
+CREATE TABLE "schema_migrations" (
+  "revision" varchar(100) NOT NULL,
+  "description" varchar(255) NOT NULL,
+  "applied_at" datetime NOT NULL,
+  "duration_seconds" float DEFAULT NULL,
+  PRIMARY KEY ("revision")
+);